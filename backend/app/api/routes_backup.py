@@ -1,10 +1,25 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from typing import List, Optional
+import asyncio
+import json
+from datetime import date
+from fastapi import APIRouter, HTTPException, Depends, Request, status
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, Any
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
 from app.models.strategy import Strategy, StrategyCreate, StrategyUpdate
 from app.services.backup_service import BackupService
+from app.services.tuning_service import TuningAdvisor
 from app.repositories.strategy_repo import StrategyRepository
+from app.repositories.backup_piece_repo import BackupPieceRepository
+from app.models.backup_piece import BackupPiece
+from app.repositories.verification_repo import VerificationRepository
+from app.repositories.log_repo import LogRepository
+from app.repositories.storage_usage_repo import StorageUsageRepository
+from app.models.verification import Verification, VerificationMode
+from app.services.verification_service import backup_verifier
+from app.services.retention_service import retention_engine
+from app.core.backup_executor import backup_executor, BackupAlreadyRunningError
+from app.services.progress_service import progress_tracker
 
 router = APIRouter(prefix="/api/backup", tags=["backup"])
 
@@ -143,7 +158,10 @@ async def execute_strategy(
             )
         
         backup_service = BackupService(db)
-        result = await backup_service.execute_backup_strategy(strategy)
+        result = await backup_executor.run(
+            strategy,
+            lambda: backup_service.execute_backup_strategy(strategy)
+        )
         
         return {
             "message": "Backup ejecutado",
@@ -154,12 +172,130 @@ async def execute_strategy(
         
     except HTTPException:
         raise
+    except BackupAlreadyRunningError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error ejecutando backup: {str(e)}"
         )
 
+@router.post("/runs/{log_id}/cancel")
+async def cancel_backup_run(log_id: int):
+    """Cancela una ejecución de backup en curso"""
+    try:
+        from app.services.rman_executor import rman_executor
+        cancelled = await rman_executor.cancel(log_id)
+        if not cancelled:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No hay una ejecución de RMAN en curso para este log"
+            )
+        
+        return {"message": "Cancelación solicitada", "log_id": log_id}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error cancelando backup: {str(e)}"
+        )
+
+@router.get("/runs/{log_id}/pieces", response_model=List[BackupPiece])
+async def get_run_pieces(
+    log_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """Obtiene las piezas de backup generadas por una ejecución"""
+    try:
+        piece_repo = BackupPieceRepository(db)
+        return await piece_repo.get_by_log(log_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error obteniendo piezas de backup: {str(e)}"
+        )
+
+@router.get("/pieces/drift", response_model=List[BackupPiece])
+async def get_piece_drift(
+    strategy_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Piezas cuyo último scrub no coincidió con el checksum registrado"""
+    try:
+        piece_repo = BackupPieceRepository(db)
+        return await piece_repo.get_drift(strategy_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error obteniendo piezas con diferencias: {str(e)}"
+        )
+
+@router.get("/storage")
+async def get_storage_usage(
+    strategy_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Uso de disco total, por estrategia y por día (índice backup_storage_usage)"""
+    try:
+        usage_repo = StorageUsageRepository(db)
+        return {
+            "total": await usage_repo.get_total(),
+            "strategies": await usage_repo.get_by_strategy(),
+            "days": await usage_repo.get_by_day(strategy_id, start_date, end_date),
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error obteniendo el uso de disco: {str(e)}"
+        )
+
+@router.get("/runs/{log_id}/verifications", response_model=List[Verification])
+async def get_run_verifications(
+    log_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """Verificaciones RMAN (VALIDATE) de una ejecución con su evidencia"""
+    try:
+        verification_repo = VerificationRepository(db)
+        return await verification_repo.get_by_log(log_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error obteniendo verificaciones: {str(e)}"
+        )
+
+@router.post("/runs/{log_id}/verify", response_model=Verification, status_code=status.HTTP_202_ACCEPTED)
+async def verify_run(
+    log_id: int,
+    mode: VerificationMode = VerificationMode.BACKUPSET,
+    db: AsyncSession = Depends(get_db)
+):
+    """Encola la verificación de una ejecución (mode=restore para una prueba de restauración)"""
+    try:
+        log_repo = LogRepository(db)
+        log = await log_repo.get_by_id(log_id)
+        if not log:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Ejecución no encontrada"
+            )
+        
+        return await backup_verifier.enqueue(log_id, log.strategy_id, mode)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error encolando la verificación: {str(e)}"
+        )
+
 @router.post("/strategies/{strategy_id}/toggle")
 async def toggle_strategy(
     strategy_id: int,
@@ -219,6 +355,158 @@ async def validate_strategy(
             detail=f"Error validando estrategia: {str(e)}"
         )
 
+@router.get("/strategies/{strategy_id}/tuning")
+async def get_strategy_tuning(
+    strategy_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """Recomendación de canales y compresión según el historial de la estrategia"""
+    try:
+        strategy_repo = StrategyRepository(db)
+        strategy = await strategy_repo.get_by_id(strategy_id)
+        if not strategy:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Estrategia no encontrada"
+            )
+        
+        return await TuningAdvisor(db).recommend(strategy)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error calculando recomendación: {str(e)}"
+        )
+
+@router.post("/strategies/{strategy_id}/tuning/apply")
+async def apply_strategy_tuning(
+    strategy_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """Aplica a la estrategia los canales y la compresión recomendados"""
+    try:
+        strategy_repo = StrategyRepository(db)
+        strategy = await strategy_repo.get_by_id(strategy_id)
+        if not strategy:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Estrategia no encontrada"
+            )
+        
+        advisor = TuningAdvisor(db)
+        recommendation = await advisor.recommend(strategy)
+        updated = await advisor.apply(strategy, recommendation)
+        if not updated:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="No se pudo actualizar la estrategia"
+            )
+        
+        return {
+            "recommendation": recommendation,
+            "strategy": updated
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error aplicando recomendación: {str(e)}"
+        )
+
+@router.get("/strategies/{strategy_id}/retention")
+async def get_strategy_retention(strategy_id: int, db: AsyncSession = Depends(get_db)):
+    """Ejecuciones que la política de retención eliminaría (sin borrar nada)"""
+    try:
+        strategy_repo = StrategyRepository(db)
+        strategy = await strategy_repo.get_by_id(strategy_id)
+        if not strategy:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Estrategia no encontrada"
+            )
+        
+        return await retention_engine.plan(strategy)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error calculando la retención: {str(e)}"
+        )
+
+@router.post("/strategies/{strategy_id}/retention/apply")
+async def apply_strategy_retention(strategy_id: int, dry_run: bool = False, db: AsyncSession = Depends(get_db)):
+    """Elimina ahora las ejecuciones obsoletas de una estrategia (dry_run=true solo las lista)"""
+    try:
+        strategy_repo = StrategyRepository(db)
+        strategy = await strategy_repo.get_by_id(strategy_id)
+        if not strategy:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Estrategia no encontrada"
+            )
+        
+        if not dry_run and backup_executor.get_status()['running_count'] > 0:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Hay backups en curso; la retención se aplicará en el próximo job"
+            )
+        
+        return await retention_engine.apply(strategy, dry_run=dry_run)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error aplicando la retención: {str(e)}"
+        )
+
+@router.get("/queue")
+async def get_backup_queue():
+    """Obtiene el estado de la cola de ejecución de backups"""
+    try:
+        return backup_executor.get_status()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error obteniendo cola de backups: {str(e)}"
+        )
+
+@router.get("/progress")
+async def get_backup_progress():
+    """Obtiene el progreso de los backups en ejecución"""
+    return {"running": progress_tracker.snapshot()}
+
+@router.get("/progress/stream")
+async def stream_backup_progress(request: Request):
+    """Transmite el progreso de los backups mediante Server-Sent Events"""
+    queue = progress_tracker.subscribe()
+    
+    async def event_stream():
+        try:
+            yield _sse_event("snapshot", {"running": progress_tracker.snapshot()})
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=15)
+                    yield _sse_event(message['event'], message['data'])
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+        finally:
+            progress_tracker.unsubscribe(queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
 @router.get("/scheduled-jobs")
 async def get_scheduled_jobs():
     """Obtiene información de los jobs programados"""
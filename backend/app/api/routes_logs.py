@@ -1,41 +1,62 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
+import os
+from fastapi import APIRouter, HTTPException, Query, Depends, Header
 from fastapi import status as http_status
-from typing import List, Optional
+from fastapi.responses import Response, StreamingResponse, FileResponse
+from starlette.background import BackgroundTask
+from typing import List, Optional, Tuple
 from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
-from app.models.log import Log, LogLevel, BackupStatus
+from app.core.config import settings
+from app.models.log import Log, LogLevel, BackupStatus, LogSummary, LogRmanOutput
 from app.services.log_service import LogService
+from app.services.report_service import AuditReportService
 from app.repositories.log_repo import LogRepository
 
 router = APIRouter(prefix="/api/logs", tags=["logs"])
 
-@router.get("/", response_model=List[Log])
+@router.get("/", response_model=List[LogSummary])
 async def get_logs(
+    response: Response,
     strategy_id: Optional[int] = None,
     level: Optional[LogLevel] = None,
     status: Optional[BackupStatus] = None,
     days: int = Query(7, ge=1, le=365),
     limit: int = Query(100, ge=1, le=1000),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Cursor devuelto en X-Next-Cursor"),
     db: AsyncSession = Depends(get_db)
 ):
-    """Obtiene logs con filtros opcionales"""
+    """Obtiene logs con filtros opcionales, paginados por cursor (cabecera X-Next-Cursor)"""
+    if cursor and offset:
+        raise HTTPException(
+            status_code=http_status.HTTP_400_BAD_REQUEST,
+            detail="Use cursor u offset, no ambos"
+        )
     try:
         log_service = LogService(db)
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
         
-        if strategy_id:
-            logs = await log_service.get_strategy_logs(strategy_id, limit, offset)
-            return logs
-        else:
-            logs = await log_service.get_logs_by_date_range(
-                start_date, end_date, level, status
-            )
-            # Aplicar limit después de obtener los resultados
-            return logs[:limit]
-            
+        logs, next_cursor = await log_service.search_logs(
+            strategy_id=strategy_id,
+            level=level,
+            status=status,
+            start_date=start_date,
+            end_date=end_date,
+            limit=limit,
+            cursor=cursor,
+            offset=offset
+        )
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return logs
+    
+    except ValueError as e:
+        raise HTTPException(
+            status_code=http_status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -57,7 +78,117 @@ async def get_log(
         )
     return log
 
-@router.get("/strategy/{strategy_id}", response_model=List[Log])
+@router.get("/{log_id}/rman-output", response_model=LogRmanOutput)
+async def get_log_rman_output(
+    log_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """Obtiene la salida RMAN, el error y los detalles de un log (carga diferida)"""
+    log_service = LogService(db)
+    output = await log_service.get_rman_output(log_id)
+    if not output:
+        raise HTTPException(
+            status_code=http_status.HTTP_404_NOT_FOUND,
+            detail="Log no encontrado"
+        )
+    return output
+
+@router.get("/{log_id}/rman-log")
+async def get_rman_log(
+    log_id: int,
+    offset: int = Query(0, ge=0),
+    length: int = Query(64 * 1024, ge=1, le=4 * 1024 * 1024),
+    range_header: Optional[str] = Header(None, alias="Range"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Obtiene un rango de bytes del log RMAN (admite la cabecera HTTP Range)"""
+    log_service = LogService(db)
+    total_size = await log_service.get_rman_log_size(log_id)
+    if total_size is None:
+        raise HTTPException(
+            status_code=http_status.HTTP_404_NOT_FOUND,
+            detail="Log RMAN no disponible"
+        )
+    
+    if range_header:
+        parsed = _parse_range_header(range_header, total_size)
+        if parsed is None:
+            raise HTTPException(
+                status_code=http_status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                detail="Rango no válido",
+                headers={"Content-Range": f"bytes */{total_size}"}
+            )
+        offset, length = parsed
+    elif offset and offset >= total_size:
+        raise HTTPException(
+            status_code=http_status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="El offset supera el tamaño del log",
+            headers={"Content-Range": f"bytes */{total_size}"}
+        )
+    
+    data = await log_service.get_rman_log_range(log_id, offset, length)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "X-Log-Size": str(total_size),
+        "X-Log-Offset": str(offset)
+    }
+    if not range_header:
+        # Sin cabecera Range la respuesta es un 200 normal (offset/length por query)
+        return Response(content=data, media_type="text/plain; charset=utf-8", headers=headers)
+    
+    headers["Content-Range"] = f"bytes {offset}-{offset + len(data) - 1}/{total_size}"
+    return Response(
+        content=data,
+        status_code=http_status.HTTP_206_PARTIAL_CONTENT,
+        media_type="text/plain; charset=utf-8",
+        headers=headers
+    )
+
+@router.get("/{log_id}/rman-log/tail")
+async def get_rman_log_tail(
+    log_id: int,
+    nbytes: int = Query(16 * 1024, ge=1, le=4 * 1024 * 1024, alias="bytes"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Obtiene los últimos bytes del log RMAN"""
+    log_service = LogService(db)
+    total_size = await log_service.get_rman_log_size(log_id)
+    if total_size is None:
+        raise HTTPException(
+            status_code=http_status.HTTP_404_NOT_FOUND,
+            detail="Log RMAN no disponible"
+        )
+    
+    data = await log_service.get_rman_log_tail(log_id, nbytes)
+    return Response(
+        content=data,
+        media_type="text/plain; charset=utf-8",
+        headers={
+            "X-Log-Size": str(total_size),
+            "X-Log-Offset": str(total_size - len(data))
+        }
+    )
+
+def _parse_range_header(range_header: str, total_size: int) -> Optional[Tuple[int, int]]:
+    """Convierte 'bytes=inicio-fin' o 'bytes=-n' en (offset, length)"""
+    if not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    start_str, _, end_str = range_header[len("bytes="):].strip().partition("-")
+    try:
+        if not start_str:
+            suffix = int(end_str)
+            start = max(total_size - suffix, 0)
+            end = total_size - 1
+        else:
+            start = int(start_str)
+            end = min(int(end_str), total_size - 1) if end_str else total_size - 1
+    except ValueError:
+        return None
+    if start >= total_size or end < start:
+        return None
+    return start, end - start + 1
+
+@router.get("/strategy/{strategy_id}", response_model=List[LogSummary])
 async def get_strategy_logs(
     strategy_id: int,
     limit: int = Query(100, ge=1, le=1000),
@@ -78,12 +209,15 @@ async def get_strategy_logs(
 @router.get("/statistics/backup")
 async def get_backup_statistics(
     days: int = Query(30, ge=1, le=365),
+    strategy_id: Optional[int] = None,
+    by_strategy: bool = False,
+    by_day: bool = False,
     db: AsyncSession = Depends(get_db)
 ):
     """Obtiene estadísticas de backups"""
     try:
         log_service = LogService(db)
-        stats = await log_service.get_backup_statistics(days)
+        stats = await log_service.get_backup_statistics(days, strategy_id, by_strategy, by_day)
         return stats
     except Exception as e:
         raise HTTPException(
@@ -95,28 +229,32 @@ async def get_backup_statistics(
 async def export_logs_csv(
     start_date: datetime,
     end_date: datetime,
+    strategy_id: Optional[int] = None,
     level: Optional[LogLevel] = None,
     status: Optional[BackupStatus] = None,
+    gzip: bool = Query(False, description="Comprimir el CSV con gzip"),
     db: AsyncSession = Depends(get_db)
 ):
-    """Exporta logs a formato CSV"""
+    """Exporta logs a formato CSV en streaming"""
     try:
-        log_service = LogService(db)
-        csv_content = await log_service.export_logs_to_csv(start_date, end_date)
-        
-        if not csv_content:
+        if start_date > end_date:
             raise HTTPException(
-                status_code=http_status.HTTP_404_NOT_FOUND,
-                detail="No hay logs para exportar en el rango especificado"
+                status_code=http_status.HTTP_400_BAD_REQUEST,
+                detail="La fecha inicial debe ser anterior a la final"
             )
         
-        # Crear respuesta con archivo CSV
-        from fastapi.responses import Response
-        return Response(
-            content=csv_content,
-            media_type="text/csv",
+        log_service = LogService(db)
+        filename = f"backup_logs_{start_date.date()}_to_{end_date.date()}.csv"
+        if gzip:
+            filename += ".gz"
+        
+        return StreamingResponse(
+            log_service.stream_logs_csv(
+                start_date, end_date, strategy_id, level, status, compress=gzip
+            ),
+            media_type="application/gzip" if gzip else "text/csv; charset=utf-8",
             headers={
-                "Content-Disposition": f"attachment; filename=backup_logs_{start_date.date()}_to_{end_date.date()}.csv"
+                "Content-Disposition": f"attachment; filename={filename}"
             }
         )
         
@@ -128,6 +266,54 @@ async def export_logs_csv(
             detail=f"Error exportando logs: {str(e)}"
         )
 
+@router.get("/export/pdf")
+async def export_logs_pdf(
+    start_date: datetime,
+    end_date: datetime,
+    strategy_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Genera el reporte de auditoría en PDF (cacheado para rangos cerrados)"""
+    try:
+        if start_date > end_date:
+            raise HTTPException(
+                status_code=http_status.HTTP_400_BAD_REQUEST,
+                detail="La fecha inicial debe ser anterior a la final"
+            )
+        
+        report_service = AuditReportService(db)
+        path, temporary = await report_service.get_pdf_report(start_date, end_date, strategy_id)
+        
+        return FileResponse(
+            path,
+            media_type="application/pdf",
+            filename=f"auditoria_backups_{start_date.date()}_to_{end_date.date()}.pdf",
+            background=BackgroundTask(os.remove, path) if temporary else None
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error generando reporte PDF: {str(e)}"
+        )
+
+@router.delete("/purge")
+async def purge_logs(
+    older_than_days: int = Query(settings.LOG_RETENTION_DAYS, ge=1),
+    db: AsyncSession = Depends(get_db)
+):
+    """Purga los logs más antiguos que la retención indicada"""
+    try:
+        log_service = LogService(db)
+        return await log_service.purge_old_logs(older_than_days)
+    except Exception as e:
+        raise HTTPException(
+            status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error purgando logs: {str(e)}"
+        )
+
 @router.delete("/{log_id}")
 async def delete_log(
     log_id: int,
@@ -1,12 +1,24 @@
 import asyncio
-from fastapi import APIRouter, HTTPException, Depends
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
 from app.core.config import settings
 from app.utils.oracle_connection import OracleConnection
+from app.services.metadata_cache import database_metadata
+from app.services.notification_dispatcher import notification_dispatcher
+from app.services.verification_service import backup_verifier
+from app.services.checksum_service import checksum_service
+from app.services.retention_service import retention_engine
+from app.services.catalog_maintenance_service import catalog_maintenance
+from app.services.storage_usage_service import storage_usage
 from app.services.email_service import EmailService
 from app.core.scheduler import backup_scheduler
+from app.core.backup_executor import backup_executor
 from app.repositories.strategy_repo import StrategyRepository
+from app.repositories.notification_repo import NotificationRepository
+from app.repositories.maintenance_repo import MaintenanceRepository
+from app.models.notification import NotificationStatus
 import logging
 
 router = APIRouter(prefix="/api/system", tags=["system"])
@@ -17,13 +29,8 @@ logger = logging.getLogger(__name__)
 async def health_check(db: AsyncSession = Depends(get_db)):
     """Verifica el estado del sistema"""
     try:
-        # Verificar conexión a Oracle CORRECTAMENTE
-        oracle_healthy = False
-        try:
-            info = OracleConnection.get_database_info()
-            oracle_healthy = bool(info and 'name' in info)
-        except:
-            oracle_healthy = False
+        # Verificar conexión a Oracle con un ping ligero (SELECT 1 FROM DUAL)
+        oracle_healthy = await OracleConnection.ping_async()
         
         # Verificar programador
         scheduler_healthy = backup_scheduler.scheduler.running
@@ -36,6 +43,14 @@ async def health_check(db: AsyncSession = Depends(get_db)):
             "oracle_connection": "connected" if oracle_healthy else "disconnected",
             "scheduler": "running" if scheduler_healthy else "stopped",
             "email": "configured" if email_configured else "not_configured",
+            "oracle_pool": OracleConnection.get_pool_stats(),
+            "metadata_cache": database_metadata.get_stats(),
+            "notifications": notification_dispatcher.get_stats(),
+            "verifications": backup_verifier.get_stats(),
+            "checksums": checksum_service.get_stats(),
+            "retention": retention_engine.get_stats(),
+            "catalog_maintenance": catalog_maintenance.get_stats(),
+            "storage_usage": storage_usage.get_stats(),
             "version": settings.APP_VERSION
         }
         
@@ -50,18 +65,19 @@ async def health_check(db: AsyncSession = Depends(get_db)):
         }
 
 @router.get("/database/info")
-async def get_database_info():
-    """Obtiene información de la base de datos Oracle"""
+async def get_database_info(refresh: bool = False):
+    """Obtiene información de la base de datos Oracle (en caché; refresh=true fuerza la consulta)"""
     try:
-        info = OracleConnection.get_database_info()
+        info = await database_metadata.get_database_info(force_refresh=refresh)
         if not info:
             raise HTTPException(
                 status_code=503,
                 detail="No se pudo obtener información de la base de datos"
             )
         
-        # Verificar modo ARCHIVELOG
-        archivelog_enabled = OracleConnection.check_archivelog_mode()
+        # Verificar modo ARCHIVELOG (copia: no modificar el valor en caché)
+        info = dict(info)
+        archivelog_enabled = info.get('log_mode') == 'ARCHIVELOG'
         info['archivelog_enabled'] = archivelog_enabled
         info['archivelog_warning'] = not archivelog_enabled
         
@@ -79,7 +95,7 @@ async def get_database_info():
 async def check_archivelog():
     """Verifica el estado del modo ARCHIVELOG"""
     try:
-        enabled = OracleConnection.check_archivelog_mode()
+        enabled = await database_metadata.is_archivelog_enabled()
         return {
             "archivelog_enabled": enabled,
             "message": "Modo ARCHIVELOG habilitado" if enabled else "Modo ARCHIVELOG NO habilitado - Los backups pueden no ser consistentes"
@@ -90,11 +106,23 @@ async def check_archivelog():
             detail=f"Error verificando modo ARCHIVELOG: {str(e)}"
         )
 
+@router.post("/database/metadata/invalidate")
+async def invalidate_database_metadata():
+    """Descarta la caché de metadatos (p. ej. tras crear un tablespace o esquema)"""
+    try:
+        database_metadata.invalidate()
+        return {"message": "Caché de metadatos invalidada"}
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error invalidando la caché de metadatos: {str(e)}"
+        )
+
 @router.post("/email/test")
 async def send_test_email(email: str, db: AsyncSession = Depends(get_db)):
     """Envía un email de prueba"""
     try:
-        email_service = EmailService()
+        email_service = EmailService(db)
         success = await email_service.send_test_email(email)
         
         if success:
@@ -113,6 +141,86 @@ async def send_test_email(email: str, db: AsyncSession = Depends(get_db)):
             detail=f"Error enviando email de prueba: {str(e)}"
         )
 
+@router.get("/notifications")
+async def get_notifications(
+    strategy_id: Optional[int] = None,
+    status: Optional[NotificationStatus] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db)
+):
+    """Historial de notificaciones enviadas, suprimidas y fallidas"""
+    try:
+        notification_repo = NotificationRepository(db)
+        return await notification_repo.get_notifications(strategy_id, status, limit)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error obteniendo el historial de notificaciones: {str(e)}"
+        )
+
+@router.post("/checksums/scrub", status_code=202)
+async def run_checksum_scrub(limit: Optional[int] = Query(None, ge=1, le=10000)):
+    """Inicia en segundo plano una pasada del scrub de checksums"""
+    try:
+        if checksum_service.get_stats()['scrub_running']:
+            raise HTTPException(status_code=409, detail="Ya hay un scrub en curso")
+        asyncio.create_task(checksum_service.scrub(limit))
+        return {"message": "Scrub de checksums iniciado"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error iniciando el scrub de checksums: {str(e)}"
+        )
+
+@router.get("/maintenance/catalog")
+async def get_catalog_maintenance_runs(
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db)
+):
+    """Historial y duraciones del mantenimiento del catálogo RMAN"""
+    try:
+        maintenance_repo = MaintenanceRepository(db)
+        return await maintenance_repo.get_runs(limit)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error obteniendo el historial de mantenimiento: {str(e)}"
+        )
+
+@router.post("/maintenance/catalog", status_code=202)
+async def run_catalog_maintenance():
+    """Inicia en segundo plano CROSSCHECK / DELETE EXPIRED"""
+    try:
+        if catalog_maintenance.get_stats()['running']:
+            raise HTTPException(status_code=409, detail="El mantenimiento del catálogo ya está en ejecución")
+        asyncio.create_task(catalog_maintenance.run())
+        return {"message": "Mantenimiento del catálogo iniciado"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error iniciando el mantenimiento del catálogo: {str(e)}"
+        )
+
+@router.post("/storage/reconcile", status_code=202)
+async def reconcile_storage_usage():
+    """Compara el catálogo con el disco y reconstruye en segundo plano el índice de uso"""
+    try:
+        if storage_usage.get_stats()['reconciling']:
+            raise HTTPException(status_code=409, detail="La reconciliación ya está en ejecución")
+        storage_usage.reconcile_in_background()
+        return {"message": "Reconciliación del uso de disco iniciada"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error iniciando la reconciliación del uso de disco: {str(e)}"
+        )
+
 @router.post("/scheduler/start")
 async def start_scheduler(db: AsyncSession = Depends(get_db)):
     """Inicia el programador"""
@@ -191,7 +299,8 @@ async def get_scheduler_status():
         return {
             "running": backup_scheduler.scheduler.running,
             "scheduled_jobs_count": len(jobs),
-            "scheduled_jobs": jobs
+            "scheduled_jobs": jobs,
+            "backup_queue": backup_executor.get_status()
         }
     except Exception as e:
         raise HTTPException(
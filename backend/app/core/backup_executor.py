@@ -0,0 +1,151 @@
+import asyncio
+import heapq
+import itertools
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Callable, Awaitable, TypeVar
+import logging
+from app.core.config import settings
+from app.models.strategy import Strategy, BackupPriority
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Orden de atención de la cola: menor valor = mayor prioridad
+PRIORITY_RANK = {
+    BackupPriority.CRITICAL: 0,
+    BackupPriority.HIGH: 1,
+    BackupPriority.MEDIUM: 2,
+    BackupPriority.LOW: 3,
+}
+
+
+class BackupAlreadyRunningError(Exception):
+    """La estrategia ya tiene una ejecución en curso o en cola"""
+    pass
+
+
+class BackupExecutor:
+    """Motor de ejecución de backups con límite global de concurrencia.
+
+    Las ejecuciones que no consiguen un cupo esperan en una cola ordenada por
+    prioridad de la estrategia (CRITICAL primero) y, dentro de la misma
+    prioridad, por orden de llegada. Una estrategia nunca se solapa consigo misma.
+    """
+
+    def __init__(self, max_concurrent: int = None):
+        self.max_concurrent = max(1, max_concurrent or settings.MAX_BACKUP_THREADS)
+        self._running: Dict[int, Dict[str, Any]] = {}
+        self._queued: Dict[int, Dict[str, Any]] = {}
+        self._waiters: List[list] = []  # heap de [rank, seq, strategy_id, future]
+        self._sequence = itertools.count()
+        self._stats = {
+            'started': 0,
+            'completed': 0,
+            'rejected_overlaps': 0,
+            'queued_total': 0,
+            'total_wait_seconds': 0.0,
+            'max_wait_seconds': 0.0,
+        }
+
+    async def run(self, strategy: Strategy, job: Callable[[], Awaitable[T]]) -> T:
+        """Ejecuta ``job`` cuando haya un cupo libre para la estrategia"""
+        if strategy.id in self._running or strategy.id in self._queued:
+            self._stats['rejected_overlaps'] += 1
+            raise BackupAlreadyRunningError(
+                f"La estrategia {strategy.name} (ID: {strategy.id}) ya está en ejecución o en cola"
+            )
+
+        await self._acquire(strategy)
+        try:
+            return await job()
+        finally:
+            self._release(strategy.id)
+
+    async def _acquire(self, strategy: Strategy):
+        enqueued_at = time.monotonic()
+
+        if len(self._running) < self.max_concurrent and not self._waiters:
+            self._mark_running(strategy, 0.0)
+            return
+
+        priority = BackupPriority(strategy.priority)
+        future = asyncio.get_running_loop().create_future()
+        entry = [PRIORITY_RANK.get(priority, len(PRIORITY_RANK)), next(self._sequence), strategy.id, future]
+        heapq.heappush(self._waiters, entry)
+        self._queued[strategy.id] = {
+            'strategy_id': strategy.id,
+            'name': strategy.name,
+            'priority': priority.value,
+            'queued_at': datetime.now().isoformat(),
+        }
+        self._stats['queued_total'] += 1
+        logger.info(
+            f"⏳ Backup en cola: {strategy.name} (prioridad {priority.value}, "
+            f"{len(self._running)}/{self.max_concurrent} en ejecución)"
+        )
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            self._queued.pop(strategy.id, None)
+            if future.done() and not future.cancelled():
+                # El cupo ya había sido cedido a esta espera: devolverlo
+                self._release(strategy.id)
+            raise
+
+        self._mark_running(strategy, time.monotonic() - enqueued_at)
+
+    def _mark_running(self, strategy: Strategy, waited_seconds: float):
+        self._queued.pop(strategy.id, None)
+        self._running[strategy.id] = {
+            'strategy_id': strategy.id,
+            'name': strategy.name,
+            'priority': BackupPriority(strategy.priority).value,
+            'started_at': datetime.now().isoformat(),
+            'waited_seconds': round(waited_seconds, 2),
+        }
+        self._stats['started'] += 1
+        self._stats['total_wait_seconds'] += waited_seconds
+        self._stats['max_wait_seconds'] = max(self._stats['max_wait_seconds'], waited_seconds)
+
+    def _release(self, strategy_id: int):
+        if self._running.pop(strategy_id, None) is not None:
+            self._stats['completed'] += 1
+
+        # Ceder el cupo a la siguiente espera válida de mayor prioridad
+        while self._waiters and len(self._running) < self.max_concurrent:
+            _, _, next_id, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            # Reservar el cupo antes de despertar para que nadie lo robe
+            self._running[next_id] = {'strategy_id': next_id, 'started_at': datetime.now().isoformat()}
+            future.set_result(True)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Estado de la cola y de las ejecuciones en curso"""
+        queued = list(self._queued.values())
+        queued_by_priority = {priority.value: 0 for priority in PRIORITY_RANK}
+        for item in queued:
+            queued_by_priority[item['priority']] = queued_by_priority.get(item['priority'], 0) + 1
+
+        started = self._stats['started']
+        return {
+            'max_concurrent': self.max_concurrent,
+            'running_count': len(self._running),
+            'queue_depth': len(queued),
+            'queued_by_priority': queued_by_priority,
+            'running': list(self._running.values()),
+            'queued': queued,
+            'started_total': started,
+            'completed_total': self._stats['completed'],
+            'rejected_overlaps': self._stats['rejected_overlaps'],
+            'queued_total': self._stats['queued_total'],
+            'average_wait_seconds': round(self._stats['total_wait_seconds'] / started, 2) if started else 0.0,
+            'max_wait_seconds': round(self._stats['max_wait_seconds'], 2),
+        }
+
+
+# Instancia global compartida por el scheduler y la API
+backup_executor = BackupExecutor()
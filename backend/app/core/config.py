@@ -11,8 +11,28 @@ class Settings(BaseSettings):
     ORACLE_PASSWORD: str = os.getenv("ORACLE_PASSWORD", "")
     ORACLE_DSN: str = os.getenv("ORACLE_DSN", "localhost:1521/XE")
     
+    # Oracle Session Pool Configuration
+    ORACLE_POOL_MIN: int = int(os.getenv("ORACLE_POOL_MIN", "1"))
+    ORACLE_POOL_MAX: int = int(os.getenv("ORACLE_POOL_MAX", "5"))
+    ORACLE_POOL_INCREMENT: int = int(os.getenv("ORACLE_POOL_INCREMENT", "1"))
+    ORACLE_POOL_WAIT_TIMEOUT_MS: int = int(os.getenv("ORACLE_POOL_WAIT_TIMEOUT_MS", "10000"))  # Espera máxima por sesión libre
+    ORACLE_POOL_IDLE_TIMEOUT: int = int(os.getenv("ORACLE_POOL_IDLE_TIMEOUT", "300"))  # Cierra sesiones inactivas (segundos)
+    ORACLE_POOL_MAX_LIFETIME: int = int(os.getenv("ORACLE_POOL_MAX_LIFETIME", "3600"))  # Recicla sesiones antiguas (segundos)
+    
     # RMAN Configuration
     RMAN_PATH: str = os.getenv("RMAN_PATH", "rman")  # Ruta al ejecutable RMAN
+    RMAN_TARGET: str = os.getenv("RMAN_TARGET", "sys/123@XE AS SYSDBA")  # Conexión target de RMAN
+    RMAN_TIMEOUT_SECONDS: int = int(os.getenv("RMAN_TIMEOUT_SECONDS", "3600"))
+    
+    # RMAN Log Storage (bloques comprimidos en disco)
+    RMAN_LOG_STORE_PATH: str = os.getenv(
+        "RMAN_LOG_STORE_PATH",
+        os.path.join(os.getenv("BACKUP_BASE_PATH", "./backups"), "rman_logs")
+    )
+    RMAN_LOG_CHUNK_SIZE: int = int(os.getenv("RMAN_LOG_CHUNK_SIZE", str(256 * 1024)))
+    RMAN_LOG_FLUSH_SECONDS: float = float(os.getenv("RMAN_LOG_FLUSH_SECONDS", "10"))
+    RMAN_LOG_POLL_SECONDS: float = float(os.getenv("RMAN_LOG_POLL_SECONDS", "1"))
+    RMAN_LOG_TAIL_BYTES: int = int(os.getenv("RMAN_LOG_TAIL_BYTES", str(16 * 1024)))  # Extracto guardado en backup_logs
     COMPRESSION_ENABLED: bool = os.getenv("COMPRESSION_ENABLED", "True").lower() == "true"
     
     # SMTP Configuration
@@ -22,6 +42,18 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: str = os.getenv("SMTP_PASSWORD", "")
     NOTIFICATION_EMAIL: str = os.getenv("NOTIFICATION_EMAIL", "")
     
+    # Notification Dispatcher
+    NOTIFICATION_SPOOL_PATH: str = os.getenv(
+        "NOTIFICATION_SPOOL_PATH",
+        os.path.join(os.getenv("BACKUP_BASE_PATH", "./backups"), "notification_spool")
+    )
+    NOTIFICATION_DIGEST_SECONDS: int = int(os.getenv("NOTIFICATION_DIGEST_SECONDS", "0"))  # 0 = un email por backup
+    NOTIFICATION_MAX_ATTEMPTS: int = int(os.getenv("NOTIFICATION_MAX_ATTEMPTS", "8"))
+    NOTIFICATION_RETRY_BASE_SECONDS: float = float(os.getenv("NOTIFICATION_RETRY_BASE_SECONDS", "30"))
+    NOTIFICATION_RETRY_MAX_SECONDS: float = float(os.getenv("NOTIFICATION_RETRY_MAX_SECONDS", "3600"))
+    NOTIFICATION_SMTP_IDLE_SECONDS: float = float(os.getenv("NOTIFICATION_SMTP_IDLE_SECONDS", "60"))  # Cierra la conexión SMTP ociosa
+    NOTIFICATION_RATE_LIMIT_MINUTES: int = int(os.getenv("NOTIFICATION_RATE_LIMIT_MINUTES", "60"))  # Una alerta por estrategia y firma de error
+    
     # Application Configuration
     APP_TITLE: str = "Sistema de Gestión de Respaldo Oracle"
     APP_VERSION: str = "1.0.0"
@@ -30,7 +62,59 @@ class Settings(BaseSettings):
     # Backup Configuration
     BACKUP_BASE_PATH: str = os.getenv("BACKUP_BASE_PATH", "./backups")
     RETENTION_DAYS: int = int(os.getenv("RETENTION_DAYS", "30"))
+    RETENTION_INTERVAL_HOURS: float = float(os.getenv("RETENTION_INTERVAL_HOURS", "24"))  # 0 = sin job de retención
+    RETENTION_PAUSE_SECONDS: float = float(os.getenv("RETENTION_PAUSE_SECONDS", "60"))  # Espera mientras hay backups en curso
     MAX_BACKUP_THREADS: int = int(os.getenv("MAX_BACKUP_THREADS", "4"))
+    RMAN_COMPRESSION_LEVEL: str = os.getenv("RMAN_COMPRESSION_LEVEL", "BASIC")  # BASIC, LOW, MEDIUM o HIGH
+    ADVANCED_COMPRESSION_LICENSED: bool = os.getenv("ADVANCED_COMPRESSION_LICENSED", "False").lower() == "true"  # Necesaria para LOW/MEDIUM/HIGH
+    INCREMENTAL_LEVEL0_INTERVAL_DAYS: int = int(os.getenv("INCREMENTAL_LEVEL0_INTERVAL_DAYS", "7"))  # Antigüedad máxima de la base nivel 0
+    
+    # Backup Logs Table
+    LOG_PARTITIONING_ENABLED: bool = os.getenv("LOG_PARTITIONING_ENABLED", "False").lower() == "true"  # Particiones mensuales por start_time
+    LOG_RETENTION_DAYS: int = int(os.getenv("LOG_RETENTION_DAYS", "365"))
+    LOG_EXPORT_BATCH_SIZE: int = int(os.getenv("LOG_EXPORT_BATCH_SIZE", "500"))  # Filas por lote en exportaciones
+    REPORT_CACHE_PATH: str = os.getenv(
+        "REPORT_CACHE_PATH",
+        os.path.join(os.getenv("BACKUP_BASE_PATH", "./backups"), "reports")
+    )
+    
+    # Backup Verification
+    VERIFY_AFTER_BACKUP: bool = os.getenv("VERIFY_AFTER_BACKUP", "True").lower() == "true"
+    VERIFY_DEFAULT_MODE: str = os.getenv("VERIFY_DEFAULT_MODE", "backupset")  # backupset, restore o none
+    VERIFY_MAX_CONCURRENT: int = int(os.getenv("VERIFY_MAX_CONCURRENT", "1"))  # Independiente de MAX_BACKUP_THREADS
+    VERIFY_CHECK_LOGICAL: bool = os.getenv("VERIFY_CHECK_LOGICAL", "False").lower() == "true"
+    VERIFY_TIMEOUT_SECONDS: int = int(os.getenv("VERIFY_TIMEOUT_SECONDS", os.getenv("RMAN_TIMEOUT_SECONDS", "3600")))
+    VERIFY_OUTPUT_TAIL_BYTES: int = int(os.getenv("VERIFY_OUTPUT_TAIL_BYTES", str(16 * 1024)))
+    
+    # Piece Checksums
+    CHECKSUM_ENABLED: bool = os.getenv("CHECKSUM_ENABLED", "True").lower() == "true"
+    CHECKSUM_ALGORITHM: str = os.getenv("CHECKSUM_ALGORITHM", "sha256")  # Cualquier algoritmo de hashlib
+    CHECKSUM_WORKERS: int = int(os.getenv("CHECKSUM_WORKERS", str(min(4, os.cpu_count() or 1))))  # Procesos de hashing
+    CHECKSUM_CHUNK_SIZE: int = int(os.getenv("CHECKSUM_CHUNK_SIZE", str(8 * 1024 * 1024)))
+    CHECKSUM_SCRUB_INTERVAL_HOURS: float = float(os.getenv("CHECKSUM_SCRUB_INTERVAL_HOURS", "24"))  # 0 = sin scrub programado
+    CHECKSUM_SCRUB_BATCH: int = int(os.getenv("CHECKSUM_SCRUB_BATCH", "200"))  # Piezas revisadas por pasada
+    CHECKSUM_SCRUB_MAX_MB_PER_SECOND: float = float(os.getenv("CHECKSUM_SCRUB_MAX_MB_PER_SECOND", "50"))  # 0 = sin límite
+    CHECKSUM_SCRUB_PAUSE_SECONDS: float = float(os.getenv("CHECKSUM_SCRUB_PAUSE_SECONDS", "30"))  # Espera mientras hay backups en curso
+    
+    # RMAN Catalog Maintenance (CROSSCHECK / DELETE EXPIRED)
+    CATALOG_MAINTENANCE_INTERVAL_HOURS: float = float(os.getenv("CATALOG_MAINTENANCE_INTERVAL_HOURS", "24"))  # 0 = sin job programado
+    CATALOG_MAINTENANCE_TIMEOUT_SECONDS: int = int(os.getenv("CATALOG_MAINTENANCE_TIMEOUT_SECONDS", os.getenv("RMAN_TIMEOUT_SECONDS", "3600")))
+    CATALOG_MAINTENANCE_PAUSE_SECONDS: float = float(os.getenv("CATALOG_MAINTENANCE_PAUSE_SECONDS", "60"))  # Espera mientras hay backups en curso
+    
+    # Storage Usage Index
+    STORAGE_RECONCILE_PAUSE_SECONDS: float = float(os.getenv("STORAGE_RECONCILE_PAUSE_SECONDS", "60"))  # Espera mientras hay backups en curso
+    
+    # Tuning Advisor
+    BACKUP_TARGET_WINDOW_MINUTES: int = int(os.getenv("BACKUP_TARGET_WINDOW_MINUTES", "240"))  # Ventana objetivo por defecto
+    TUNING_HISTORY_RUNS: int = int(os.getenv("TUNING_HISTORY_RUNS", "10"))  # Ejecuciones analizadas por estrategia
+    
+    # Database Metadata Cache
+    METADATA_CACHE_TTL_SECONDS: int = int(os.getenv("METADATA_CACHE_TTL_SECONDS", "300"))
+    METADATA_REFRESH_AHEAD: float = float(os.getenv("METADATA_REFRESH_AHEAD", "0.8"))  # Fracción del TTL que dispara el refresco en segundo plano
+    
+    # Progress Tracking
+    PROGRESS_SAMPLE_SECONDS: float = float(os.getenv("PROGRESS_SAMPLE_SECONDS", "5"))  # Muestreo de V$SESSION_LONGOPS
+    PROGRESS_PUSH_SECONDS: float = float(os.getenv("PROGRESS_PUSH_SECONDS", "1"))
     
     model_config = ConfigDict(env_file=".env")
 
@@ -1,13 +1,61 @@
 import aiosmtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import List, Optional
+from typing import List, Optional, Dict, Any
+import html
 import logging
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
 class EmailUtils:
+    @staticmethod
+    def is_configured() -> bool:
+        return all([settings.SMTP_SERVER, settings.SMTP_PORT, settings.SMTP_USERNAME, settings.SMTP_PASSWORD])
+    
+    @staticmethod
+    def build_message(
+        subject: str,
+        body: str,
+        to_emails: List[str],
+        html_body: Optional[str] = None
+    ) -> MIMEMultipart:
+        message = MIMEMultipart()
+        message["From"] = settings.SMTP_USERNAME
+        message["To"] = ", ".join(to_emails)
+        message["Subject"] = subject
+        
+        # Parte de texto plano
+        text_part = MIMEText(body, "plain", "utf-8")
+        message.attach(text_part)
+        
+        # Parte HTML (opcional)
+        if html_body:
+            html_part = MIMEText(html_body, "html", "utf-8")
+            message.attach(html_part)
+        return message
+    
+    @staticmethod
+    async def open_smtp() -> aiosmtplib.SMTP:
+        """Abre y autentica una conexión SMTP - CONFIGURACIÓN CORREGIDA PARA GMAIL"""
+        logger.info(f"🔧 Conectando a SMTP: {settings.SMTP_SERVER}:{settings.SMTP_PORT}")
+        
+        # Configuración específica para Gmail**
+        smtp = aiosmtplib.SMTP(
+            hostname=settings.SMTP_SERVER,
+            port=settings.SMTP_PORT,
+            use_tls=True, 
+            timeout=30
+        )
+        
+        await smtp.connect()
+        logger.info("✅ Conexión SMTP establecida")
+        
+        logger.info("🔑 Iniciando autenticación...")
+        await smtp.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
+        logger.info("✅ Autenticación SMTP exitosa")
+        return smtp
+    
     @staticmethod
     async def send_email(
         subject: str,
@@ -15,44 +63,15 @@ class EmailUtils:
         to_emails: List[str],
         html_body: Optional[str] = None
     ) -> bool:
-        """Envía un email usando SMTP - CONFIGURACIÓN CORREGIDA PARA GMAIL"""
+        """Envía un email con una conexión propia (las notificaciones usan el despachador)"""
         try:
             # Validar configuración
-            if not all([settings.SMTP_SERVER, settings.SMTP_PORT, settings.SMTP_USERNAME, settings.SMTP_PASSWORD]):
+            if not EmailUtils.is_configured():
                 logger.error("❌ Configuración SMTP incompleta")
                 return False
             
-            message = MIMEMultipart()
-            message["From"] = settings.SMTP_USERNAME
-            message["To"] = ", ".join(to_emails)
-            message["Subject"] = subject
-            
-            # Parte de texto plano
-            text_part = MIMEText(body, "plain", "utf-8")
-            message.attach(text_part)
-            
-            # Parte HTML (opcional)
-            if html_body:
-                html_part = MIMEText(html_body, "html", "utf-8")
-                message.attach(html_part)
-            
-            logger.info(f"🔧 Conectando a SMTP: {settings.SMTP_SERVER}:{settings.SMTP_PORT}")
-            
-            # Configuración específica para Gmail**
-            smtp = aiosmtplib.SMTP(
-                hostname=settings.SMTP_SERVER,
-                port=settings.SMTP_PORT,
-                use_tls=True, 
-                timeout=30
-            )
-            
-            await smtp.connect()
-            logger.info("✅ Conexión SMTP establecida")
-            
-            logger.info("🔑 Iniciando autenticación...")
-            await smtp.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
-            logger.info("✅ Autenticación SMTP exitosa")
-            
+            message = EmailUtils.build_message(subject, body, to_emails, html_body)
+            smtp = await EmailUtils.open_smtp()
             await smtp.send_message(message)
             await smtp.quit()
             
@@ -72,12 +91,18 @@ class EmailUtils:
         duration: str,
         backup_size: Optional[float] = None,
         error_message: Optional[str] = None,
-        backup_files_count: int = 0
+        backup_files_count: int = 0,
+        recovered: bool = False,
+        suppressed_count: int = 0
     ) -> tuple[str, str, str]:
         """Crea el contenido del email de notificación de backup"""
         
         # Determinar emoji y color según estado
-        if status.lower() == "completed":
+        if status.lower() == "completed" and recovered:
+            status_emoji = "✅"
+            status_color = "green"
+            subject = f"✅ Backup Recuperado - {strategy_name}"
+        elif status.lower() == "completed":
             status_emoji = "✅"
             status_color = "green"
             subject = f"✅ Backup Completado - {strategy_name}"
@@ -104,6 +129,12 @@ class EmailUtils:
         if backup_size:
             text_body += f"Tamaño del backup: {backup_size:.2f} MB\n"
         
+        if recovered:
+            text_body += "\nLa estrategia vuelve a completarse tras fallos anteriores.\n"
+        
+        if suppressed_count:
+            text_body += f"Alertas repetidas no enviadas: {suppressed_count}\n"
+        
         if error_message:
             text_body += f"\n❌ ERROR:\n{error_message}\n"
         
@@ -142,6 +173,9 @@ class EmailUtils:
         if backup_size:
             html_body += f'<tr><td><strong>Tamaño del backup:</strong></td><td>{backup_size:.2f} MB</td></tr>'
         
+        if suppressed_count:
+            html_body += f'<tr><td><strong>Alertas repetidas no enviadas:</strong></td><td>{suppressed_count}</td></tr>'
+        
         html_body += """
             </table>
         </div>
@@ -162,4 +196,59 @@ class EmailUtils:
     </body>
 </html>
 """
-        return subject, text_body, html_body
\ No newline at end of file
+        return subject, text_body, html_body
+    
+    @staticmethod
+    def create_backup_digest_template(results: List[Dict[str, Any]]) -> tuple[str, str, str]:
+        """Resumen de varias ejecuciones en un solo email (modo digest)"""
+        failed = [result for result in results if result['status'].lower() != "completed"]
+        if failed:
+            subject = f"❌ Resumen de backups: {len(failed)} de {len(results)} con problemas"
+        else:
+            subject = f"✅ Resumen de backups: {len(results)} completados"
+        
+        text_body = f"Resumen de {len(results)} ejecuciones de backup\n\n"
+        rows = ""
+        for result in results:
+            size = f"{result['backup_size']:.2f} MB" if result.get('backup_size') else "-"
+            text_body += (
+                f"- {result['strategy_name']}: {result['status'].upper()} "
+                f"({result['start_time']} - {result['end_time']}, {result['duration']}, {size})\n"
+            )
+            if result.get('error_message'):
+                text_body += f"    ERROR: {result['error_message']}\n"
+            
+            color = "green" if result['status'].lower() == "completed" else "red"
+            rows += (
+                f"<tr><td>{html.escape(result['strategy_name'])}</td>"
+                f"<td style=\"color: {color}; font-weight: bold;\">{result['status'].upper()}</td>"
+                f"<td>{result['start_time']}</td><td>{result['duration']}</td><td>{size}</td>"
+                f"<td><pre>{html.escape(result.get('error_message') or '')}</pre></td></tr>"
+            )
+        text_body += "\n--\nSistema de Gestión de Respaldo Oracle"
+        
+        html_body = f"""
+<html>
+    <head>
+        <style>
+            body {{ font-family: Arial, sans-serif; margin: 20px; }}
+            table {{ width: 100%; border-collapse: collapse; }}
+            th, td {{ padding: 8px; border-bottom: 1px solid #eee; text-align: left; vertical-align: top; }}
+            pre {{ margin: 0; white-space: pre-wrap; color: #d00; }}
+            .footer {{ margin-top: 20px; color: #666; font-size: 12px; }}
+        </style>
+    </head>
+    <body>
+        <h1>Resumen de backups Oracle</h1>
+        <p>{len(results)} ejecuciones, {len(failed)} con problemas.</p>
+        <table>
+            <tr><th>Estrategia</th><th>Estado</th><th>Inicio</th><th>Duración</th><th>Tamaño</th><th>Error</th></tr>
+            {rows}
+        </table>
+        <div class="footer">
+            <p><em>Sistema de Gestión de Respaldo Oracle</em></p>
+        </div>
+    </body>
+</html>
+"""
+        return subject, text_body, html_body
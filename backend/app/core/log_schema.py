@@ -0,0 +1,112 @@
+import re
+import logging
+from datetime import datetime
+from typing import List, Dict, Any
+from sqlalchemy import text
+from app.models.database_models import LogModel
+
+logger = logging.getLogger(__name__)
+
+LOG_TABLE = LogModel.__tablename__.upper()
+
+# Índice creado por versiones anteriores con index=True en strategy_id;
+# queda cubierto por ix_backup_logs_strategy_start
+LEGACY_INDEXES = ("IX_BACKUP_LOGS_STRATEGY_ID",)
+
+# Partición inicial del esquema por intervalos; Oracle no permite eliminarla
+INITIAL_PARTITION = "P_BEFORE_2000"
+
+HIGH_VALUE_PATTERN = re.compile(r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})")
+PARTITION_NAME_PATTERN = re.compile(r"^[A-Z0-9_$#]+$")
+
+
+async def ensure_log_indexes(conn) -> List[str]:
+    """Crea los índices compuestos de backup_logs que falten.
+
+    ``create_all`` no añade índices a tablas ya existentes, por lo que las
+    instalaciones previas necesitan este paso. ``conn`` es una AsyncConnection.
+    """
+    result = await conn.execute(
+        text("SELECT index_name FROM user_indexes WHERE table_name = :table_name"),
+        {"table_name": LOG_TABLE}
+    )
+    existing = {row[0] for row in result}
+
+    created = []
+    for index in LogModel.__table__.indexes:
+        if index.name.upper() not in existing:
+            await conn.run_sync(index.create)
+            created.append(index.name)
+            logger.info(f"✅ Índice creado: {index.name}")
+
+    for legacy in LEGACY_INDEXES:
+        if legacy in existing:
+            await conn.execute(text(f"DROP INDEX {legacy}"))
+            logger.info(f"🗑️ Índice redundante eliminado: {legacy}")
+
+    return created
+
+
+async def is_log_table_partitioned(conn) -> bool:
+    result = await conn.execute(
+        text("SELECT partitioning_type FROM user_part_tables WHERE table_name = :table_name"),
+        {"table_name": LOG_TABLE}
+    )
+    return result.first() is not None
+
+
+async def enable_log_partitioning(conn) -> bool:
+    """Convierte backup_logs en una tabla particionada por mes según start_time.
+
+    Usa ALTER TABLE ... MODIFY ... ONLINE (Oracle 12.2+), sin bloquear las
+    inserciones en curso. Los índices compuestos pasan a ser locales para que
+    eliminar una partición no los invalide. Retorna False si ya estaba particionada.
+    """
+    if await is_log_table_partitioned(conn):
+        logger.info("ℹ️ backup_logs ya está particionada")
+        return False
+
+    await ensure_log_indexes(conn)
+    local_indexes = ", ".join(f"{index.name} LOCAL" for index in LogModel.__table__.indexes)
+    await conn.execute(text(f"""
+        ALTER TABLE {LOG_TABLE} MODIFY
+        PARTITION BY RANGE (start_time) INTERVAL (NUMTOYMINTERVAL(1, 'MONTH'))
+        (PARTITION {INITIAL_PARTITION} VALUES LESS THAN (TIMESTAMP '2000-01-01 00:00:00'))
+        ONLINE UPDATE INDEXES ({local_indexes})
+    """))
+    logger.info("✅ backup_logs particionada por mes (start_time)")
+    return True
+
+
+async def list_log_partitions(conn) -> List[Dict[str, Any]]:
+    """Particiones de backup_logs con su límite superior (exclusivo) como datetime.
+
+    Acepta tanto una AsyncConnection como una AsyncSession.
+    """
+    result = await conn.execute(
+        text("""
+            SELECT partition_name, partition_position, high_value
+            FROM user_tab_partitions
+            WHERE table_name = :table_name
+            ORDER BY partition_position
+        """),
+        {"table_name": LOG_TABLE}
+    )
+
+    partitions = []
+    for name, position, high_value in result:
+        # HIGH_VALUE es una columna LONG con el texto "TIMESTAMP' 2024-02-01 00:00:00'"
+        match = HIGH_VALUE_PATTERN.search(str(high_value or ""))
+        partitions.append({
+            'name': name,
+            'position': position,
+            'high_value': datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S") if match else None,
+        })
+    return partitions
+
+
+def drop_partition_sql(partition_name: str) -> str:
+    """DDL para eliminar una partición manteniendo válido el índice global de la PK"""
+    if not PARTITION_NAME_PATTERN.match(partition_name):
+        raise ValueError(f"Nombre de partición inválido: {partition_name}")
+    return f"ALTER TABLE {LOG_TABLE} DROP PARTITION {partition_name} UPDATE GLOBAL INDEXES"
@@ -2,6 +2,7 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.date import DateTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from datetime import datetime, time
 from typing import List, Dict, Any, Optional
 import logging
@@ -9,6 +10,11 @@ from app.models.strategy import Strategy, ScheduleFrequency
 from app.services.backup_service import BackupService
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import AsyncSessionLocal
+from app.core.backup_executor import backup_executor, BackupAlreadyRunningError
+from app.core.config import settings
+from app.services.checksum_service import checksum_service
+from app.services.retention_service import retention_engine
+from app.services.catalog_maintenance_service import catalog_maintenance
 
 logger = logging.getLogger(__name__)
 
@@ -151,14 +157,20 @@ class BackupScheduler:
     async def _execute_backup_wrapper(self, strategy: Strategy):
         """Wrapper para ejecutar el backup desde el scheduler"""
         try:
-            # Crear una nueva sesión de BD para el job del scheduler
-            async with AsyncSessionLocal() as db:
-                backup_service = BackupService(db)
-                logger.info(f"🏃 Ejecutando backup programado: {strategy.name}")
-                await backup_service.execute_backup_strategy(strategy)
+            # El executor limita la concurrencia global y ordena por prioridad
+            await backup_executor.run(strategy, lambda: self._run_backup(strategy))
+        except BackupAlreadyRunningError as e:
+            logger.warning(f"⏭️ Ejecución omitida: {str(e)}")
         except Exception as e:
             logger.error(f"❌ Error en ejecución programada de {strategy.name}: {str(e)}")
     
+    async def _run_backup(self, strategy: Strategy):
+        # Crear una nueva sesión de BD para el job del scheduler
+        async with AsyncSessionLocal() as db:
+            backup_service = BackupService(db)
+            logger.info(f"🏃 Ejecutando backup programado: {strategy.name}")
+            return await backup_service.execute_backup_strategy(strategy)
+    
     def schedule_immediate_backup(self, strategy: Strategy) -> bool:
         """Programa un backup para ejecución inmediata"""
         try:
@@ -177,6 +189,66 @@ class BackupScheduler:
             logger.error(f"❌ Error programando backup inmediato: {str(e)}")
             return False
     
+    def schedule_checksum_scrub(self) -> bool:
+        """Programa el scrub periódico de checksums (CHECKSUM_SCRUB_INTERVAL_HOURS)"""
+        if not settings.CHECKSUM_ENABLED or settings.CHECKSUM_SCRUB_INTERVAL_HOURS <= 0:
+            return False
+        try:
+            self.scheduler.add_job(
+                checksum_service.scheduled_scrub,
+                trigger=IntervalTrigger(hours=settings.CHECKSUM_SCRUB_INTERVAL_HOURS),
+                id="checksum_scrub",
+                name="Scrub de checksums de piezas",
+                replace_existing=True,
+                max_instances=1,
+                coalesce=True
+            )
+            logger.info(f"✅ Scrub de checksums programado cada {settings.CHECKSUM_SCRUB_INTERVAL_HOURS} h")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error programando el scrub de checksums: {str(e)}")
+            return False
+    
+    def schedule_retention(self) -> bool:
+        """Programa el job de retención por ventana de recuperación (RETENTION_INTERVAL_HOURS)"""
+        if settings.RETENTION_INTERVAL_HOURS <= 0:
+            return False
+        try:
+            self.scheduler.add_job(
+                retention_engine.scheduled_run,
+                trigger=IntervalTrigger(hours=settings.RETENTION_INTERVAL_HOURS),
+                id="backup_retention",
+                name="Retención de backups",
+                replace_existing=True,
+                max_instances=1,
+                coalesce=True
+            )
+            logger.info(f"✅ Retención programada cada {settings.RETENTION_INTERVAL_HOURS} h")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error programando la retención: {str(e)}")
+            return False
+    
+    def schedule_catalog_maintenance(self) -> bool:
+        """Programa CROSSCHECK / DELETE EXPIRED una vez por base de datos (CATALOG_MAINTENANCE_INTERVAL_HOURS)"""
+        if settings.CATALOG_MAINTENANCE_INTERVAL_HOURS <= 0:
+            return False
+        try:
+            self.scheduler.add_job(
+                catalog_maintenance.scheduled_run,
+                trigger=IntervalTrigger(hours=settings.CATALOG_MAINTENANCE_INTERVAL_HOURS),
+                id="catalog_maintenance",
+                name="Mantenimiento del catálogo RMAN",
+                replace_existing=True,
+                max_instances=1,
+                coalesce=True
+            )
+            logger.info(f"✅ Mantenimiento del catálogo programado cada {settings.CATALOG_MAINTENANCE_INTERVAL_HOURS} h")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error programando el mantenimiento del catálogo: {str(e)}")
+            return False
+    
     def get_scheduled_jobs(self) -> List[Dict[str, Any]]:
         """Obtiene información de todos los jobs programados"""
         jobs_info = []
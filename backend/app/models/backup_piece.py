@@ -0,0 +1,36 @@
+from pydantic import BaseModel, ConfigDict
+from typing import Optional
+from datetime import datetime
+
+class BackupPieceBase(BaseModel):
+    handle: str
+    tag: Optional[str] = None
+    bytes: Optional[int] = None
+    bs_key: Optional[int] = None
+    set_stamp: Optional[int] = None
+    set_count: Optional[int] = None
+    piece_number: Optional[int] = None
+    backup_type: Optional[str] = None
+    incremental_level: Optional[int] = None
+    controlfile_included: bool = False
+    datafiles_included: bool = False  # False también si se desconoce (piezas de la salida de RMAN)
+    status: Optional[str] = None
+    source: str = "catalog"  # catalog (V$BACKUP_PIECE) o rman_output (líneas "piece handle=")
+    start_time: Optional[datetime] = None
+    completion_time: Optional[datetime] = None
+
+class BackupPieceCreate(BackupPieceBase):
+    pass
+
+class BackupPiece(BackupPieceBase):
+    id: int
+    log_id: int
+    strategy_id: int
+    created_at: Optional[datetime] = None
+    checksum: Optional[str] = None
+    checksum_algorithm: Optional[str] = None
+    checksum_at: Optional[datetime] = None
+    scrub_status: Optional[str] = None
+    last_scrub_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, Float, Sequence
+from sqlalchemy import Column, Integer, String, DateTime, Date, Boolean, Text, Float, Sequence, Index
 from sqlalchemy.dialects.oracle import VARCHAR2, NUMBER, TIMESTAMP, CLOB
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -58,7 +58,7 @@ class LogModel(Base):
 
     # CAMBIAR: Usar Sequence en lugar de autoincrement
     id = Column(Integer, Sequence('backup_logs_id_seq'), primary_key=True)
-    strategy_id = Column(Integer, nullable=False, index=True)
+    strategy_id = Column(Integer, nullable=False)
     level = Column(VARCHAR2(20), nullable=False)
     status = Column(VARCHAR2(20), nullable=False)
     message = Column(CLOB, nullable=False)
@@ -70,4 +70,132 @@ class LogModel(Base):
     rman_output = Column(CLOB)
     rman_log_content = Column(CLOB)
     error_message = Column(CLOB)
-    created_at = Column(TIMESTAMP, server_default=func.current_timestamp())
\ No newline at end of file
+    created_at = Column(TIMESTAMP, server_default=func.current_timestamp())
+
+    # Índices compuestos para los listados (estrategia + fecha) y las
+    # estadísticas/purga (fecha + estado); reemplazan al índice simple de strategy_id
+    __table_args__ = (
+        Index('ix_backup_logs_strategy_start', strategy_id, start_time.desc()),
+        Index('ix_backup_logs_start_status', start_time, status),
+    )
+class BackupPieceModel(Base):
+    __tablename__ = "backup_pieces"
+
+    id = Column(Integer, Sequence('backup_pieces_id_seq'), primary_key=True)
+    log_id = Column(Integer, nullable=False)
+    strategy_id = Column(Integer, nullable=False)
+
+    # Identificación del backup set en el control file (V$BACKUP_SET)
+    bs_key = Column(Integer)
+    set_stamp = Column(NUMBER(38))
+    set_count = Column(Integer)
+    piece_number = Column(Integer)
+
+    handle = Column(VARCHAR2(1024), nullable=False)
+    tag = Column(VARCHAR2(32))
+    bytes = Column(NUMBER(38))
+    backup_type = Column(VARCHAR2(1))  # D=datafile completo, I=incremental, L=archivelog
+    incremental_level = Column(Integer)
+    controlfile_included = Column(Boolean, default=False)
+    # El set contiene datafiles (V$BACKUP_DATAFILE con FILE# > 0); los sets de
+    # solo control file o SPFILE también tienen BACKUP_TYPE 'D'
+    datafiles_included = Column(Boolean, default=False)
+    status = Column(VARCHAR2(1))  # A=disponible, X=expirado, D=eliminado
+    source = Column(VARCHAR2(20), default="catalog")  # catalog | rman_output
+    start_time = Column(TIMESTAMP)
+    completion_time = Column(TIMESTAMP)
+    created_at = Column(TIMESTAMP, server_default=func.current_timestamp())
+
+    # Huella del contenido al terminar la ejecución y resultado del último scrub
+    checksum = Column(VARCHAR2(128))
+    checksum_algorithm = Column(VARCHAR2(16))
+    checksum_at = Column(TIMESTAMP)
+    scrub_status = Column(VARCHAR2(20))  # ok | mismatch | size_changed | missing | error
+    last_scrub_at = Column(TIMESTAMP)
+
+    __table_args__ = (
+        Index('ix_backup_pieces_log', log_id),
+        Index('ix_backup_pieces_strategy_completion', strategy_id, completion_time),
+        Index('ix_backup_pieces_scrub', last_scrub_at),
+    )
+
+class BackupNotificationModel(Base):
+    __tablename__ = "backup_notifications"
+
+    id = Column(Integer, Sequence('backup_notifications_id_seq'), primary_key=True)
+    strategy_id = Column(Integer)
+    log_id = Column(Integer)
+    kind = Column(VARCHAR2(20), nullable=False)  # failure | recovery | success | digest | email
+    recipient = Column(VARCHAR2(1000))  # Destinatarios separados por coma
+    subject = Column(VARCHAR2(500))
+    status = Column(VARCHAR2(20), nullable=False)  # queued | suppressed | sent | failed | dead
+    attempt = Column(Integer, default=0)  # 0 = decisión de envío; 1..n = intentos SMTP
+    latency_ms = Column(Integer)
+    signature = Column(VARCHAR2(200))  # Firma del error (códigos RMAN-/ORA- o hash del mensaje)
+    message_id = Column(VARCHAR2(64))  # Id del mensaje en el despachador
+    error_message = Column(Text)
+    created_at = Column(TIMESTAMP, server_default=func.current_timestamp())
+
+    __table_args__ = (
+        Index('ix_backup_notif_strategy_created', strategy_id, created_at),
+        Index('ix_backup_notif_message', message_id),
+    )
+
+class BackupVerificationModel(Base):
+    __tablename__ = "backup_verifications"
+
+    id = Column(Integer, Sequence('backup_verifications_id_seq'), primary_key=True)
+    log_id = Column(Integer, nullable=False)
+    strategy_id = Column(Integer, nullable=False)
+    mode = Column(VARCHAR2(20), nullable=False)  # backupset | restore
+    status = Column(VARCHAR2(20), nullable=False)  # queued | running | verified | failed | error
+    backup_sets = Column(VARCHAR2(4000))  # Claves de backup set validadas
+    pieces_checked = Column(Integer, default=0)
+    rman_errors = Column(Text)
+    output_tail = Column(Text)  # Cola de la salida de RMAN como evidencia
+    queued_at = Column(TIMESTAMP, server_default=func.current_timestamp())
+    started_at = Column(TIMESTAMP)
+    finished_at = Column(TIMESTAMP)
+    duration_seconds = Column(Float)
+
+    __table_args__ = (
+        Index('ix_backup_verifications_log', log_id),
+        Index('ix_backup_verifications_status', status),
+    )
+
+class CatalogMaintenanceModel(Base):
+    __tablename__ = "backup_maintenance_runs"
+
+    id = Column(Integer, Sequence('backup_maintenance_runs_id_seq'), primary_key=True)
+    trigger = Column(VARCHAR2(20), nullable=False)  # scheduled | manual
+    status = Column(VARCHAR2(20), nullable=False)  # running | completed | failed
+    started_at = Column(TIMESTAMP, server_default=func.current_timestamp())
+    finished_at = Column(TIMESTAMP)
+    duration_seconds = Column(Float)
+    crosscheck_seconds = Column(Float)
+    delete_expired_seconds = Column(Float)
+    objects_crosschecked = Column(Integer, default=0)
+    pieces_expired = Column(Integer, default=0)
+    objects_deleted = Column(Integer, default=0)
+    rman_errors = Column(Text)
+    output_tail = Column(Text)  # Cola de la salida de RMAN como evidencia
+
+    __table_args__ = (
+        Index('ix_backup_maintenance_started', started_at),
+    )
+
+class StorageUsageModel(Base):
+    __tablename__ = "backup_storage_usage"
+
+    # Uso de disco agregado por estrategia y día, actualizado al registrar y
+    # eliminar piezas; lo reconstruye storage_usage.reconcile desde backup_pieces
+    id = Column(Integer, Sequence('backup_storage_usage_id_seq'), primary_key=True)
+    strategy_id = Column(Integer, nullable=False)
+    usage_date = Column(Date, nullable=False)  # Día del directorio de la ejecución (YYYYMMDD)
+    files = Column(Integer, default=0, nullable=False)
+    bytes = Column(NUMBER(38), default=0, nullable=False)
+    updated_at = Column(TIMESTAMP, server_default=func.current_timestamp())
+
+    __table_args__ = (
+        Index('ux_backup_storage_usage', strategy_id, usage_date, unique=True),
+    )
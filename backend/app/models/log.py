@@ -27,7 +27,7 @@ class LogBase(BaseModel):
     duration_seconds: Optional[float] = None
     backup_size_mb: Optional[float] = None
     rman_output: Optional[str] = None
-    rman_log_content: Optional[str] = None  # Contenido completo del archivo .log
+    rman_log_content: Optional[str] = None  # Cola del archivo .log (el completo está en el almacén por bloques)
     error_message: Optional[str] = None
 
     model_config = ConfigDict(from_attributes=True)
@@ -38,6 +38,8 @@ class LogCreate(LogBase):
 class LogUpdate(BaseModel):
     status: Optional[BackupStatus] = None
     level: Optional[LogLevel] = None  # Agregar este campo
+    message: Optional[str] = None
+    details: Optional[Dict[str, Any]] = None
     end_time: Optional[datetime] = None
     duration_seconds: Optional[float] = None
     backup_size_mb: Optional[float] = None
@@ -47,4 +49,28 @@ class LogUpdate(BaseModel):
 
 class Log(LogBase):
     id: int
-    created_at: datetime
\ No newline at end of file
+    created_at: datetime
+
+class LogSummary(BaseModel):
+    """Proyección ligera para listados: no incluye las columnas CLOB pesadas"""
+    id: int
+    strategy_id: int
+    level: LogLevel
+    status: BackupStatus
+    message: str
+    start_time: datetime
+    end_time: Optional[datetime] = None
+    duration_seconds: Optional[float] = None
+    backup_size_mb: Optional[float] = None
+    has_error: bool = False
+    created_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class LogRmanOutput(BaseModel):
+    """Campos pesados de un log, servidos solo bajo demanda"""
+    id: int
+    rman_output: Optional[str] = None
+    rman_log_content: Optional[str] = None
+    error_message: Optional[str] = None
+    details: Optional[Dict[str, Any]] = None
@@ -0,0 +1,35 @@
+from pydantic import BaseModel, ConfigDict
+from typing import Optional
+from enum import Enum
+from datetime import datetime
+
+class MaintenanceTrigger(str, Enum):
+    SCHEDULED = "scheduled"
+    MANUAL = "manual"
+
+class MaintenanceStatus(str, Enum):
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class MaintenanceRunBase(BaseModel):
+    trigger: MaintenanceTrigger
+    status: MaintenanceStatus = MaintenanceStatus.RUNNING
+
+class MaintenanceRunCreate(MaintenanceRunBase):
+    pass
+
+class MaintenanceRun(MaintenanceRunBase):
+    id: int
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    duration_seconds: Optional[float] = None
+    crosscheck_seconds: Optional[float] = None
+    delete_expired_seconds: Optional[float] = None
+    objects_crosschecked: int = 0
+    pieces_expired: int = 0
+    objects_deleted: int = 0
+    rman_errors: Optional[str] = None
+    output_tail: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,40 @@
+from pydantic import BaseModel, ConfigDict
+from typing import Optional
+from enum import Enum
+from datetime import datetime
+
+class NotificationKind(str, Enum):
+    FAILURE = "failure"
+    RECOVERY = "recovery"
+    SUCCESS = "success"
+    DIGEST = "digest"
+    EMAIL = "email"
+
+class NotificationStatus(str, Enum):
+    QUEUED = "queued"
+    SUPPRESSED = "suppressed"
+    SENT = "sent"
+    FAILED = "failed"
+    DEAD = "dead"
+
+class NotificationBase(BaseModel):
+    strategy_id: Optional[int] = None
+    log_id: Optional[int] = None
+    kind: NotificationKind
+    recipient: Optional[str] = None
+    subject: Optional[str] = None
+    status: NotificationStatus
+    attempt: int = 0
+    latency_ms: Optional[int] = None
+    signature: Optional[str] = None
+    message_id: Optional[str] = None
+    error_message: Optional[str] = None
+
+class NotificationCreate(NotificationBase):
+    pass
+
+class Notification(NotificationBase):
+    id: int
+    created_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
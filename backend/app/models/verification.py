@@ -0,0 +1,37 @@
+from pydantic import BaseModel, ConfigDict
+from typing import Optional
+from enum import Enum
+from datetime import datetime
+
+class VerificationMode(str, Enum):
+    BACKUPSET = "backupset"  # VALIDATE BACKUPSET de las piezas de la ejecución
+    RESTORE = "restore"      # RESTORE ... VALIDATE: prueba de restauración sin escribir datafiles
+
+class VerificationStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    VERIFIED = "verified"
+    FAILED = "failed"
+    ERROR = "error"
+
+class VerificationBase(BaseModel):
+    log_id: int
+    strategy_id: int
+    mode: VerificationMode
+    status: VerificationStatus = VerificationStatus.QUEUED
+
+class VerificationCreate(VerificationBase):
+    pass
+
+class Verification(VerificationBase):
+    id: int
+    backup_sets: Optional[str] = None
+    pieces_checked: int = 0
+    rman_errors: Optional[str] = None
+    output_tail: Optional[str] = None
+    queued_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    duration_seconds: Optional[float] = None
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,215 @@
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, desc, func, or_, nullsfirst
+from app.models.database_models import BackupPieceModel
+from app.models.backup_piece import BackupPiece, BackupPieceCreate
+from app.repositories.storage_usage_repo import IN_STORAGE_USAGE, StorageUsageRepository
+from app.utils.storage_usage import usage_deltas
+import logging
+
+logger = logging.getLogger(__name__)
+
+class BackupPieceRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.usage_repo = StorageUsageRepository(db)
+    
+    async def create_many(
+        self,
+        log_id: int,
+        strategy_id: int,
+        pieces: List[BackupPieceCreate]
+    ) -> int:
+        """Registra las piezas generadas por una ejecución"""
+        if not pieces:
+            return 0
+        try:
+            self.db.add_all([
+                BackupPieceModel(log_id=log_id, strategy_id=strategy_id, **piece.model_dump())
+                for piece in pieces
+            ])
+            await self.usage_repo.apply_deltas(usage_deltas(
+                (strategy_id, piece.handle, piece.bytes, piece.completion_time)
+                for piece in pieces if piece.status != 'D'
+            ))
+            await self.db.commit()
+            return len(pieces)
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Error registrando piezas de backup del log {log_id}: {str(e)}")
+            raise
+    
+    async def get_by_log(self, log_id: int) -> List[BackupPiece]:
+        """Obtiene las piezas de una ejecución"""
+        result = await self.db.execute(
+            select(BackupPieceModel)
+            .where(BackupPieceModel.log_id == log_id)
+            .order_by(BackupPieceModel.set_stamp, BackupPieceModel.piece_number)
+        )
+        return [BackupPiece.model_validate(piece) for piece in result.scalars().all()]
+    
+    async def get_by_strategy(
+        self,
+        strategy_id: int,
+        status: Optional[str] = None,
+        limit: int = 500
+    ) -> List[BackupPiece]:
+        """Obtiene las piezas más recientes de una estrategia"""
+        query = select(BackupPieceModel).where(BackupPieceModel.strategy_id == strategy_id)
+        if status:
+            query = query.where(BackupPieceModel.status == status)
+        result = await self.db.execute(
+            query.order_by(desc(BackupPieceModel.completion_time)).limit(limit)
+        )
+        return [BackupPiece.model_validate(piece) for piece in result.scalars().all()]
+    
+    async def get_log_totals(self, log_id: int) -> Dict[str, Any]:
+        """Cantidad y tamaño total de las piezas de una ejecución"""
+        result = await self.db.execute(
+            select(func.count(BackupPieceModel.id), func.sum(BackupPieceModel.bytes))
+            .where(BackupPieceModel.log_id == log_id)
+        )
+        count, total_bytes = result.one()
+        return {'pieces': count, 'bytes': int(total_bytes or 0)}
+    
+    async def get_available_by_strategy(self, strategy_id: int) -> List[BackupPiece]:
+        """Todas las piezas no eliminadas de una estrategia (base de la política de retención)"""
+        result = await self.db.execute(
+            select(BackupPieceModel)
+            .where(
+                BackupPieceModel.strategy_id == strategy_id,
+                or_(BackupPieceModel.status.is_(None), BackupPieceModel.status != 'D')
+            )
+            .order_by(BackupPieceModel.log_id, BackupPieceModel.set_stamp, BackupPieceModel.piece_number)
+        )
+        return [BackupPiece.model_validate(piece) for piece in result.scalars().all()]
+    
+    async def mark_deleted(self, piece_ids: List[int]) -> int:
+        """Marca como eliminadas (status D) las piezas indicadas en una sola transacción"""
+        updated = 0
+        for start in range(0, len(piece_ids), 1000):
+            await self._release_usage(BackupPieceModel.id.in_(piece_ids[start:start + 1000]))
+            result = await self.db.execute(
+                update(BackupPieceModel)
+                .where(BackupPieceModel.id.in_(piece_ids[start:start + 1000]))
+                .values(status='D')
+            )
+            updated += result.rowcount
+        await self.db.commit()
+        return updated
+    
+    async def mark_deleted_by_handles(self, handles: List[str]) -> int:
+        """Marca como eliminadas las piezas cuyo registro quitó DELETE EXPIRED"""
+        updated = 0
+        for start in range(0, len(handles), 1000):
+            await self._release_usage(BackupPieceModel.handle.in_(handles[start:start + 1000]))
+            result = await self.db.execute(
+                update(BackupPieceModel)
+                .where(
+                    BackupPieceModel.handle.in_(handles[start:start + 1000]),
+                    or_(BackupPieceModel.status.is_(None), BackupPieceModel.status != 'D')
+                )
+                .values(status='D')
+            )
+            updated += result.rowcount
+        await self.db.commit()
+        return updated
+    
+    async def update_checksums(self, checksums: Dict[int, Dict[str, Any]]) -> int:
+        """Guarda la huella de cada pieza ({id: {checksum, checksum_algorithm, checksum_at}})"""
+        for piece_id, values in checksums.items():
+            await self.db.execute(
+                update(BackupPieceModel).where(BackupPieceModel.id == piece_id).values(**values)
+            )
+        await self.db.commit()
+        return len(checksums)
+    
+    async def get_scrub_candidates(self, limit: int) -> List[BackupPiece]:
+        """Piezas disponibles con checksum, primero las nunca revisadas y luego las más antiguas"""
+        result = await self.db.execute(
+            select(BackupPieceModel)
+            .where(
+                BackupPieceModel.status == 'A',
+                BackupPieceModel.checksum.isnot(None)
+            )
+            .order_by(nullsfirst(BackupPieceModel.last_scrub_at), BackupPieceModel.id)
+            .limit(limit)
+        )
+        return [BackupPiece.model_validate(piece) for piece in result.scalars().all()]
+    
+    async def update_scrub_results(self, results: Dict[int, str], scrubbed_at: datetime) -> int:
+        """Registra el resultado del scrub por pieza ({id: scrub_status})"""
+        await self._apply_scrub_usage(results)
+        for piece_id, scrub_status in results.items():
+            await self.db.execute(
+                update(BackupPieceModel)
+                .where(BackupPieceModel.id == piece_id)
+                .values(scrub_status=scrub_status, last_scrub_at=scrubbed_at)
+            )
+        await self.db.commit()
+        return len(results)
+    
+    async def get_catalog_handles(self) -> List[Tuple[int, str, Optional[str]]]:
+        """(id, handle, scrub_status) de las piezas no eliminadas, para compararlas con el disco"""
+        result = await self.db.execute(
+            select(BackupPieceModel.id, BackupPieceModel.handle, BackupPieceModel.scrub_status)
+            .where(or_(BackupPieceModel.status.is_(None), BackupPieceModel.status != 'D'))
+        )
+        return [tuple(row) for row in result.all()]
+    
+    async def get_drift(self, strategy_id: Optional[int] = None, limit: int = 500) -> List[BackupPiece]:
+        """Piezas disponibles cuyo último scrub no coincidió con su checksum"""
+        query = select(BackupPieceModel).where(
+            BackupPieceModel.status == 'A',
+            BackupPieceModel.scrub_status.isnot(None),
+            BackupPieceModel.scrub_status != 'ok'
+        )
+        if strategy_id is not None:
+            query = query.where(BackupPieceModel.strategy_id == strategy_id)
+        result = await self.db.execute(
+            query.order_by(desc(BackupPieceModel.last_scrub_at)).limit(limit)
+        )
+        return [BackupPiece.model_validate(piece) for piece in result.scalars().all()]
+    
+    async def _release_usage(self, condition) -> None:
+        """Descuenta del índice de uso las piezas que se van a marcar eliminadas"""
+        result = await self.db.execute(
+            select(
+                BackupPieceModel.strategy_id,
+                BackupPieceModel.handle,
+                BackupPieceModel.bytes,
+                func.coalesce(BackupPieceModel.completion_time, BackupPieceModel.created_at)
+            )
+            .where(condition, *IN_STORAGE_USAGE)
+        )
+        await self.usage_repo.apply_deltas(usage_deltas(result.all(), sign=-1))
+    
+    async def _apply_scrub_usage(self, results: Dict[int, str]) -> None:
+        """Las piezas que el scrub no encuentra dejan de contar en el índice (y vuelven si reaparecen)"""
+        piece_ids = list(results)
+        for start in range(0, len(piece_ids), 1000):
+            rows = await self.db.execute(
+                select(
+                    BackupPieceModel.id,
+                    BackupPieceModel.strategy_id,
+                    BackupPieceModel.handle,
+                    BackupPieceModel.bytes,
+                    func.coalesce(BackupPieceModel.completion_time, BackupPieceModel.created_at),
+                    BackupPieceModel.scrub_status
+                )
+                .where(
+                    BackupPieceModel.id.in_(piece_ids[start:start + 1000]),
+                    or_(BackupPieceModel.status.is_(None), BackupPieceModel.status != 'D')
+                )
+            )
+            gone, back = [], []
+            for piece_id, strategy_id, handle, size, when, previous in rows.all():
+                was_missing = previous == 'missing'
+                is_missing = results[piece_id] == 'missing'
+                if is_missing and not was_missing:
+                    gone.append((strategy_id, handle, size, when))
+                elif was_missing and not is_missing:
+                    back.append((strategy_id, handle, size, when))
+            await self.usage_repo.apply_deltas(usage_deltas(gone, sign=-1))
+            await self.usage_repo.apply_deltas(usage_deltas(back))
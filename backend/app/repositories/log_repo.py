@@ -1,10 +1,12 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, AsyncIterator, Awaitable, Callable
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, desc
+from sqlalchemy import select, delete, text, and_, or_, desc, func, case, literal_column
 from datetime import datetime
 import json
-from app.models.database_models import LogModel
-from app.models.log import Log, LogCreate, LogUpdate, LogLevel, BackupStatus
+from app.models.database_models import LogModel, StrategyModel, BackupNotificationModel, BackupVerificationModel
+from app.core.log_schema import INITIAL_PARTITION, list_log_partitions, drop_partition_sql
+from app.models.log import Log, LogCreate, LogUpdate, LogLevel, BackupStatus, LogSummary, LogRmanOutput
+from app.utils.pagination import encode_cursor, keyset_condition
 import logging
 
 logger = logging.getLogger(__name__)
@@ -60,18 +62,17 @@ class LogRepository:
         strategy_id: int, 
         limit: int = 100,
         offset: int = 0
-    ) -> List[Log]:
-        """Obtiene logs por estrategia"""
+    ) -> List[LogSummary]:
+        """Obtiene logs por estrategia (sin columnas CLOB)"""
         try:
             result = await self.db.execute(
-                select(LogModel)
+                select(*self._summary_columns())
                 .where(LogModel.strategy_id == strategy_id)
                 .order_by(desc(LogModel.start_time))
                 .offset(offset)
                 .limit(limit)
             )
-            logs = result.scalars().all()
-            return [self._model_to_log(log) for log in logs]
+            return [self._row_to_summary(row) for row in result.all()]
         except Exception as e:
             logger.error(f"Error obteniendo logs de estrategia {strategy_id}: {str(e)}")
             return []
@@ -82,31 +83,113 @@ class LogRepository:
         end_date: datetime,
         level: Optional[LogLevel] = None,
         status: Optional[BackupStatus] = None
-    ) -> List[Log]:
-        """Obtiene logs por rango de fecha"""
+    ) -> List[LogSummary]:
+        """Obtiene logs por rango de fecha (sin columnas CLOB)"""
         try:
-            query = select(LogModel).where(
-                and_(
-                    LogModel.start_time >= start_date,
-                    LogModel.start_time <= end_date
-                )
+            query = self._filtered_query(
+                self._summary_columns(), start_date, end_date, level=level, status=status
             )
             
-            if level:
-                query = query.where(LogModel.level == level.value)
-            if status:
-                query = query.where(LogModel.status == status.value)
-            
             query = query.order_by(desc(LogModel.start_time))
             
             result = await self.db.execute(query)
-            logs = result.scalars().all()
-            return [self._model_to_log(log) for log in logs]
+            return [self._row_to_summary(row) for row in result.all()]
             
         except Exception as e:
             logger.error(f"Error obteniendo logs por rango de fecha: {str(e)}")
             return []
     
+    async def stream_export_rows(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        strategy_id: Optional[int] = None,
+        level: Optional[LogLevel] = None,
+        status: Optional[BackupStatus] = None,
+        batch_size: int = 500
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Recorre los logs a exportar en lotes desde un cursor del servidor.
+        
+        Solo se mantiene en memoria un lote de ``batch_size`` filas a la vez.
+        """
+        query = self._filtered_query(
+            self._summary_columns(full_message=True) + [LogModel.error_message],
+            start_date, end_date, strategy_id, level, status
+        ).order_by(LogModel.start_time, LogModel.id)
+        
+        result = await self.db.stream(query.execution_options(yield_per=batch_size))
+        async for rows in result.partitions(batch_size):
+            yield [
+                {**self._row_to_summary(row).model_dump(), 'error_message': row.error_message}
+                for row in rows
+            ]
+    
+    async def get_rman_output(self, log_id: int) -> Optional[LogRmanOutput]:
+        """Obtiene solo los campos pesados (salida RMAN, errores, detalles) de un log"""
+        try:
+            result = await self.db.execute(
+                select(
+                    LogModel.id,
+                    LogModel.rman_output,
+                    LogModel.rman_log_content,
+                    LogModel.error_message,
+                    LogModel.details
+                ).where(LogModel.id == log_id)
+            )
+            row = result.one_or_none()
+            if not row:
+                return None
+            return LogRmanOutput(
+                id=row.id,
+                rman_output=row.rman_output,
+                rman_log_content=row.rman_log_content,
+                error_message=row.error_message,
+                details=json.loads(row.details) if row.details else None
+            )
+        except Exception as e:
+            logger.error(f"Error obteniendo salida RMAN del log {log_id}: {str(e)}")
+            return None
+    
+    async def search(
+        self,
+        strategy_id: Optional[int] = None,
+        level: Optional[LogLevel] = None,
+        status: Optional[BackupStatus] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        offset: int = 0
+    ) -> Tuple[List[LogSummary], Optional[str]]:
+        """Busca logs combinando todos los filtros y paginando en la base de datos.
+        
+        Con ``cursor`` se usa paginación por clave (start_time, id), cuyo costo no
+        crece con la profundidad de la página; ``offset`` queda solo como respaldo
+        para clientes que aún no usan el cursor. Retorna la página y el cursor de
+        la siguiente (None si no hay más resultados).
+        """
+        query = self._filtered_query(
+            self._summary_columns(), start_date, end_date, strategy_id, level, status
+        )
+        
+        if cursor and offset:
+            raise ValueError("No se puede combinar cursor y offset")
+        if cursor:
+            query = query.where(keyset_condition(LogModel.start_time, LogModel.id, cursor))
+        elif offset:
+            query = query.offset(offset)
+        
+        # Se pide una fila extra para saber si existe una página siguiente
+        query = query.order_by(desc(LogModel.start_time), desc(LogModel.id)).limit(limit + 1)
+        result = await self.db.execute(query)
+        logs = [self._row_to_summary(row) for row in result.all()]
+        
+        next_cursor = None
+        if len(logs) > limit:
+            logs = logs[:limit]
+            next_cursor = encode_cursor(logs[-1].start_time, logs[-1].id)
+        return logs, next_cursor
+    
     async def update(self, log_id: int, update_data: Dict[str, Any]) -> Optional[Log]:
         """Actualiza un registro de log"""
         try:
@@ -139,6 +222,27 @@ class LogRepository:
             logger.error(f"Error actualizando log {log_id}: {str(e)}")
             return None
     
+    async def merge_details(self, log_id: int, values: Dict[str, Any]) -> bool:
+        """Agrega claves a details sin pisar las que escriben otros procesos en paralelo"""
+        try:
+            result = await self.db.execute(
+                select(LogModel).where(LogModel.id == log_id).with_for_update()
+            )
+            db_log = result.scalar_one_or_none()
+            if not db_log:
+                return False
+            
+            details = json.loads(db_log.details) if db_log.details else {}
+            details.update(values)
+            db_log.details = json.dumps(details)
+            await self.db.commit()
+            return True
+            
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Error actualizando detalles del log {log_id}: {str(e)}")
+            return False
+    
     async def delete(self, log_id: int) -> bool:
         """Elimina un registro de log"""
         try:
@@ -161,20 +265,376 @@ class LogRepository:
             logger.error(f"Error eliminando log {log_id}: {str(e)}")
             return False
     
-    async def get_recent_logs(self, limit: int = 50) -> List[Log]:
-        """Obtiene los logs más recientes"""
+    async def purge_before(
+        self,
+        cutoff: datetime,
+        batch_size: int = 1000,
+        on_batch: Optional[Callable[[List[int]], Awaitable[None]]] = None
+    ) -> Dict[str, Any]:
+        """Elimina los logs con start_time anterior a ``cutoff``.
+        
+        Los logs se recorren por lotes de ``batch_size`` IDs (solo un lote en
+        memoria): en cada lote se borran sus notificaciones y verificaciones,
+        las filas de backup_logs y se confirma; después ``on_batch`` recibe los
+        IDs (p. ej. para borrar sus logs RMAN). Si backup_logs está
+        particionada, las particiones mensuales que quedan completamente antes
+        del corte no se borran fila por fila sino con DROP PARTITION, que es DDL
+        (commit implícito) y por eso se ejecuta después de confirmar el DML; si
+        falla, esas filas se borran con DELETE. Retorna la cantidad purgada.
+        """
+        partitions = await list_log_partitions(self.db)
+        droppable = []
+        for previous, partition in zip(partitions, partitions[1:]):
+            if partition['high_value'] is None or partition['high_value'] > cutoff:
+                break
+            if partition['name'] != INITIAL_PARTITION and previous['high_value'] is not None:
+                droppable.append({**partition, 'low_value': previous['high_value']})
+        
+        row_filter = LogModel.start_time < cutoff
+        if droppable:
+            # Las filas de las particiones a eliminar las quita el DROP PARTITION
+            row_filter = and_(row_filter, or_(
+                LogModel.start_time < droppable[0]['low_value'],
+                LogModel.start_time >= droppable[-1]['high_value']
+            ))
+        
+        purged_logs = 0
+        deleted_rows = 0
+        last_id = 0
+        while True:
+            result = await self.db.execute(
+                select(LogModel.id)
+                .where(LogModel.start_time < cutoff, LogModel.id > last_id)
+                .order_by(LogModel.id)
+                .limit(batch_size)
+            )
+            log_ids = [row[0] for row in result.all()]
+            if not log_ids:
+                break
+            last_id = log_ids[-1]
+            
+            try:
+                await self.db.execute(
+                    delete(BackupNotificationModel).where(BackupNotificationModel.log_id.in_(log_ids))
+                )
+                await self.db.execute(
+                    delete(BackupVerificationModel).where(BackupVerificationModel.log_id.in_(log_ids))
+                )
+                result = await self.db.execute(
+                    delete(LogModel).where(LogModel.id.in_(log_ids), row_filter)
+                )
+                await self.db.commit()
+            except Exception:
+                await self.db.rollback()
+                raise
+            deleted_rows += result.rowcount
+            purged_logs += len(log_ids)
+            if on_batch:
+                await on_batch(log_ids)
+        
+        dropped_partitions = []
+        for partition in droppable:
+            try:
+                await self.db.execute(text(drop_partition_sql(partition['name'])))
+                dropped_partitions.append(partition['name'])
+            except Exception as e:
+                await self.db.rollback()
+                logger.error(f"No se pudo eliminar la partición {partition['name']}, se borran sus filas: {str(e)}")
+                result = await self.db.execute(
+                    delete(LogModel).where(
+                        LogModel.start_time >= partition['low_value'],
+                        LogModel.start_time < partition['high_value']
+                    )
+                )
+                await self.db.commit()
+                deleted_rows += result.rowcount
+        
+        return {
+            'purged_logs': purged_logs,
+            'dropped_partitions': dropped_partitions,
+            'deleted_rows': deleted_rows
+        }
+    
+    async def get_recent_logs(self, limit: int = 50) -> List[LogSummary]:
+        """Obtiene los logs más recientes (sin columnas CLOB)"""
         try:
             result = await self.db.execute(
-                select(LogModel)
+                select(*self._summary_columns())
                 .order_by(desc(LogModel.start_time))
                 .limit(limit)
             )
-            logs = result.scalars().all()
-            return [self._model_to_log(log) for log in logs]
+            return [self._row_to_summary(row) for row in result.all()]
         except Exception as e:
             logger.error(f"Error obteniendo logs recientes: {str(e)}")
             return []
     
+    async def get_statuses(self, log_ids: List[int]) -> Dict[int, str]:
+        """Estado de varias ejecuciones ({log_id: status}), en lotes para el límite de IN de Oracle"""
+        statuses: Dict[int, str] = {}
+        log_ids = list(log_ids)
+        for start in range(0, len(log_ids), 1000):
+            result = await self.db.execute(
+                select(LogModel.id, LogModel.status).where(LogModel.id.in_(log_ids[start:start + 1000]))
+            )
+            statuses.update({log_id: status for log_id, status in result.all()})
+        return statuses
+    
+    async def get_run_metrics(self, strategy_id: int, limit: int = 10) -> List[Dict[str, Any]]:
+        """Duración, tamaño y detalles de las últimas ejecuciones completadas de una estrategia"""
+        try:
+            result = await self.db.execute(
+                select(
+                    LogModel.id,
+                    LogModel.start_time,
+                    LogModel.duration_seconds,
+                    LogModel.backup_size_mb,
+                    LogModel.details
+                )
+                .where(
+                    LogModel.strategy_id == strategy_id,
+                    LogModel.status == BackupStatus.COMPLETED.value,
+                    LogModel.duration_seconds > 0
+                )
+                .order_by(desc(LogModel.start_time), desc(LogModel.id))
+                .limit(limit)
+            )
+            return [
+                {
+                    'id': row.id,
+                    'start_time': row.start_time,
+                    'duration_seconds': row.duration_seconds,
+                    'backup_size_mb': row.backup_size_mb,
+                    'details': json.loads(row.details) if row.details else {},
+                }
+                for row in result.all()
+            ]
+        except Exception as e:
+            logger.error(f"Error obteniendo métricas de la estrategia {strategy_id}: {str(e)}")
+            return []
+
+    def _range_filters(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        strategy_id: Optional[int] = None
+    ) -> list:
+        filters = [LogModel.start_time >= start_date, LogModel.start_time <= end_date]
+        if strategy_id is not None:
+            filters.append(LogModel.strategy_id == strategy_id)
+        return filters
+    
+    def _filtered_query(
+        self,
+        columns: list,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        strategy_id: Optional[int] = None,
+        level: Optional[LogLevel] = None,
+        status: Optional[BackupStatus] = None
+    ):
+        """SELECT de ``columns`` con todos los filtros de listado aplicados"""
+        query = select(*columns)
+        if start_date is not None:
+            query = query.where(LogModel.start_time >= start_date)
+        if end_date is not None:
+            query = query.where(LogModel.start_time <= end_date)
+        if strategy_id is not None:
+            query = query.where(LogModel.strategy_id == strategy_id)
+        if level:
+            query = query.where(LogModel.level == level.value)
+        if status:
+            query = query.where(LogModel.status == status.value)
+        return query
+    
+    async def get_status_totals(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        strategy_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Totales por estado calculados en la base de datos"""
+        result = await self.db.execute(
+            select(
+                LogModel.status,
+                func.count(LogModel.id),
+                func.sum(LogModel.backup_size_mb),
+                func.sum(LogModel.duration_seconds),
+                func.avg(LogModel.duration_seconds)
+            )
+            .where(and_(*self._range_filters(start_date, end_date, strategy_id)))
+            .group_by(LogModel.status)
+        )
+        return [
+            {
+                'status': row[0],
+                'count': row[1],
+                'total_size_mb': float(row[2] or 0),
+                'total_duration_seconds': float(row[3] or 0),
+                'average_duration_seconds': float(row[4] or 0)
+            }
+            for row in result.all()
+        ]
+    
+    async def get_range_fingerprint(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        strategy_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Huella de los datos de un rango: cambia si se agregan, borran o cierran logs"""
+        result = await self.db.execute(
+            select(
+                func.count(LogModel.id),
+                func.max(LogModel.id),
+                func.max(LogModel.end_time)
+            )
+            .where(and_(*self._range_filters(start_date, end_date, strategy_id)))
+        )
+        row = result.one()
+        return {
+            'count': row[0],
+            'max_id': row[1],
+            'last_end_time': row[2].isoformat() if row[2] else None
+        }
+    
+    async def get_top_errors(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        strategy_id: Optional[int] = None,
+        limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        """Errores más frecuentes (primera línea del mensaje) agrupados en SQL"""
+        # Oracle no permite GROUP BY sobre CLOB: se agrupa la primera línea como VARCHAR2
+        first_line = func.regexp_substr(
+            func.dbms_lob.substr(LogModel.error_message, 1000, 1),
+            literal_column("'[^'||CHR(10)||']+'")
+        ).label('error_line')
+        
+        errors = (
+            select(first_line)
+            .where(and_(
+                *self._range_filters(start_date, end_date, strategy_id),
+                LogModel.status == BackupStatus.FAILED.value,
+                LogModel.error_message.isnot(None)
+            ))
+            .subquery()
+        )
+        total = func.count().label('total')
+        result = await self.db.execute(
+            select(errors.c.error_line, total)
+            .where(errors.c.error_line.isnot(None))
+            .group_by(errors.c.error_line)
+            .order_by(desc(total))
+            .limit(limit)
+        )
+        return [{'error': row[0], 'count': row[1]} for row in result.all()]
+    
+    async def get_strategy_breakdown(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        strategy_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Totales por estrategia calculados en la base de datos"""
+        result = await self.db.execute(
+            select(
+                LogModel.strategy_id,
+                StrategyModel.name,
+                func.count(LogModel.id),
+                func.sum(case((LogModel.status == BackupStatus.COMPLETED.value, 1), else_=0)),
+                func.sum(case((LogModel.status == BackupStatus.FAILED.value, 1), else_=0)),
+                func.sum(LogModel.backup_size_mb),
+                func.avg(LogModel.duration_seconds),
+                func.max(LogModel.start_time)
+            )
+            .outerjoin(StrategyModel, StrategyModel.id == LogModel.strategy_id)
+            .where(and_(*self._range_filters(start_date, end_date, strategy_id)))
+            .group_by(LogModel.strategy_id, StrategyModel.name)
+            .order_by(LogModel.strategy_id)
+        )
+        return [
+            {
+                'strategy_id': row[0],
+                'strategy_name': row[1],
+                'total_backups': row[2],
+                'completed': int(row[3] or 0),
+                'failed': int(row[4] or 0),
+                'total_size_mb': round(float(row[5] or 0), 2),
+                'average_duration_seconds': round(float(row[6] or 0), 2),
+                'last_backup': row[7]
+            }
+            for row in result.all()
+        ]
+    
+    async def get_daily_breakdown(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        strategy_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Totales por día calculados en la base de datos"""
+        day = func.trunc(LogModel.start_time)
+        result = await self.db.execute(
+            select(
+                day,
+                func.count(LogModel.id),
+                func.sum(case((LogModel.status == BackupStatus.COMPLETED.value, 1), else_=0)),
+                func.sum(case((LogModel.status == BackupStatus.FAILED.value, 1), else_=0)),
+                func.sum(LogModel.backup_size_mb)
+            )
+            .where(and_(*self._range_filters(start_date, end_date, strategy_id)))
+            .group_by(day)
+            .order_by(day)
+        )
+        return [
+            {
+                'date': row[0].date().isoformat() if row[0] else None,
+                'total_backups': row[1],
+                'completed': int(row[2] or 0),
+                'failed': int(row[3] or 0),
+                'total_size_mb': round(float(row[4] or 0), 2)
+            }
+            for row in result.all()
+        ]
+    
+    def _summary_columns(self, full_message: bool = False) -> list:
+        """Columnas de la proyección ligera.
+
+        En los listados el mensaje se lee como VARCHAR2 (primeros 1000
+        caracteres); con ``full_message`` (exportaciones) se lee completo.
+        """
+        message = LogModel.message if full_message else func.dbms_lob.substr(LogModel.message, 1000, 1)
+        return [
+            LogModel.id,
+            LogModel.strategy_id,
+            LogModel.level,
+            LogModel.status,
+            message.label('message'),
+            LogModel.start_time,
+            LogModel.end_time,
+            LogModel.duration_seconds,
+            LogModel.backup_size_mb,
+            case((LogModel.error_message.isnot(None), 1), else_=0).label('has_error'),
+            LogModel.created_at
+        ]
+    
+    def _row_to_summary(self, row) -> LogSummary:
+        """Convierte una fila de la proyección ligera a LogSummary"""
+        return LogSummary(
+            id=row.id,
+            strategy_id=row.strategy_id,
+            level=LogLevel(row.level),
+            status=BackupStatus(row.status),
+            message=row.message or "",
+            start_time=row.start_time,
+            end_time=row.end_time,
+            duration_seconds=row.duration_seconds,
+            backup_size_mb=row.backup_size_mb,
+            has_error=bool(row.has_error),
+            created_at=row.created_at
+        )
+    
     def _model_to_log(self, db_log: LogModel) -> Log:
         """Convierte LogModel a Log"""
         import json
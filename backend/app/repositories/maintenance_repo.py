@@ -0,0 +1,62 @@
+from typing import List, Dict, Any
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, desc
+from app.models.database_models import CatalogMaintenanceModel
+from app.models.maintenance import MaintenanceRun, MaintenanceRunCreate, MaintenanceStatus
+import logging
+
+logger = logging.getLogger(__name__)
+
+class MaintenanceRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def create(self, maintenance_run: MaintenanceRunCreate) -> MaintenanceRun:
+        """Registra el inicio de un mantenimiento del catálogo"""
+        try:
+            db_run = CatalogMaintenanceModel(**maintenance_run.model_dump(mode='json'))
+            self.db.add(db_run)
+            await self.db.commit()
+            await self.db.refresh(db_run)
+            return MaintenanceRun.model_validate(db_run)
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Error registrando mantenimiento del catálogo: {str(e)}")
+            raise
+    
+    async def update(self, run_id: int, values: Dict[str, Any]) -> None:
+        """Guarda el resultado y las duraciones de un mantenimiento"""
+        values = {
+            field: value.value if isinstance(value, MaintenanceStatus) else value
+            for field, value in values.items()
+        }
+        try:
+            await self.db.execute(
+                update(CatalogMaintenanceModel)
+                .where(CatalogMaintenanceModel.id == run_id)
+                .values(**values)
+            )
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Error actualizando mantenimiento {run_id}: {str(e)}")
+            raise
+    
+    async def fail_interrupted(self) -> int:
+        """Marca como fallidos los mantenimientos que quedaron en curso (p. ej. por un reinicio)"""
+        result = await self.db.execute(
+            update(CatalogMaintenanceModel)
+            .where(CatalogMaintenanceModel.status == MaintenanceStatus.RUNNING.value)
+            .values(status=MaintenanceStatus.FAILED.value, rman_errors="Interrumpido antes de terminar")
+        )
+        await self.db.commit()
+        return result.rowcount
+    
+    async def get_runs(self, limit: int = 50) -> List[MaintenanceRun]:
+        """Mantenimientos más recientes primero"""
+        result = await self.db.execute(
+            select(CatalogMaintenanceModel)
+            .order_by(desc(CatalogMaintenanceModel.started_at))
+            .limit(limit)
+        )
+        return [MaintenanceRun.model_validate(run) for run in result.scalars().all()]
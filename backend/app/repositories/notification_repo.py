@@ -0,0 +1,81 @@
+from typing import List, Optional
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, desc, func
+from app.models.database_models import BackupNotificationModel
+from app.models.notification import Notification, NotificationCreate, NotificationKind, NotificationStatus
+import logging
+
+logger = logging.getLogger(__name__)
+
+class NotificationRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def create(self, notification: NotificationCreate) -> Notification:
+        """Registra una decisión o un intento de envío"""
+        try:
+            db_notification = BackupNotificationModel(**notification.model_dump(mode='json'))
+            self.db.add(db_notification)
+            await self.db.commit()
+            await self.db.refresh(db_notification)
+            return Notification.model_validate(db_notification)
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Error registrando notificación: {str(e)}")
+            raise
+    
+    async def get_last_queued(
+        self,
+        strategy_id: int,
+        kinds: List[NotificationKind],
+        signature: Optional[str] = None
+    ) -> Optional[Notification]:
+        """Última alerta encolada de una estrategia (opcionalmente con la misma firma)"""
+        query = select(BackupNotificationModel).where(
+            BackupNotificationModel.strategy_id == strategy_id,
+            BackupNotificationModel.kind.in_([kind.value for kind in kinds]),
+            BackupNotificationModel.status == NotificationStatus.QUEUED.value
+        )
+        if signature is not None:
+            query = query.where(BackupNotificationModel.signature == signature)
+        result = await self.db.execute(
+            query.order_by(desc(BackupNotificationModel.created_at), desc(BackupNotificationModel.id)).limit(1)
+        )
+        notification = result.scalar_one_or_none()
+        return Notification.model_validate(notification) if notification else None
+    
+    async def count_suppressed_since(
+        self,
+        strategy_id: int,
+        since: Optional[datetime] = None,
+        signature: Optional[str] = None
+    ) -> int:
+        """Cantidad de alertas suprimidas de una estrategia desde una fecha"""
+        query = select(func.count(BackupNotificationModel.id)).where(
+            BackupNotificationModel.strategy_id == strategy_id,
+            BackupNotificationModel.status == NotificationStatus.SUPPRESSED.value
+        )
+        if since is not None:
+            query = query.where(BackupNotificationModel.created_at > since)
+        if signature is not None:
+            query = query.where(BackupNotificationModel.signature == signature)
+        result = await self.db.execute(query)
+        return result.scalar() or 0
+    
+    async def get_notifications(
+        self,
+        strategy_id: Optional[int] = None,
+        status: Optional[NotificationStatus] = None,
+        limit: int = 100
+    ) -> List[Notification]:
+        """Historial de notificaciones, más recientes primero"""
+        query = select(BackupNotificationModel)
+        if strategy_id is not None:
+            query = query.where(BackupNotificationModel.strategy_id == strategy_id)
+        if status is not None:
+            query = query.where(BackupNotificationModel.status == status.value)
+        result = await self.db.execute(
+            query.order_by(desc(BackupNotificationModel.created_at), desc(BackupNotificationModel.id)).limit(limit)
+        )
+        return [Notification.model_validate(notification) for notification in result.scalars().all()]
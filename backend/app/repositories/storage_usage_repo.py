@@ -0,0 +1,149 @@
+from typing import List, Optional, Dict, Any
+from datetime import date
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, func, or_, text
+from sqlalchemy.exc import IntegrityError
+from app.models.database_models import BackupPieceModel, StorageUsageModel
+from app.utils.storage_usage import UsageDeltas, usage_deltas
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Piezas que ocupan disco según el índice backup_storage_usage
+IN_STORAGE_USAGE = (
+    or_(BackupPieceModel.status.is_(None), BackupPieceModel.status != 'D'),
+    or_(BackupPieceModel.scrub_status.is_(None), BackupPieceModel.scrub_status != 'missing'),
+)
+
+# Suma atómica por (estrategia, día): crea la fila si no existe y solo si hay archivos que sumar
+MERGE_USAGE_SQL = text("""
+    MERGE INTO backup_storage_usage u
+    USING (SELECT :strategy_id AS strategy_id, :usage_date AS usage_date FROM dual) s
+    ON (u.strategy_id = s.strategy_id AND u.usage_date = s.usage_date)
+    WHEN MATCHED THEN UPDATE SET
+        u.files = u.files + :files,
+        u.bytes = u.bytes + :size,
+        u.updated_at = CURRENT_TIMESTAMP
+    WHEN NOT MATCHED THEN INSERT (id, strategy_id, usage_date, files, bytes, updated_at)
+        VALUES (backup_storage_usage_id_seq.NEXTVAL, s.strategy_id, s.usage_date, :files, :size, CURRENT_TIMESTAMP)
+        WHERE :files > 0
+""")
+
+
+class StorageUsageRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def apply_deltas(self, deltas: UsageDeltas) -> None:
+        """Suma los cambios al índice sin confirmar: el commit lo hace quien registra las piezas"""
+        for (strategy_id, usage_date), (files, size) in deltas.items():
+            if not files and not size:
+                continue
+            params = {'strategy_id': strategy_id, 'usage_date': usage_date, 'files': files, 'size': size}
+            try:
+                await self.db.execute(MERGE_USAGE_SQL, params)
+            except IntegrityError:
+                # Otra sesión insertó la misma fila a la vez: ahora existe y el MERGE la actualiza
+                await self.db.execute(MERGE_USAGE_SQL, params)
+            if files < 0:
+                # Día sin piezas: no dejar filas vacías en el índice
+                await self.db.execute(
+                    delete(StorageUsageModel).where(
+                        StorageUsageModel.strategy_id == strategy_id,
+                        StorageUsageModel.usage_date == usage_date,
+                        StorageUsageModel.files <= 0
+                    )
+                )
+    
+    async def rebuild_from_pieces(self) -> UsageDeltas:
+        """Reemplaza el índice con las piezas del catálogo que ocupan disco.
+
+        La tabla queda bloqueada hasta el commit: los registros de piezas de
+        otras sesiones (o procesos) esperan y aplican sus cambios sobre el
+        índice ya reconstruido, sin contarse dos veces ni perderse.
+        """
+        try:
+            await self.db.execute(text("LOCK TABLE backup_storage_usage IN EXCLUSIVE MODE"))
+            result = await self.db.stream(
+                select(
+                    BackupPieceModel.strategy_id,
+                    BackupPieceModel.handle,
+                    BackupPieceModel.bytes,
+                    func.coalesce(BackupPieceModel.completion_time, BackupPieceModel.created_at)
+                )
+                .where(*IN_STORAGE_USAGE)
+                .execution_options(yield_per=1000)
+            )
+            usage: UsageDeltas = {}
+            async for rows in result.partitions():
+                for key, (files, size) in usage_deltas(rows).items():
+                    totals = usage.setdefault(key, [0, 0])
+                    totals[0] += files
+                    totals[1] += size
+
+            await self.db.execute(delete(StorageUsageModel))
+            self.db.add_all([
+                StorageUsageModel(strategy_id=strategy_id, usage_date=usage_date, files=files, bytes=size)
+                for (strategy_id, usage_date), (files, size) in usage.items()
+            ])
+            await self.db.commit()
+            return usage
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Error reconstruyendo el índice de uso de disco: {str(e)}")
+            raise
+    
+    async def get_total(self) -> Dict[str, Any]:
+        result = await self.db.execute(
+            select(func.sum(StorageUsageModel.files), func.sum(StorageUsageModel.bytes))
+        )
+        files, total_bytes = result.one()
+        return {'files': int(files or 0), 'bytes': int(total_bytes or 0)}
+    
+    async def get_by_strategy(self) -> List[Dict[str, Any]]:
+        """Uso por estrategia (una fila por día de retención, no por archivo)"""
+        result = await self.db.execute(
+            select(
+                StorageUsageModel.strategy_id,
+                func.sum(StorageUsageModel.files),
+                func.sum(StorageUsageModel.bytes),
+                func.max(StorageUsageModel.updated_at)
+            )
+            .group_by(StorageUsageModel.strategy_id)
+            .order_by(StorageUsageModel.strategy_id)
+        )
+        return [
+            {
+                'strategy_id': row[0],
+                'files': int(row[1] or 0),
+                'bytes': int(row[2] or 0),
+                'updated_at': row[3],
+            }
+            for row in result.all()
+        ]
+    
+    async def get_by_day(
+        self,
+        strategy_id: Optional[int] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> List[Dict[str, Any]]:
+        """Uso por día, de una estrategia o de todas"""
+        query = select(
+            StorageUsageModel.usage_date,
+            func.sum(StorageUsageModel.files),
+            func.sum(StorageUsageModel.bytes)
+        )
+        if strategy_id is not None:
+            query = query.where(StorageUsageModel.strategy_id == strategy_id)
+        if start_date:
+            query = query.where(StorageUsageModel.usage_date >= start_date)
+        if end_date:
+            query = query.where(StorageUsageModel.usage_date <= end_date)
+        result = await self.db.execute(
+            query.group_by(StorageUsageModel.usage_date).order_by(StorageUsageModel.usage_date)
+        )
+        return [
+            {'usage_date': row[0], 'files': int(row[1] or 0), 'bytes': int(row[2] or 0)}
+            for row in result.all()
+        ]
@@ -0,0 +1,70 @@
+from typing import List, Optional, Dict, Any
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, desc
+from app.models.database_models import BackupVerificationModel
+from app.models.verification import Verification, VerificationCreate, VerificationStatus
+import logging
+
+logger = logging.getLogger(__name__)
+
+class VerificationRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def create(self, verification: VerificationCreate) -> Verification:
+        """Registra una verificación en cola"""
+        try:
+            db_verification = BackupVerificationModel(**verification.model_dump(mode='json'))
+            self.db.add(db_verification)
+            await self.db.commit()
+            await self.db.refresh(db_verification)
+            return Verification.model_validate(db_verification)
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Error registrando verificación del log {verification.log_id}: {str(e)}")
+            raise
+    
+    async def get_by_id(self, verification_id: int) -> Optional[Verification]:
+        result = await self.db.execute(
+            select(BackupVerificationModel).where(BackupVerificationModel.id == verification_id)
+        )
+        verification = result.scalar_one_or_none()
+        return Verification.model_validate(verification) if verification else None
+    
+    async def get_by_log(self, log_id: int) -> List[Verification]:
+        """Verificaciones de una ejecución, más recientes primero"""
+        result = await self.db.execute(
+            select(BackupVerificationModel)
+            .where(BackupVerificationModel.log_id == log_id)
+            .order_by(desc(BackupVerificationModel.id))
+        )
+        return [Verification.model_validate(verification) for verification in result.scalars().all()]
+    
+    async def get_pending(self) -> List[Verification]:
+        """Verificaciones en cola o interrumpidas en curso (p. ej. por un reinicio)"""
+        result = await self.db.execute(
+            select(BackupVerificationModel)
+            .where(BackupVerificationModel.status.in_([
+                VerificationStatus.QUEUED.value, VerificationStatus.RUNNING.value
+            ]))
+            .order_by(BackupVerificationModel.id)
+        )
+        return [Verification.model_validate(verification) for verification in result.scalars().all()]
+    
+    async def update(self, verification_id: int, values: Dict[str, Any]) -> None:
+        """Actualiza el estado y la evidencia de una verificación"""
+        values = {
+            field: value.value if isinstance(value, VerificationStatus) else value
+            for field, value in values.items()
+        }
+        try:
+            await self.db.execute(
+                update(BackupVerificationModel)
+                .where(BackupVerificationModel.id == verification_id)
+                .values(**values)
+            )
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Error actualizando verificación {verification_id}: {str(e)}")
+            raise
@@ -1,3 +1,4 @@
+import asyncio
 import os
 from typing import List, Optional, Dict, Any
 from datetime import datetime
@@ -6,10 +7,18 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.strategy import Strategy, BackupType
 from app.models.log import BackupStatus, LogLevel
 from app.models.log import LogCreate, LogUpdate
-from app.services.oracle_service import OracleService
-from app.services.email_service import EmailService
+from app.services.oracle_service import OracleService, INCREMENTAL_MODES
 from app.services.log_service import LogService
+from app.services.metadata_cache import database_metadata
+from app.services.email_service import EmailService
+from app.services.progress_service import progress_tracker, command_id_for_run
+from app.repositories.backup_piece_repo import BackupPieceRepository
+from app.services.tuning_service import TuningAdvisor
+from app.services.verification_service import backup_verifier
+from app.services.checksum_service import checksum_service
+from app.models.verification import VerificationMode
 from app.utils.file_utils import FileUtils
+from app.utils.rman_layout import resolve_compression_level
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -18,8 +27,9 @@ class BackupService:
     def __init__(self, db: AsyncSession):
         self.db = db
         self.oracle_service = OracleService()
-        self.email_service = EmailService()
         self.log_service = LogService(db)  # Pasar la sesión de BD al servicio de logs
+        self.piece_repo = BackupPieceRepository(db)
+        self.email_service = EmailService(db)
         self.file_utils = FileUtils()
     
     async def execute_backup_strategy(self, strategy: Strategy) -> Dict[str, Any]:
@@ -42,46 +52,84 @@ class BackupService:
         log_entry = await self.log_service.create_log(log_data)
         
         try:
-            # Preparar ruta de backup
-            backup_filename = FileUtils.generate_backup_filename(
-                strategy.name, 
-                strategy.backup_type
+            # Directorio y TAG propios de esta ejecución: strategy_{id}/YYYYMMDD, S{id}_{timestamp}
+            backup_path = await asyncio.to_thread(
+                FileUtils.get_run_backup_path, strategy.id, log_entry.start_time
             )
-            backup_path = FileUtils.get_backup_path(strategy.id, '')
+            backup_tag = FileUtils.generate_run_tag(strategy.id, log_entry.start_time)
             
             # Generar script RMAN
             strategy_dict = strategy.model_dump()
-            rman_script = self.oracle_service.generate_rman_script(
+            
+            # Nivel y modo del incremental (nivel 0 automático si falta la base)
+            incremental_plan = None
+            if strategy.backup_type == BackupType.INCREMENTAL:
+                incremental_plan = await asyncio.to_thread(
+                    self.oracle_service.plan_incremental_backup, strategy_dict
+                )
+            
+            rman_script = await asyncio.to_thread(
+                self.oracle_service.generate_rman_script,
                 strategy_dict, 
-                backup_path
+                backup_path,
+                command_id_for_run(log_entry.id),
+                backup_tag,
+                incremental_plan
             )
             
             logger.info(f"Ejecutando backup para estrategia: {strategy.name}")
             
-            # Ejecutar backup RMAN
-            backup_result = self.oracle_service.execute_rman_backup(
-                rman_script, 
-                strategy.id
-            )
+            # Ejecutar backup RMAN (no bloquea el event loop)
+            progress_tracker.start_run(log_entry.id, strategy.id, strategy.name)
+            try:
+                backup_result = await self.oracle_service.execute_rman_backup(
+                    rman_script, 
+                    strategy.id,
+                    run_id=log_entry.id,
+                    backup_dir=backup_path,
+                    tag=backup_tag,
+                    extra_tags=[incremental_plan['image_copy_tag']] if incremental_plan and incremental_plan.get('image_copy_tag') else None,
+                    line_handlers=[lambda line: progress_tracker.handle_line(log_entry.id, line)],
+                    command_id=command_id_for_run(log_entry.id)
+                )
+            except BaseException:
+                progress_tracker.finish_run(log_entry.id, BackupStatus.FAILED.value)
+                raise
 
-            # OBTENER EL CONTENIDO DEL LOG RMAN
+            # El log completo quedó en el almacén por bloques; aquí solo llega la cola
             log_content = backup_result.get('log_content', '')
-            logger.info(f"Contenido del log RMAN obtenido: {len(log_content)} caracteres")
+            log_size_bytes = backup_result.get('log_size_bytes', 0)
+            logger.info(f"Log RMAN: {log_size_bytes} bytes, extracto de {len(log_content)} caracteres")
+            
+            error_message = None
+            if not backup_result['success']:
+                error_message = backup_result.get('error') or "\n".join(backup_result.get('rman_errors', []))
             
             # Actualizar log con resultados
             end_time = datetime.now()
             duration = (end_time - log_entry.start_time).total_seconds()
             
-            # ✅ USAR LOS DATOS CALCULADOS EN execute_rman_backup
+            # Piezas exactas de esta ejecución (V$BACKUP_PIECE o salida de RMAN)
+            backup_pieces = backup_result.get('backup_pieces', [])
             backup_files = backup_result.get('backup_files', [])
             backup_size_bytes = backup_result.get('backup_size_bytes', 0)
             backup_size_mb = backup_size_bytes / (1024 * 1024)  # Convertir a MB
             
-            logger.info(f"📊 Resumen backup: {len(backup_files)} archivos, {backup_size_mb:.2f} MB")
+            logger.info(f"📊 Resumen backup: {len(backup_files)} piezas, {backup_size_mb:.2f} MB")
+            
+            try:
+                await self.piece_repo.create_many(log_entry.id, strategy.id, backup_pieces)
+            except Exception as e:
+                logger.error(f"No se pudieron registrar las piezas del backup: {str(e)}")
             
-            if backup_result['success']:
+            if backup_result.get('cancelled'):
+                status = BackupStatus.CANCELLED
+                message = f"Backup cancelado: {strategy.name}"
+                level = LogLevel.WARNING
+                backup_size_mb = None
+            elif backup_result['success']:
                 # Verificar integridad del backup
-                backup_verified = self.oracle_service.verify_backup(backup_files)
+                backup_verified = await asyncio.to_thread(self.oracle_service.verify_backup, backup_files)
                 
                 if backup_verified:
                     status = BackupStatus.COMPLETED
@@ -98,6 +146,8 @@ class BackupService:
                 level = LogLevel.ERROR
                 backup_size_mb = None
             
+            progress_tracker.finish_run(log_entry.id, status.value)
+            
             # Actualizar registro de log
             await self.log_service.update_log(
                 log_entry.id,
@@ -110,35 +160,63 @@ class BackupService:
                     backup_size_mb=backup_size_mb,  # Ya calculado correctamente
                     rman_output=backup_result.get('output', ''),
                     rman_log_content=log_content,
-                    error_message=backup_result['error'] if not backup_result['success'] else None,
+                    error_message=error_message,
                     details={
                         'backup_files_count': len(backup_files),
                         'backup_files': [os.path.basename(f) for f in backup_files],
+                        'backup_tag': backup_tag,
+                        'backup_path': backup_path,
+                        'pieces_source': backup_pieces[0].source if backup_pieces else None,
                         'strategy_type': strategy.backup_type,
-                        'parallel_degree': strategy.parallel_degree
+                        'parallel_degree': strategy.parallel_degree,
+                        'compression_level': resolve_compression_level(strategy_dict),
+                        'input_bytes': backup_result.get('input_bytes'),  # Lectura real, para el asesor de canales
+                        'incremental': {
+                            'mode': incremental_plan['mode'],
+                            'level': incremental_plan['level'],
+                            'reason': incremental_plan['reason'],
+                            'change_tracking': incremental_plan['change_tracking'],
+                            'last_level0': incremental_plan['last_level0'].isoformat() if incremental_plan['last_level0'] else None,
+                            'image_copy_tag': incremental_plan.get('image_copy_tag'),
+                        } if incremental_plan else None,
+                        'rman_log_size_bytes': log_size_bytes,
+                        'rman_log_truncated': log_size_bytes > len(log_content.encode('utf-8'))
                     }
                 )
             )
             
+            # Huella de las piezas en el pool de procesos (después de escribir details)
+            if settings.CHECKSUM_ENABLED and backup_pieces:
+                checksum_service.fingerprint_run_in_background(log_entry.id, backup_path)
+            
             # Enviar notificación
             await self._send_backup_notification(
                 strategy, 
+                log_entry.id,
                 status, 
                 log_entry.start_time, 
                 end_time, 
                 duration, 
                 backup_size_mb,
-                backup_result.get('error'),
+                error_message,
                 len(backup_files)
             )
             
-            # Limpiar backups antiguos
+            # La retención la aplica retention_engine en su propio job
             if status == BackupStatus.COMPLETED:
-                deleted_count = FileUtils.cleanup_old_backups(
-                    strategy.id, 
-                    strategy.retention_days
-                )
-                logger.info(f"Backups antiguos eliminados: {deleted_count}")
+                # Verificación con RMAN en segundo plano: no alarga la ventana de backup
+                verify_mode = self._verify_mode(strategy)
+                if settings.VERIFY_AFTER_BACKUP and verify_mode != 'none':
+                    try:
+                        await backup_verifier.enqueue(log_entry.id, strategy.id, VerificationMode(verify_mode))
+                    except Exception as e:
+                        logger.warning(f"No se pudo encolar la verificación del log {log_entry.id}: {str(e)}")
+                
+                # Ajuste automático de canales/compresión (opt-in por estrategia)
+                try:
+                    await TuningAdvisor(self.db).auto_tune(strategy)
+                except Exception as e:
+                    logger.warning(f"No se pudo ajustar automáticamente la estrategia {strategy.id}: {str(e)}")
             
             return {
                 'success': backup_result['success'] and status == BackupStatus.COMPLETED,
@@ -153,6 +231,7 @@ class BackupService:
             
         except Exception as e:
             logger.error(f"Error crítico en ejecución de backup: {str(e)}")
+            progress_tracker.finish_run(log_entry.id, BackupStatus.FAILED.value)
             
             # Actualizar log con error
             await self.log_service.update_log(
@@ -170,6 +249,7 @@ class BackupService:
             # Enviar notificación de error
             await self._send_backup_notification(
                 strategy,
+                log_entry.id,
                 BackupStatus.FAILED,
                 log_entry.start_time,
                 datetime.now(),
@@ -187,6 +267,7 @@ class BackupService:
     async def _send_backup_notification(
         self,
         strategy: Strategy,
+        log_id: int,
         status: BackupStatus,
         start_time: datetime,
         end_time: datetime,
@@ -195,31 +276,29 @@ class BackupService:
         error_message: Optional[str],
         backup_files_count: int = 0  
     ):
-        """Envía notificación por email del resultado del backup"""
+        """Encola la notificación del resultado (deduplicada por EmailService; no espera al SMTP)"""
         try:
             duration_str = f"{duration:.2f} segundos"
             
-            subject, text_body, html_body = self.email_service.create_backup_notification_template(
-                strategy_name=strategy.name,
-                status=status.value,
-                start_time=start_time.strftime("%Y-%m-%d %H:%M:%S"),
-                end_time=end_time.strftime("%Y-%m-%d %H:%M:%S"),
-                duration=duration_str,
-                backup_size=backup_size,
-                error_message=error_message,
-                backup_files_count=backup_files_count
-            )
-            
-            await self.email_service.send_notification(
-                subject=subject,
-                text_body=text_body,
-                html_body=html_body
-            )
+            await self.email_service.notify_backup_result({
+                'strategy_name': strategy.name,
+                'status': status.value,
+                'start_time': start_time.strftime("%Y-%m-%d %H:%M:%S"),
+                'end_time': end_time.strftime("%Y-%m-%d %H:%M:%S"),
+                'duration': duration_str,
+                'backup_size': backup_size,
+                'error_message': error_message,
+                'backup_files_count': backup_files_count
+            }, strategy.id, log_id)
             
         except Exception as e:
             logger.warning(f"Error enviando notificación (puede continuar): {str(e)}")
             # No lanzar excepción para que el backup continúe
     
+    def _verify_mode(self, strategy: Strategy) -> str:
+        """Modo de verificación posterior: custom_parameters['verify_mode'] o VERIFY_DEFAULT_MODE"""
+        return str((strategy.custom_parameters or {}).get('verify_mode') or settings.VERIFY_DEFAULT_MODE).lower()
+    
     async def validate_strategy(self, strategy: Strategy) -> Dict[str, Any]:
         """Valida una estrategia de backup antes de ejecutarla"""
         validation_result = {
@@ -229,7 +308,7 @@ class BackupService:
         }
         
         # Verificar modo ARCHIVELOG
-        archivelog_enabled = self.oracle_service.connection.check_archivelog_mode()
+        archivelog_enabled = await database_metadata.is_archivelog_enabled()
         if not archivelog_enabled:
             validation_result['warnings'].append(
                 "El modo ARCHIVELOG no está habilitado. Los backups pueden no ser consistentes."
@@ -237,8 +316,12 @@ class BackupService:
         
         # Verificar tablespaces existentes (para backups parciales)
         if strategy.backup_type == 'partial' and strategy.tablespaces:
-            db_info = self.oracle_service.connection.get_database_info()
+            db_info = await database_metadata.get_database_info()
             existing_tablespaces = [ts['name'] for ts in db_info.get('tablespaces', [])]
+            if any(ts not in existing_tablespaces for ts in strategy.tablespaces):
+                # Puede ser un tablespace creado después de cargar la caché
+                db_info = await database_metadata.get_database_info(force_refresh=True)
+                existing_tablespaces = [ts['name'] for ts in db_info.get('tablespaces', [])]
             
             for ts in strategy.tablespaces:
                 if ts not in existing_tablespaces:
@@ -246,6 +329,32 @@ class BackupService:
                         f"Tablespace no encontrado: {ts}"
                     )
         
+        # Verificar block change tracking y el modo (incrementales)
+        if strategy.backup_type == BackupType.INCREMENTAL:
+            incremental_mode = (strategy.custom_parameters or {}).get('incremental_mode')
+            if incremental_mode and str(incremental_mode).lower() not in INCREMENTAL_MODES:
+                validation_result['errors'].append(
+                    f"Modo incremental no válido: {incremental_mode} (use {', '.join(INCREMENTAL_MODES)})"
+                )
+            
+            change_tracking = await asyncio.to_thread(self.oracle_service.get_block_change_tracking_status)
+            if change_tracking is None:
+                validation_result['warnings'].append(
+                    "No se pudo verificar el block change tracking (V$BLOCK_CHANGE_TRACKING)."
+                )
+            elif change_tracking != 'ENABLED':
+                validation_result['warnings'].append(
+                    "Block change tracking no está habilitado: cada incremental leerá todos los bloques "
+                    "de la base de datos. Habilítelo con ALTER DATABASE ENABLE BLOCK CHANGE TRACKING."
+                )
+        
+        verify_mode = self._verify_mode(strategy)
+        verify_modes = [mode.value for mode in VerificationMode] + ['none']
+        if verify_mode not in verify_modes:
+            validation_result['errors'].append(
+                f"Modo de verificación no válido: {verify_mode} (use {', '.join(verify_modes)})"
+            )
+        
         # Verificar espacio en disco
         backup_path = FileUtils.get_backup_path(strategy.id, '')
         if not FileUtils.ensure_directory(backup_path):
@@ -0,0 +1,163 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+import logging
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.backup_executor import backup_executor
+from app.models.maintenance import MaintenanceRunCreate, MaintenanceStatus, MaintenanceTrigger
+from app.repositories.maintenance_repo import MaintenanceRepository
+from app.repositories.backup_piece_repo import BackupPieceRepository
+from app.services.oracle_service import OracleService, CATALOG_MAINTENANCE_COMMANDS
+from app.services.rman_executor import RmanExecutor
+from app.utils.rman_output_parser import parse_rman_line, parse_catalog_maintenance_output
+
+logger = logging.getLogger(__name__)
+
+MAINTENANCE_COMMAND_PREFIX = "CATALOG_MAINT_"
+OUTPUT_TAIL_BYTES = 16 * 1024
+
+
+class CatalogMaintenanceService:
+    """Mantenimiento del catálogo RMAN fuera de los scripts de backup.
+
+    CROSSCHECK BACKUP y DELETE EXPIRED BACKUP recorren todo el control file,
+    así que se ejecutan una vez por base de datos en su propio job
+    (CATALOG_MAINTENANCE_INTERVAL_HOURS), con un lock que evita dos pasadas
+    simultáneas y en pausa mientras haya backups en curso. Cada pasada queda
+    en backup_maintenance_runs con la duración de cada paso; las piezas que
+    DELETE EXPIRED quitó del control file se marcan eliminadas en
+    backup_pieces.
+    """
+
+    def __init__(self):
+        self.executor = RmanExecutor()
+        self.oracle_service = OracleService()
+        self._lock = asyncio.Lock()
+        self._stats = {
+            'runs': 0,
+            'failed': 0,
+            'pieces_expired': 0,
+            'objects_deleted': 0,
+            'last_run_at': None,
+            'last_duration_seconds': None,
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self._stats, 'running': self._lock.locked()}
+
+    async def run(self, trigger: MaintenanceTrigger = MaintenanceTrigger.MANUAL) -> Dict[str, Any]:
+        """Ejecuta CROSSCHECK y DELETE EXPIRED y registra sus duraciones"""
+        if self._lock.locked():
+            return {'skipped': True, 'reason': 'El mantenimiento del catálogo ya está en ejecución'}
+
+        async with self._lock:
+            # El catálogo se revisa cuando no hay backups escribiendo en el control file
+            while backup_executor.get_status()['running_count'] > 0:
+                await asyncio.sleep(settings.CATALOG_MAINTENANCE_PAUSE_SECONDS)
+
+            async with AsyncSessionLocal() as db:
+                repo = MaintenanceRepository(db)
+                interrupted = await repo.fail_interrupted()
+                if interrupted:
+                    logger.warning(f"⚠️ Mantenimientos del catálogo interrumpidos marcados como fallidos: {interrupted}")
+                maintenance_run = await repo.create(MaintenanceRunCreate(trigger=trigger))
+
+            logger.info(f"🧹 Iniciando mantenimiento del catálogo RMAN ({trigger.value})")
+            started = time.monotonic()
+            values: Dict[str, Any] = {}
+            outputs: List[str] = []
+            errors: List[str] = []
+            for step in CATALOG_MAINTENANCE_COMMANDS:
+                step_started = time.monotonic()
+                try:
+                    output, step_errors = await self._run_step(maintenance_run.id, step)
+                except Exception as e:
+                    output, step_errors = "", [f"Error ejecutando {step}: {str(e)}"]
+                values[f'{step}_seconds'] = round(time.monotonic() - step_started, 2)
+                outputs.append(output)
+                errors.extend(step_errors)
+                if step_errors:
+                    break  # Sin CROSSCHECK confiable no se borra nada
+
+            summary = parse_catalog_maintenance_output("\n".join(outputs))
+            expired_handles = summary['expired_handles']
+            completed = not errors
+            if completed and expired_handles:
+                try:
+                    async with AsyncSessionLocal() as db:
+                        await BackupPieceRepository(db).mark_deleted_by_handles(expired_handles)
+                except Exception as e:
+                    logger.error(f"No se pudieron marcar las piezas expiradas en el catálogo: {str(e)}")
+
+            duration = round(time.monotonic() - started, 2)
+            values.update({
+                'status': MaintenanceStatus.COMPLETED if completed else MaintenanceStatus.FAILED,
+                'finished_at': datetime.now(),
+                'duration_seconds': duration,
+                'objects_crosschecked': summary['objects_crosschecked'],
+                'pieces_expired': len(expired_handles),
+                'objects_deleted': summary['objects_deleted'],
+                'rman_errors': "\n".join(dict.fromkeys(errors)) or None,
+                'output_tail': "\n".join(outputs)[-OUTPUT_TAIL_BYTES:],
+            })
+            async with AsyncSessionLocal() as db:
+                await MaintenanceRepository(db).update(maintenance_run.id, values)
+
+        self._stats['runs'] += 1
+        self._stats['failed'] += 0 if completed else 1
+        self._stats['pieces_expired'] += len(expired_handles)
+        self._stats['objects_deleted'] += summary['objects_deleted']
+        self._stats['last_run_at'] = datetime.now().isoformat()
+        self._stats['last_duration_seconds'] = duration
+
+        if completed:
+            logger.info(
+                f"✅ Mantenimiento del catálogo en {duration}s: {summary['objects_crosschecked']} objetos revisados, "
+                f"{len(expired_handles)} piezas expiradas, {summary['objects_deleted']} registros eliminados"
+            )
+        else:
+            logger.error(f"❌ Mantenimiento del catálogo fallido: {errors[:3]}")
+
+        return {
+            'id': maintenance_run.id,
+            'status': values['status'].value,
+            'duration_seconds': duration,
+            'crosscheck_seconds': values.get('crosscheck_seconds'),
+            'delete_expired_seconds': values.get('delete_expired_seconds'),
+            'objects_crosschecked': summary['objects_crosschecked'],
+            'pieces_expired': len(expired_handles),
+            'objects_deleted': summary['objects_deleted'],
+            'errors': errors,
+        }
+
+    async def scheduled_run(self):
+        """Punto de entrada del job programado"""
+        try:
+            await self.run(MaintenanceTrigger.SCHEDULED)
+        except Exception as e:
+            logger.error(f"Error en el mantenimiento programado del catálogo: {str(e)}", exc_info=True)
+
+    async def _run_step(self, run_id: int, step: str) -> tuple:
+        script = self.oracle_service.generate_catalog_maintenance_script(
+            step, f"{MAINTENANCE_COMMAND_PREFIX}{run_id}"
+        )
+        execution = await self.executor.run_script(
+            run_id, script, timeout=settings.CATALOG_MAINTENANCE_TIMEOUT_SECONDS
+        )
+        output = "\n".join(filter(None, [execution['stdout'], execution['stderr']]))
+        errors = [
+            f"{event['code']}: {event['message']}"
+            for event in map(parse_rman_line, output.splitlines())
+            if event and event['type'] == 'error'
+        ]
+        if execution['timed_out']:
+            errors.append(f"Timeout: {step} superó {settings.CATALOG_MAINTENANCE_TIMEOUT_SECONDS} segundos")
+        elif execution['returncode'] != 0 and not errors:
+            errors.append(f"RMAN terminó con código {execution['returncode']} en {step}")
+        return output, errors
+
+
+# Instancia global del mantenimiento del catálogo RMAN
+catalog_maintenance = CatalogMaintenanceService()
@@ -0,0 +1,238 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+import logging
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.backup_executor import backup_executor
+from app.repositories.backup_piece_repo import BackupPieceRepository
+from app.repositories.log_repo import LogRepository
+from app.services.notification_dispatcher import notification_dispatcher
+from app.utils.checksum import hash_file, compare_checksum
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = "manifest_{log_id}.{algorithm}"
+MAX_DRIFT_IN_EMAIL = 50
+
+
+class ChecksumService:
+    """Huellas de contenido de las piezas de backup y scrub periódico.
+
+    El hashing se hace en un ProcessPoolExecutor (CHECKSUM_WORKERS procesos)
+    para no competir con el event loop ni con el GIL. Al terminar cada
+    ejecución se calcula el checksum de sus piezas, se guarda en
+    backup_pieces y en un manifiesto junto a las piezas
+    (formato de ``sha256sum``). El scrub vuelve a leer las piezas más antiguas
+    sin revisar, limitado a CHECKSUM_SCRUB_MAX_MB_PER_SECOND y en pausa
+    mientras haya backups en curso, y avisa por email de las diferencias.
+    """
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._tasks: set = set()
+        self._scrub_lock = asyncio.Lock()
+        self._stats = {
+            'pieces_hashed': 0,
+            'bytes_hashed': 0,
+            'hash_errors': 0,
+            'scrub_runs': 0,
+            'pieces_scrubbed': 0,
+            'drift_detected': 0,
+            'last_scrub_at': None,
+        }
+
+    def shutdown(self):
+        for task in list(self._tasks):
+            task.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            'algorithm': settings.CHECKSUM_ALGORITHM,
+            'workers': settings.CHECKSUM_WORKERS,
+            'pending_runs': len(self._tasks),
+            'scrub_running': self._scrub_lock.locked(),
+        }
+
+    def fingerprint_run_in_background(self, log_id: int, backup_path: Optional[str] = None) -> asyncio.Task:
+        """Calcula las huellas de una ejecución sin bloquear a quien la llama"""
+        task = asyncio.create_task(self.fingerprint_run(log_id, backup_path))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def fingerprint_run(self, log_id: int, backup_path: Optional[str] = None) -> Dict[str, Any]:
+        """Checksum de las piezas de una ejecución: backup_pieces, manifiesto y details del log"""
+        try:
+            async with AsyncSessionLocal() as db:
+                piece_repo = BackupPieceRepository(db)
+                pieces = [piece for piece in await piece_repo.get_by_log(log_id) if piece.status in (None, 'A')]
+                if not pieces:
+                    return {'pieces': 0}
+
+                results = await self.hash_files([piece.handle for piece in pieces])
+                hashed_at = datetime.now()
+                checksums = {
+                    piece.id: {
+                        'checksum': result['checksum'],
+                        'checksum_algorithm': result['algorithm'],
+                        'checksum_at': hashed_at,
+                    }
+                    for piece, result in zip(pieces, results) if result['checksum']
+                }
+                await piece_repo.update_checksums(checksums)
+
+                manifest_path = None
+                if backup_path and checksums:
+                    manifest_path = await asyncio.to_thread(self._write_manifest, log_id, backup_path, results)
+
+                errors = {result['path']: result['error'] for result in results if result['error']}
+                summary = {
+                    'algorithm': settings.CHECKSUM_ALGORITHM,
+                    'pieces': len(checksums),
+                    'bytes': sum(result['bytes'] or 0 for result in results if result['checksum']),
+                    'errors': errors,
+                    'manifest': manifest_path,
+                    'hashed_at': hashed_at.isoformat(),
+                }
+                await LogRepository(db).merge_details(log_id, {'checksums': summary})
+
+            if errors:
+                logger.warning(f"⚠️ No se pudo calcular el checksum de {len(errors)} piezas del log {log_id}: {errors}")
+            logger.info(f"🔏 Checksums del log {log_id}: {summary['pieces']} piezas ({summary['bytes'] / (1024 * 1024):.2f} MB)")
+            return summary
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error calculando checksums del log {log_id}: {str(e)}", exc_info=True)
+            return {'pieces': 0, 'error': str(e)}
+
+    async def hash_files(self, paths: List[str], max_bytes_per_second: float = 0) -> List[Dict[str, Any]]:
+        """Calcula los checksums en paralelo en el pool de procesos"""
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        results = await asyncio.gather(*[
+            loop.run_in_executor(
+                pool, hash_file, path, settings.CHECKSUM_ALGORITHM, settings.CHECKSUM_CHUNK_SIZE, max_bytes_per_second
+            )
+            for path in paths
+        ])
+        for result in results:
+            if result['error']:
+                self._stats['hash_errors'] += 1
+            else:
+                self._stats['pieces_hashed'] += 1
+                self._stats['bytes_hashed'] += result['bytes'] or 0
+        return list(results)
+
+    async def scrub(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Vuelve a leer piezas con checksum y reporta las que ya no coinciden"""
+        if self._scrub_lock.locked():
+            return {'skipped': True, 'reason': 'Ya hay un scrub en curso'}
+
+        async with self._scrub_lock:
+            async with AsyncSessionLocal() as db:
+                piece_repo = BackupPieceRepository(db)
+                pieces = await piece_repo.get_scrub_candidates(limit or settings.CHECKSUM_SCRUB_BATCH)
+
+            loop = asyncio.get_running_loop()
+            max_bytes_per_second = settings.CHECKSUM_SCRUB_MAX_MB_PER_SECOND * 1024 * 1024
+            results: Dict[int, str] = {}
+            drift = []
+            for piece in pieces:
+                # El scrub cede el disco a los backups en curso
+                while backup_executor.get_status()['running_count'] > 0:
+                    await asyncio.sleep(settings.CHECKSUM_SCRUB_PAUSE_SECONDS)
+
+                result = await loop.run_in_executor(
+                    self._get_pool(), hash_file, piece.handle,
+                    piece.checksum_algorithm or settings.CHECKSUM_ALGORITHM,
+                    settings.CHECKSUM_CHUNK_SIZE, max_bytes_per_second
+                )
+                scrub_status = compare_checksum(piece.bytes, piece.checksum, result)
+                results[piece.id] = scrub_status
+                if scrub_status != 'ok':
+                    drift.append({
+                        'piece_id': piece.id,
+                        'log_id': piece.log_id,
+                        'strategy_id': piece.strategy_id,
+                        'handle': piece.handle,
+                        'scrub_status': scrub_status,
+                        'error': result['error'],
+                    })
+
+            scrubbed_at = datetime.now()
+            async with AsyncSessionLocal() as db:
+                await BackupPieceRepository(db).update_scrub_results(results, scrubbed_at)
+
+        self._stats['scrub_runs'] += 1
+        self._stats['pieces_scrubbed'] += len(results)
+        self._stats['drift_detected'] += len(drift)
+        self._stats['last_scrub_at'] = scrubbed_at.isoformat()
+
+        if drift:
+            logger.error(f"❌ Scrub: {len(drift)} de {len(results)} piezas no coinciden con su checksum")
+            await self._notify_drift(drift, len(results))
+        else:
+            logger.info(f"✅ Scrub: {len(results)} piezas verificadas sin diferencias")
+        return {'pieces_checked': len(results), 'drift': drift, 'scrubbed_at': scrubbed_at.isoformat()}
+
+    async def scheduled_scrub(self):
+        """Punto de entrada del job programado"""
+        try:
+            await self.scrub()
+        except Exception as e:
+            logger.error(f"Error en el scrub programado de piezas: {str(e)}", exc_info=True)
+
+    async def _notify_drift(self, drift: List[Dict[str, Any]], checked: int):
+        lines = [
+            f"- [{item['scrub_status']}] estrategia {item['strategy_id']}, log {item['log_id']}: {item['handle']}"
+            for item in drift[:MAX_DRIFT_IN_EMAIL]
+        ]
+        if len(drift) > MAX_DRIFT_IN_EMAIL:
+            lines.append(f"... y {len(drift) - MAX_DRIFT_IN_EMAIL} piezas más")
+        text_body = (
+            f"El scrub de piezas de backup encontró {len(drift)} diferencias en {checked} piezas revisadas.\n\n"
+            + "\n".join(lines)
+            + "\n\nEstas piezas pueden no servir para restaurar. Ejecute un nuevo backup de las estrategias afectadas."
+            + "\n\n--\nSistema de Gestión de Respaldo Oracle"
+        )
+        try:
+            await notification_dispatcher.enqueue_email(
+                f"❌ Piezas de backup alteradas o faltantes: {len(drift)}", text_body
+            )
+        except Exception as e:
+            logger.warning(f"No se pudo encolar el aviso del scrub: {str(e)}")
+
+    def _write_manifest(self, log_id: int, backup_path: str, results: List[Dict[str, Any]]) -> str:
+        manifest_path = os.path.join(
+            backup_path, MANIFEST_FILENAME.format(log_id=log_id, algorithm=settings.CHECKSUM_ALGORITHM)
+        )
+        temp_path = manifest_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as manifest:
+            for result in results:
+                if result['checksum']:
+                    manifest.write(f"{result['checksum']}  {os.path.basename(result['path'])}\n")
+        os.replace(temp_path, manifest_path)
+        return manifest_path
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: no heredar hilos ni conexiones Oracle del proceso principal
+            self._pool = ProcessPoolExecutor(
+                max_workers=max(1, settings.CHECKSUM_WORKERS),
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._pool
+
+
+# Instancia global del servicio de checksums
+checksum_service = ChecksumService()
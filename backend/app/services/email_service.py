@@ -1,36 +1,100 @@
-from typing import List, Optional
+import hashlib
+import re
+import time
+from typing import List, Optional, Dict, Any
 import logging
-from datetime import datetime  # ✅ AGREGAR ESTA IMPORTACIÓN
+from datetime import datetime, timedelta  # ✅ AGREGAR ESTA IMPORTACIÓN
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.email_utils import EmailUtils
 from app.core.config import settings
+from app.models.notification import NotificationCreate, NotificationKind, NotificationStatus
+from app.repositories.notification_repo import NotificationRepository
+from app.services.notification_dispatcher import notification_dispatcher
 
 logger = logging.getLogger(__name__)
 
+ERROR_CODE_PATTERN = re.compile(r'\b(?:RMAN|ORA)-\d{4,5}\b')
+MAX_SIGNATURE_CODES = 5
+
+
+def failure_signature(error_message: Optional[str]) -> str:
+    """Firma estable de un error: sus códigos RMAN-/ORA- o un hash de la primera línea.
+
+    Fechas, rutas con números y SIDs cambian entre ejecuciones, así que en el
+    texto libre se reemplazan los dígitos antes de calcular el hash.
+    """
+    codes = list(dict.fromkeys(ERROR_CODE_PATTERN.findall(error_message or "")))
+    if codes:
+        return ",".join(codes[:MAX_SIGNATURE_CODES])
+    lines = (error_message or "").strip().splitlines()
+    first_line = re.sub(r'\s+', ' ', re.sub(r'\d+', '#', lines[0] if lines else "")).strip().lower()
+    return "msg:" + hashlib.sha1(first_line.encode('utf-8')).hexdigest()[:16]
+
+
 class EmailService:
-    def __init__(self):
+    """Envío de notificaciones con historial en backup_notifications.
+
+    Las alertas de fallo se deduplican por estrategia y firma de error: dentro
+    de NOTIFICATION_RATE_LIMIT_MINUTES solo sale la primera y las demás quedan
+    registradas como 'suppressed'. El primer backup correcto tras una alerta
+    envía un email de recuperación con el número de alertas suprimidas.
+    """
+
+    def __init__(self, db: Optional[AsyncSession] = None):
         self.email_utils = EmailUtils()
+        # Sin sesión no hay historial: se envía sin registrar ni deduplicar
+        self.notification_repo = NotificationRepository(db) if db is not None else None
     
     async def send_notification(
         self,
         subject: str,
         text_body: str,
         html_body: Optional[str] = None,
-        custom_recipients: Optional[List[str]] = None
+        custom_recipients: Optional[List[str]] = None,
+        strategy_id: Optional[int] = None,
+        log_id: Optional[int] = None,
+        kind: NotificationKind = NotificationKind.EMAIL,
+        signature: Optional[str] = None
     ) -> bool:
-        """Envía una notificación por email"""
+        """Envía una notificación por email (con strategy_id y signature aplica el límite de alertas)"""
         try:
-            recipients = custom_recipients or [settings.NOTIFICATION_EMAIL]
+            recipients = custom_recipients or [email for email in [settings.NOTIFICATION_EMAIL] if email]
             
             if not recipients:
                 logger.warning("No hay destinatarios configurados para notificaciones")
                 return False
             
+            record = NotificationCreate(
+                strategy_id=strategy_id,
+                log_id=log_id,
+                kind=kind,
+                recipient=", ".join(recipients),
+                subject=subject,
+                status=NotificationStatus.QUEUED,
+                signature=signature
+            )
+            if strategy_id is not None and signature:
+                suppressed, _ = await self._is_rate_limited(strategy_id, signature)
+                await self._record(record.model_copy(update={
+                    'status': NotificationStatus.SUPPRESSED if suppressed else NotificationStatus.QUEUED
+                }))
+                if suppressed:
+                    logger.info(f"🔕 Alerta repetida suprimida para la estrategia {strategy_id}: {signature}")
+                    return False
+            
+            started = time.monotonic()
             success = await self.email_utils.send_email(
                 subject=subject,
                 body=text_body,
                 to_emails=recipients,
                 html_body=html_body
             )
+            await self._record(record.model_copy(update={
+                'status': NotificationStatus.SENT if success else NotificationStatus.FAILED,
+                'attempt': 1,
+                'latency_ms': int((time.monotonic() - started) * 1000),
+                'error_message': None if success else "El servidor SMTP rechazó el envío"
+            }))
             
             if success:
                 logger.info(f"✅ Email enviado exitosamente a {recipients}")
@@ -43,6 +107,101 @@ class EmailService:
             logger.error(f"Error en servicio de email: {str(e)}")
             return False
     
+    async def notify_backup_result(
+        self,
+        result: Dict[str, Any],
+        strategy_id: int,
+        log_id: Optional[int] = None,
+        custom_recipients: Optional[List[str]] = None
+    ) -> Optional[str]:
+        """Encola el resultado de un backup aplicando deduplicación y recuperación.
+
+        Devuelve el id del mensaje en el despachador o None si se suprimió o no
+        se pudo encolar.
+        """
+        result = dict(result)
+        signature = None
+        if result['status'].lower() == "completed":
+            last_alert = await self._history('get_last_queued', strategy_id, [NotificationKind.FAILURE, NotificationKind.RECOVERY])
+            if last_alert is not None and last_alert.kind == NotificationKind.FAILURE:
+                kind = NotificationKind.RECOVERY
+                last_recovery = await self._history('get_last_queued', strategy_id, [NotificationKind.RECOVERY])
+                result['recovered'] = True
+                result['suppressed_count'] = await self._history(
+                    'count_suppressed_since', strategy_id, last_recovery.created_at if last_recovery else None
+                ) or 0
+            else:
+                kind = NotificationKind.SUCCESS
+        else:
+            kind = NotificationKind.FAILURE
+            signature = failure_signature(result.get('error_message'))
+            suppressed, last_same = await self._is_rate_limited(strategy_id, signature)
+            if suppressed:
+                await self._record(NotificationCreate(
+                    strategy_id=strategy_id,
+                    log_id=log_id,
+                    kind=kind,
+                    status=NotificationStatus.SUPPRESSED,
+                    signature=signature,
+                    subject=self.email_utils.create_backup_notification_template(**result)[0]
+                ))
+                logger.info(f"🔕 Alerta repetida suprimida para la estrategia {strategy_id}: {signature}")
+                return None
+            if last_same is not None:
+                result['suppressed_count'] = await self._history(
+                    'count_suppressed_since', strategy_id, last_same.created_at, signature
+                ) or 0
+        
+        recipients = custom_recipients or [email for email in [settings.NOTIFICATION_EMAIL] if email]
+        message_id = await notification_dispatcher.enqueue_backup_result(
+            result,
+            recipients,
+            meta={'strategy_id': strategy_id, 'log_id': log_id, 'kind': kind.value, 'signature': signature}
+        )
+        await self._record(NotificationCreate(
+            strategy_id=strategy_id,
+            log_id=log_id,
+            kind=kind,
+            recipient=", ".join(recipients) or None,
+            subject=self.email_utils.create_backup_notification_template(**result)[0],
+            status=NotificationStatus.QUEUED if message_id else NotificationStatus.FAILED,
+            signature=signature,
+            message_id=message_id,
+            error_message=None if message_id else "No se pudo encolar (sin destinatarios o SMTP sin configurar)"
+        ))
+        return message_id
+    
+    async def _is_rate_limited(self, strategy_id: int, signature: str) -> tuple:
+        """(suprimir, última alerta con la misma firma) según NOTIFICATION_RATE_LIMIT_MINUTES"""
+        last_same = await self._history('get_last_queued', strategy_id, [NotificationKind.FAILURE], signature)
+        if last_same is None or last_same.created_at is None:
+            return False, last_same
+        last_recovery = await self._history('get_last_queued', strategy_id, [NotificationKind.RECOVERY])
+        if last_recovery is not None and last_recovery.created_at and last_recovery.created_at > last_same.created_at:
+            # El error vuelve tras una recuperación: es una alerta nueva
+            return False, None
+        window_start = datetime.now() - timedelta(minutes=settings.NOTIFICATION_RATE_LIMIT_MINUTES)
+        return last_same.created_at >= window_start, last_same
+    
+    async def _history(self, method: str, *args):
+        """Consulta el historial; si no está disponible no se suprime nada"""
+        if self.notification_repo is None:
+            return None
+        try:
+            return await getattr(self.notification_repo, method)(*args)
+        except Exception as e:
+            logger.warning(f"No se pudo consultar el historial de notificaciones: {str(e)}")
+            return None
+    
+    async def _record(self, notification: NotificationCreate):
+        """Guarda una fila en backup_notifications sin interrumpir el envío si falla"""
+        if self.notification_repo is None:
+            return
+        try:
+            await self.notification_repo.create(notification)
+        except Exception as e:
+            logger.warning(f"No se pudo registrar la notificación en el historial: {str(e)}")
+    
     def create_backup_notification_template(
         self,
         strategy_name: str,
@@ -52,7 +211,9 @@ class EmailService:
         duration: str,
         backup_size: Optional[float] = None,
         error_message: Optional[str] = None,
-        backup_files_count: int = 0
+        backup_files_count: int = 0,
+        recovered: bool = False,
+        suppressed_count: int = 0
     ) -> tuple[str, str, str]:
         """Crea el template para notificación de backup"""
         return self.email_utils.create_backup_notification_template(
@@ -63,7 +224,9 @@ class EmailService:
             duration=duration,
             backup_size=backup_size,
             error_message=error_message,
-            backup_files_count=backup_files_count
+            backup_files_count=backup_files_count,
+            recovered=recovered,
+            suppressed_count=suppressed_count
         )
     
     async def send_test_email(self, test_email: str) -> bool:
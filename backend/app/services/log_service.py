@@ -1,13 +1,24 @@
+import asyncio
+import csv
+import io
 import os
-from typing import List, Optional, Dict, Any
+import zlib
+from typing import List, Optional, Dict, Any, Tuple, AsyncIterator
 from datetime import datetime, timedelta
 import logging
-from app.models.log import Log, LogCreate, LogUpdate, LogLevel, BackupStatus
+from app.core.config import settings
+from app.models.log import Log, LogCreate, LogUpdate, LogLevel, BackupStatus, LogSummary, LogRmanOutput
 from app.repositories.log_repo import LogRepository
+from app.utils.rman_log_store import rman_log_store
 from sqlalchemy.ext.asyncio import AsyncSession
 
 logger = logging.getLogger(__name__)
 
+CSV_EXPORT_HEADER = [
+    "ID", "Strategy ID", "Level", "Status", "Message", "Start Time",
+    "End Time", "Duration (s)", "Size (MB)", "Error"
+]
+
 class LogService:
     def __init__(self, db: AsyncSession):
         self.log_repo = LogRepository(db)
@@ -24,7 +35,7 @@ class LogService:
         strategy_id: int, 
         limit: int = 100,
         offset: int = 0
-    ) -> List[Log]:
+    ) -> List[LogSummary]:
         """Obtiene los logs de una estrategia específica"""
         try:
             return await self.log_repo.get_by_strategy(strategy_id, limit, offset)
@@ -38,7 +49,7 @@ class LogService:
         end_date: datetime,
         level: Optional[LogLevel] = None,
         status: Optional[BackupStatus] = None
-    ) -> List[Log]:
+    ) -> List[LogSummary]:
         """Obtiene logs por rango de fecha"""
         try:
             return await self.log_repo.get_by_date_range(start_date, end_date, level, status)
@@ -46,6 +57,33 @@ class LogService:
             logger.error(f"Error obteniendo logs por rango de fecha: {str(e)}")
             return []
     
+    async def search_logs(
+        self,
+        strategy_id: Optional[int] = None,
+        level: Optional[LogLevel] = None,
+        status: Optional[BackupStatus] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        offset: int = 0
+    ) -> Tuple[List[LogSummary], Optional[str]]:
+        """Obtiene una página de logs filtrada y el cursor de la página siguiente"""
+        return await self.log_repo.search(
+            strategy_id=strategy_id,
+            level=level,
+            status=status,
+            start_date=start_date,
+            end_date=end_date,
+            limit=limit,
+            cursor=cursor,
+            offset=offset
+        )
+    
+    async def get_rman_output(self, log_id: int) -> Optional[LogRmanOutput]:
+        """Obtiene la salida RMAN, errores y detalles de un log"""
+        return await self.log_repo.get_rman_output(log_id)
+    
     async def update_log(self, log_id: int, update_data: LogUpdate) -> Optional[Log]:
         """Actualiza un registro de log"""
         try:
@@ -68,91 +106,157 @@ class LogService:
             logger.error(f"Error eliminando log {log_id}: {str(e)}")
             return False
     
+    async def purge_old_logs(self, older_than_days: int) -> Dict[str, Any]:
+        """Purga los logs anteriores a la retención indicada junto con sus logs RMAN"""
+        cutoff = datetime.now() - timedelta(days=older_than_days)
+        
+        async def delete_rman_logs(log_ids: List[int]):
+            for log_id in log_ids:
+                await asyncio.to_thread(rman_log_store.delete, log_id)
+        
+        result = await self.log_repo.purge_before(cutoff, on_batch=delete_rman_logs)
+        
+        logger.info(
+            f"🗑️ Logs purgados antes de {cutoff.date()}: {result['purged_logs']} "
+            f"({len(result['dropped_partitions'])} particiones eliminadas)"
+        )
+        return {
+            'cutoff': cutoff.isoformat(),
+            'purged_logs': result['purged_logs'],
+            'dropped_partitions': result['dropped_partitions'],
+            'deleted_rows': result['deleted_rows']
+        }
+    
+    async def get_rman_log_size(self, log_id: int) -> Optional[int]:
+        """Tamaño del log RMAN almacenado, o None si no existe"""
+        if not await asyncio.to_thread(rman_log_store.exists, log_id):
+            return None
+        return await asyncio.to_thread(rman_log_store.get_size, log_id)
+    
+    async def get_rman_log_range(self, log_id: int, offset: int, length: int) -> bytes:
+        """Lee un rango de bytes del log RMAN almacenado por bloques"""
+        return await asyncio.to_thread(rman_log_store.read_range, log_id, offset, length)
+    
+    async def get_rman_log_tail(self, log_id: int, nbytes: int) -> bytes:
+        """Lee los últimos bytes del log RMAN almacenado por bloques"""
+        return await asyncio.to_thread(rman_log_store.read_tail, log_id, nbytes)
+    
     async def get_backup_statistics(
         self, 
-        days: int = 30
+        days: int = 30,
+        strategy_id: Optional[int] = None,
+        by_strategy: bool = False,
+        by_day: bool = False
     ) -> Dict[str, Any]:
-        """Obtiene estadísticas de backups"""
+        """Obtiene estadísticas de backups (agregadas en la base de datos)"""
         try:
             end_date = datetime.now()
             start_date = end_date - timedelta(days=days)
             
-            logs = await self.log_repo.get_by_date_range(start_date, end_date)
-            
-            total_backups = len(logs)
-            completed = len([log for log in logs if log.status == BackupStatus.COMPLETED])
-            failed = len([log for log in logs if log.status == BackupStatus.FAILED])
-            running = len([log for log in logs if log.status == BackupStatus.RUNNING])
-            
-            success_rate = (completed / total_backups * 100) if total_backups > 0 else 0
-            
-            total_size = sum([log.backup_size_mb or 0 for log in logs if log.backup_size_mb])
-            avg_duration = sum([log.duration_seconds or 0 for log in logs if log.duration_seconds]) / total_backups if total_backups > 0 else 0
-            
-            return {
-                'period': f"Últimos {days} días",
-                'total_backups': total_backups,
-                'completed': completed,
-                'failed': failed,
-                'running': running,
-                'success_rate': round(success_rate, 2),
-                'total_size_mb': round(total_size, 2),
-                'average_duration_seconds': round(avg_duration, 2),
-                'most_common_errors': self._get_common_errors(logs)
-            }
+            statistics = await self.get_range_statistics(
+                start_date, end_date, strategy_id, by_strategy, by_day
+            )
+            return {'period': f"Últimos {days} días", **statistics}
             
         except Exception as e:
             logger.error(f"Error generando estadísticas: {str(e)}")
             return {}
     
-    def _get_common_errors(self, logs: List[Log]) -> List[Dict[str, Any]]:
-        """Obtiene los errores más comunes de los logs"""
-        error_messages = {}
+    async def get_range_statistics(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        strategy_id: Optional[int] = None,
+        by_strategy: bool = False,
+        by_day: bool = False
+    ) -> Dict[str, Any]:
+        """Estadísticas de backups para un rango de fechas"""
+        totals = await self.log_repo.get_status_totals(start_date, end_date, strategy_id)
+        by_status = {row['status']: row for row in totals}
+        
+        total_backups = sum(row['count'] for row in totals)
+        completed = by_status.get(BackupStatus.COMPLETED.value, {}).get('count', 0)
+        failed = by_status.get(BackupStatus.FAILED.value, {}).get('count', 0)
+        running = by_status.get(BackupStatus.RUNNING.value, {}).get('count', 0)
+        
+        success_rate = (completed / total_backups * 100) if total_backups > 0 else 0
         
-        for log in logs:
-            if log.error_message and log.status == BackupStatus.FAILED:
-                error_key = log.error_message.split('\n')[0]  # Tomar primera línea
-                error_messages[error_key] = error_messages.get(error_key, 0) + 1
+        total_size = sum(row['total_size_mb'] for row in totals)
+        total_duration = sum(row['total_duration_seconds'] for row in totals)
+        avg_duration = total_duration / total_backups if total_backups > 0 else 0
         
-        # Ordenar por frecuencia
-        sorted_errors = sorted(
-            error_messages.items(), 
-            key=lambda x: x[1], 
-            reverse=True
-        )[:10]  # Top 10 errores
+        statistics = {
+            'total_backups': total_backups,
+            'completed': completed,
+            'failed': failed,
+            'running': running,
+            'success_rate': round(success_rate, 2),
+            'total_size_mb': round(total_size, 2),
+            'average_duration_seconds': round(avg_duration, 2),
+            'most_common_errors': await self.log_repo.get_top_errors(start_date, end_date, strategy_id)
+        }
         
-        return [{'error': error, 'count': count} for error, count in sorted_errors]
+        if strategy_id is not None:
+            statistics['strategy_id'] = strategy_id
+        if by_strategy:
+            statistics['by_strategy'] = await self.log_repo.get_strategy_breakdown(start_date, end_date, strategy_id)
+        if by_day:
+            statistics['by_day'] = await self.log_repo.get_daily_breakdown(start_date, end_date, strategy_id)
+        
+        return statistics
     
-    async def export_logs_to_csv(
-        self, 
-        start_date: datetime, 
-        end_date: datetime
-    ) -> str:
-        """Exporta logs a formato CSV"""
+    async def stream_logs_csv(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        strategy_id: Optional[int] = None,
+        level: Optional[LogLevel] = None,
+        status: Optional[BackupStatus] = None,
+        compress: bool = False
+    ) -> AsyncIterator[bytes]:
+        """Genera el CSV de logs por lotes, opcionalmente comprimido con gzip"""
+        # wbits=31: formato gzip (cabecera y CRC) en lugar de zlib
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        
+        def take_chunk() -> bytes:
+            data = buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate(0)
+            return compressor.compress(data) if compressor else data
+        
+        writer.writerow(CSV_EXPORT_HEADER)
+        yield take_chunk()
+        
+        exported = 0
         try:
-            logs = await self.get_logs_by_date_range(start_date, end_date)
-            
-            csv_lines = [
-                "ID,Strategy ID,Level,Status,Message,Start Time,End Time,Duration (s),Size (MB),Error"
-            ]
-            
-            for log in logs:
-                csv_line = [
-                    str(log.id),
-                    str(log.strategy_id),
-                    log.level.value,
-                    log.status.value,
-                    f'"{log.message.replace('"', '""')}"',  # Escapar comillas
-                    log.start_time.isoformat(),
-                    log.end_time.isoformat() if log.end_time else "",
-                    str(log.duration_seconds or ""),
-                    str(log.backup_size_mb or ""),
-                    f'"{log.error_message.replace('"', '""') if log.error_message else ""}"'
-                ]
-                csv_lines.append(",".join(csv_line))
-            
-            return "\n".join(csv_lines)
-            
+            async for rows in self.log_repo.stream_export_rows(
+                start_date, end_date, strategy_id, level, status,
+                batch_size=settings.LOG_EXPORT_BATCH_SIZE
+            ):
+                for row in rows:
+                    writer.writerow([
+                        row['id'],
+                        row['strategy_id'],
+                        row['level'].value,
+                        row['status'].value,
+                        row['message'],
+                        row['start_time'].isoformat(),
+                        row['end_time'].isoformat() if row['end_time'] else "",
+                        row['duration_seconds'] if row['duration_seconds'] is not None else "",
+                        row['backup_size_mb'] if row['backup_size_mb'] is not None else "",
+                        row['error_message'] or ""
+                    ])
+                exported += len(rows)
+                chunk = take_chunk()
+                if chunk:
+                    yield chunk
         except Exception as e:
-            logger.error(f"Error exportando logs a CSV: {str(e)}")
-            return ""
\ No newline at end of file
+            # Los encabezados HTTP ya se enviaron: solo queda registrar el corte
+            logger.error(f"Error exportando logs a CSV tras {exported} filas: {str(e)}")
+            raise
+        
+        if compressor:
+            yield compressor.flush()
+        logger.info(f"📤 Exportación CSV completada: {exported} logs")
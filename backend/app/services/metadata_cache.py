@@ -0,0 +1,98 @@
+import asyncio
+import time
+from typing import Dict, Any, Optional, Callable, Awaitable, Tuple
+import logging
+from app.core.config import settings
+from app.utils.oracle_connection import OracleConnection
+
+logger = logging.getLogger(__name__)
+
+DATABASE_INFO_KEY = "database_info"
+
+
+class DatabaseMetadataCache:
+    """Caché con TTL de los metadatos del diccionario (BD, tablespaces, esquemas).
+
+    - Las llamadas concurrentes sobre una clave sin valor comparten una sola
+      consulta (single-flight).
+    - Pasado METADATA_REFRESH_AHEAD del TTL se sirve el valor en caché y se
+      refresca en segundo plano, así los lectores no esperan al diccionario.
+    - Los resultados vacíos (error de conexión) no se guardan.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[Any, float]] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._generations: Dict[str, int] = {}
+        self._stats = {'hits': 0, 'misses': 0, 'loads': 0, 'background_refreshes': 0}
+
+    async def get_database_info(self, force_refresh: bool = False) -> Dict[str, Any]:
+        return await self._get(DATABASE_INFO_KEY, OracleConnection.get_database_info_async, force_refresh)
+
+    async def is_archivelog_enabled(self, force_refresh: bool = False) -> bool:
+        info = await self.get_database_info(force_refresh)
+        return info.get('log_mode') == 'ARCHIVELOG'
+
+    def invalidate(self, key: Optional[str] = None):
+        """Descarta una clave (o toda la caché); la próxima lectura consulta Oracle"""
+        keys = [key] if key else list(set(self._entries) | set(self._inflight))
+        for name in keys:
+            self._entries.pop(name, None)
+            # Una carga en curso ya no puede guardar su resultado
+            self._inflight.pop(name, None)
+            self._generations[name] = self._generations.get(name, 0) + 1
+        logger.info(f"🧹 Caché de metadatos invalidada: {key or 'todas las claves'}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            **self._stats,
+            'ttl_seconds': settings.METADATA_CACHE_TTL_SECONDS,
+            'entries': {
+                key: round(now - loaded_at, 1) for key, (_, loaded_at) in self._entries.items()
+            },
+        }
+
+    async def _get(self, key: str, loader: Callable[[], Awaitable[Any]], force_refresh: bool) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None and not force_refresh:
+            value, loaded_at = entry
+            age = time.monotonic() - loaded_at
+            if age < settings.METADATA_CACHE_TTL_SECONDS:
+                self._stats['hits'] += 1
+                if age >= settings.METADATA_CACHE_TTL_SECONDS * settings.METADATA_REFRESH_AHEAD and key not in self._inflight:
+                    self._stats['background_refreshes'] += 1
+                    self._refresh(key, loader).add_done_callback(self._consume_error)
+                return value
+
+        self._stats['misses'] += 1
+        # shield: si un llamador se cancela, la carga compartida continúa
+        return await asyncio.shield(self._refresh(key, loader))
+
+    def _refresh(self, key: str, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None or task.done():
+            task = asyncio.create_task(self._load(key, loader))
+            self._inflight[key] = task
+        return task
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        generation = self._generations.get(key, 0)
+        try:
+            self._stats['loads'] += 1
+            value = await loader()
+            if value and self._generations.get(key, 0) == generation:
+                self._entries[key] = (value, time.monotonic())
+            return value
+        finally:
+            if self._inflight.get(key) is asyncio.current_task():
+                del self._inflight[key]
+
+    @staticmethod
+    def _consume_error(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Error refrescando metadatos en segundo plano: {task.exception()}")
+
+
+# Instancia global de la caché de metadatos
+database_metadata = DatabaseMetadataCache()
@@ -0,0 +1,363 @@
+import asyncio
+import glob
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+import logging
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.email_utils import EmailUtils
+from app.models.notification import NotificationCreate, NotificationKind, NotificationStatus
+from app.repositories.notification_repo import NotificationRepository
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationDispatcher:
+    """Cola de notificaciones por email en segundo plano.
+
+    - Cada mensaje se escribe en NOTIFICATION_SPOOL_PATH antes de encolarse y
+      se borra al enviarse; al iniciar se recuperan los pendientes.
+    - Una sola conexión SMTP autenticada se reutiliza entre mensajes y se
+      cierra tras NOTIFICATION_SMTP_IDLE_SECONDS sin actividad.
+    - Los fallos se reintentan con backoff exponencial; tras
+      NOTIFICATION_MAX_ATTEMPTS el mensaje pasa a ``failed/``.
+    - Con NOTIFICATION_DIGEST_SECONDS > 0 los resultados de backup que llegan
+      dentro de esa ventana se envían juntos en un solo email de resumen.
+    - Cada intento de envío (correcto, fallido o descartado) queda en
+      backup_notifications con su latencia; ``meta`` indica estrategia,
+      ejecución, tipo y firma del error.
+    """
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._retries: List[Dict[str, Any]] = []
+        self._digest: List[Dict[str, Any]] = []
+        self._digest_deadline: Optional[float] = None
+        self._smtp = None
+        self._last_send = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {'sent': 0, 'failed_attempts': 0, 'dead': 0, 'digests': 0}
+
+    @property
+    def spool_path(self) -> str:
+        return settings.NOTIFICATION_SPOOL_PATH
+
+    async def start(self):
+        if self._task is not None and not self._task.done():
+            return
+        recovered = await asyncio.to_thread(self._load_spool)
+        for record in recovered:
+            self._accept(record)
+        if recovered:
+            logger.info(f"📬 Notificaciones pendientes recuperadas: {len(recovered)}")
+        self._task = asyncio.create_task(self._run())
+        logger.info("✅ Despachador de notificaciones iniciado")
+
+    async def stop(self):
+        """Detiene el envío; lo no enviado queda en el spool para el próximo inicio"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._close_smtp()
+
+    async def enqueue_email(
+        self,
+        subject: str,
+        text_body: str,
+        html_body: Optional[str] = None,
+        recipients: Optional[List[str]] = None,
+        meta: Optional[Dict[str, Any]] = None
+    ) -> Optional[str]:
+        """Encola un email; devuelve el id del mensaje o None si no se pudo encolar"""
+        return await self._enqueue({
+            'kind': 'email',
+            'subject': subject,
+            'text_body': text_body,
+            'html_body': html_body,
+            'recipients': recipients,
+            'meta': meta or {'kind': NotificationKind.EMAIL.value},
+        })
+
+    async def enqueue_backup_result(
+        self,
+        result: Dict[str, Any],
+        recipients: Optional[List[str]] = None,
+        meta: Optional[Dict[str, Any]] = None
+    ) -> Optional[str]:
+        """Encola el resultado de un backup (campos de create_backup_notification_template)"""
+        return await self._enqueue({
+            'kind': 'backup_result',
+            'result': result,
+            'recipients': recipients,
+            'meta': meta or {'kind': NotificationKind.EMAIL.value},
+        })
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            'running': self._task is not None and not self._task.done(),
+            'queued': self._queue.qsize(),
+            'retrying': len(self._retries),
+            'digest_buffered': len(self._digest),
+            'smtp_connected': self._smtp is not None,
+        }
+
+    async def _enqueue(self, record: Dict[str, Any]) -> Optional[str]:
+        record['recipients'] = record.get('recipients') or [
+            email for email in [settings.NOTIFICATION_EMAIL] if email
+        ]
+        if not record['recipients']:
+            logger.warning("No hay destinatarios configurados para notificaciones")
+            return None
+        if not EmailUtils.is_configured():
+            logger.error("❌ Configuración SMTP incompleta, notificación descartada")
+            return None
+
+        record.update({
+            'id': uuid.uuid4().hex,
+            'created_at': datetime.now().isoformat(),
+            'attempts': 0,
+            'next_attempt': 0.0,
+        })
+        await asyncio.to_thread(self._write_spool, record)
+        self._queue.put_nowait(record)
+        return record['id']
+
+    def _accept(self, record: Dict[str, Any]):
+        """Clasifica un mensaje recibido o recuperado del spool"""
+        if record['kind'] == 'backup_result' and settings.NOTIFICATION_DIGEST_SECONDS > 0:
+            self._digest.append(record)
+            if self._digest_deadline is None:
+                self._digest_deadline = time.monotonic() + settings.NOTIFICATION_DIGEST_SECONDS
+        else:
+            self._retries.append(record)
+
+    async def _run(self):
+        while True:
+            try:
+                record = await asyncio.wait_for(self._queue.get(), timeout=self._next_wakeup())
+                self._accept(record)
+            except asyncio.TimeoutError:
+                pass
+
+            try:
+                if self._digest_deadline is not None and time.monotonic() >= self._digest_deadline:
+                    await self._flush_digest()
+                await self._send_due()
+                if self._smtp is not None and time.monotonic() - self._last_send >= settings.NOTIFICATION_SMTP_IDLE_SECONDS:
+                    await self._close_smtp()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error en el despachador de notificaciones: {str(e)}", exc_info=True)
+
+    def _next_wakeup(self) -> float:
+        now = time.monotonic()
+        deadlines = [record['next_attempt'] for record in self._retries]
+        if self._digest_deadline is not None:
+            deadlines.append(self._digest_deadline)
+        if self._smtp is not None:
+            deadlines.append(self._last_send + settings.NOTIFICATION_SMTP_IDLE_SECONDS)
+        if not deadlines:
+            return 3600.0
+        return max(0.0, min(deadlines) - now)
+
+    async def _flush_digest(self):
+        results, self._digest = self._digest, []
+        self._digest_deadline = None
+        if not results:
+            return
+
+        if len(results) == 1:
+            # Un único resultado: email individual de siempre
+            record = results[0]
+            self._render_backup_result(record)
+            await asyncio.to_thread(self._write_spool, record)
+            self._retries.append(record)
+            return
+
+        subject, text_body, html_body = EmailUtils.create_backup_digest_template(
+            [record['result'] for record in results]
+        )
+        recipients = list(dict.fromkeys(email for record in results for email in record['recipients']))
+        digest = {
+            'id': uuid.uuid4().hex,
+            'kind': 'email',
+            'subject': subject,
+            'text_body': text_body,
+            'html_body': html_body,
+            'recipients': recipients,
+            'meta': {
+                'kind': NotificationKind.DIGEST.value,
+                # Una fila de backup_notifications por ejecución incluida en el resumen
+                'results': [
+                    {key: (record.get('meta') or {}).get(key) for key in ('strategy_id', 'log_id', 'signature')}
+                    for record in results
+                ],
+            },
+            'created_at': datetime.now().isoformat(),
+            'attempts': 0,
+            'next_attempt': 0.0,
+        }
+        await asyncio.to_thread(self._write_spool, digest)
+        await asyncio.to_thread(self._remove_spool, [record['id'] for record in results])
+        self._retries.append(digest)
+        self._stats['digests'] += 1
+        logger.info(f"📨 Resumen de {len(results)} resultados de backup encolado")
+
+    def _render_backup_result(self, record: Dict[str, Any]):
+        subject, text_body, html_body = EmailUtils.create_backup_notification_template(**record['result'])
+        record.update({'kind': 'email', 'subject': subject, 'text_body': text_body, 'html_body': html_body})
+        record.pop('result', None)
+
+    async def _send_due(self):
+        now = time.monotonic()
+        due = [record for record in self._retries if record['next_attempt'] <= now]
+        for record in due:
+            if record['kind'] == 'backup_result':
+                self._render_backup_result(record)
+            started = time.monotonic()
+            try:
+                await self._send(record)
+            except Exception as e:
+                self._stats['failed_attempts'] += 1
+                await self._close_smtp()
+                await self._schedule_retry(record, e, started)
+                continue
+
+            self._retries.remove(record)
+            self._stats['sent'] += 1
+            await self._record_attempt(record, NotificationStatus.SENT, record['attempts'] + 1, started)
+            await asyncio.to_thread(self._remove_spool, [record['id']])
+            logger.info(f"✅ Notificación enviada a {record['recipients']}: {record['subject']}")
+
+    async def _send(self, record: Dict[str, Any]):
+        if self._smtp is None:
+            self._smtp = await EmailUtils.open_smtp()
+        message = EmailUtils.build_message(
+            record['subject'], record['text_body'], record['recipients'], record.get('html_body')
+        )
+        await self._smtp.send_message(message)
+        self._last_send = time.monotonic()
+
+    async def _schedule_retry(self, record: Dict[str, Any], error: Exception, started: float):
+        record['attempts'] += 1
+        if record['attempts'] >= settings.NOTIFICATION_MAX_ATTEMPTS:
+            self._retries.remove(record)
+            self._stats['dead'] += 1
+            await self._record_attempt(record, NotificationStatus.DEAD, record['attempts'], started, str(error))
+            await asyncio.to_thread(self._move_to_failed, record, str(error))
+            logger.error(
+                f"❌ Notificación descartada tras {record['attempts']} intentos "
+                f"(guardada en failed/): {record['subject']} - {str(error)}"
+            )
+            return
+
+        delay = min(
+            settings.NOTIFICATION_RETRY_BASE_SECONDS * 2 ** (record['attempts'] - 1),
+            settings.NOTIFICATION_RETRY_MAX_SECONDS
+        )
+        record['next_attempt'] = time.monotonic() + delay
+        await self._record_attempt(record, NotificationStatus.FAILED, record['attempts'], started, str(error))
+        await asyncio.to_thread(self._write_spool, record)
+        logger.warning(
+            f"⚠️ Error enviando notificación (intento {record['attempts']}), "
+            f"reintento en {delay:.0f}s: {str(error)}"
+        )
+
+    async def _record_attempt(
+        self,
+        record: Dict[str, Any],
+        status: NotificationStatus,
+        attempt: int,
+        started: float,
+        error: Optional[str] = None
+    ):
+        """Registra el intento en backup_notifications; un fallo aquí no afecta al envío.
+
+        Los resúmenes registran una fila por ejecución incluida, con el mismo message_id.
+        """
+        meta = record.get('meta') or {}
+        latency_ms = int((time.monotonic() - started) * 1000)
+        try:
+            async with AsyncSessionLocal() as db:
+                repo = NotificationRepository(db)
+                for result in meta.get('results') or [meta]:
+                    await repo.create(NotificationCreate(
+                        strategy_id=result.get('strategy_id'),
+                        log_id=result.get('log_id'),
+                        kind=meta.get('kind') or NotificationKind.EMAIL,
+                        recipient=", ".join(record['recipients']),
+                        subject=record.get('subject'),
+                        status=status,
+                        attempt=attempt,
+                        latency_ms=latency_ms,
+                        signature=result.get('signature'),
+                        message_id=record['id'],
+                        error_message=error
+                    ))
+        except Exception as e:
+            logger.warning(f"No se pudo registrar el intento de notificación: {str(e)}")
+
+    async def _close_smtp(self):
+        smtp, self._smtp = self._smtp, None
+        if smtp is not None:
+            try:
+                await smtp.quit()
+            except Exception:
+                pass
+
+    # --- Spool en disco (se ejecuta en hilos) ---
+
+    def _spool_file(self, message_id: str) -> str:
+        return os.path.join(self.spool_path, f"{message_id}.json")
+
+    def _write_spool(self, record: Dict[str, Any]):
+        os.makedirs(self.spool_path, exist_ok=True)
+        # next_attempt es relativo al reloj monotónico del proceso: no se persiste
+        data = {key: value for key, value in record.items() if key != 'next_attempt'}
+        temp_path = self._spool_file(record['id']) + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as spool_file:
+            json.dump(data, spool_file, ensure_ascii=False, default=str)
+        os.replace(temp_path, self._spool_file(record['id']))
+
+    def _remove_spool(self, message_ids: List[str]):
+        for message_id in message_ids:
+            try:
+                os.remove(self._spool_file(message_id))
+            except FileNotFoundError:
+                pass
+
+    def _move_to_failed(self, record: Dict[str, Any], error: str):
+        failed_path = os.path.join(self.spool_path, "failed")
+        os.makedirs(failed_path, exist_ok=True)
+        record = {**record, 'last_error': error}
+        record.pop('next_attempt', None)
+        with open(os.path.join(failed_path, f"{record['id']}.json"), 'w', encoding='utf-8') as failed_file:
+            json.dump(record, failed_file, ensure_ascii=False, default=str)
+        self._remove_spool([record['id']])
+
+    def _load_spool(self) -> List[Dict[str, Any]]:
+        records = []
+        for path in sorted(glob.glob(os.path.join(self.spool_path, "*.json"))):
+            try:
+                with open(path, 'r', encoding='utf-8') as spool_file:
+                    record = json.load(spool_file)
+                record['next_attempt'] = 0.0
+                records.append(record)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Notificación ilegible en el spool {path}: {str(e)}")
+        records.sort(key=lambda record: record.get('created_at', ''))
+        return records
+
+
+# Instancia global del despachador de notificaciones
+notification_dispatcher = NotificationDispatcher()
@@ -1,93 +1,206 @@
-from datetime import datetime
-import glob
-import subprocess
+from datetime import datetime, timedelta
+import asyncio
 import tempfile
+import threading
 import os
 import re
 from typing import Dict, Any, Optional, List
 import logging
 from app.utils.oracle_connection import OracleConnection
+from app.services.rman_executor import rman_executor, OutputHandler
+from app.services.rman_log_tailer import RmanLogTailer, LineHandler
+from app.utils.rman_log_store import rman_log_store
+from app.utils.rman_output_parser import parse_rman_line
+from app.models.backup_piece import BackupPieceCreate
+from app.utils.file_utils import FileUtils
+from app.utils.rman_layout import (
+    parse_size, plan_backup_layout, datafile_clause, channel_allocations, resolve_compression_level
+)
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Piezas en disco registradas en el control file desde el inicio de la ejecución
+BACKUP_PIECES_QUERY = """
+    SELECT s.RECID, p.SET_STAMP, p.SET_COUNT, p.PIECE#, p.HANDLE, p.TAG, p.BYTES,
+           s.BACKUP_TYPE, s.INCREMENTAL_LEVEL, s.CONTROLFILE_INCLUDED,
+           CASE WHEN EXISTS (
+               SELECT 1 FROM V$BACKUP_DATAFILE d
+               WHERE d.SET_STAMP = s.SET_STAMP AND d.SET_COUNT = s.SET_COUNT AND d.FILE# > 0
+           ) THEN 'YES' ELSE 'NO' END AS DATAFILES_INCLUDED,
+           p.STATUS, p.START_TIME, p.COMPLETION_TIME
+    FROM V$BACKUP_PIECE p
+    JOIN V$BACKUP_SET s ON s.SET_STAMP = p.SET_STAMP AND s.SET_COUNT = p.SET_COUNT
+    WHERE p.DEVICE_TYPE = 'DISK'
+      AND p.DELETED = 'NO'
+      AND p.START_TIME >= :run_started
+"""
+
+# Límite de Oracle para elementos en una lista IN
+MAX_IN_LIST = 1000
+
+# Backup sets que siguen teniendo piezas sin eliminar en el control file
+EXISTING_BACKUP_SETS_QUERY = """
+    SELECT DISTINCT s.RECID
+    FROM V$BACKUP_SET s
+    JOIN V$BACKUP_PIECE p ON p.SET_STAMP = s.SET_STAMP AND p.SET_COUNT = s.SET_COUNT
+    WHERE p.DELETED = 'NO'
+"""
+
+CHANGE_TRACKING_QUERY = "SELECT STATUS FROM V$BLOCK_CHANGE_TRACKING"
+
+# Bytes leídos por los jobs RMAN de una ejecución (SET COMMAND ID del script)
+RUN_INPUT_BYTES_QUERY = """
+    SELECT SUM(INPUT_BYTES)
+    FROM V$RMAN_BACKUP_JOB_DETAILS
+    WHERE COMMAND_ID = :command_id
+      AND START_TIME >= :run_started
+"""
+
+# Base nivel 0 vigente: el nivel 0 más antiguo entre los más recientes de cada
+# datafile (NULL si algún datafile no tiene nivel 0 disponible)
+LEVEL0_BASELINE_QUERY = """
+    SELECT CASE WHEN COUNT(b.LAST_LEVEL0) < COUNT(*) THEN NULL ELSE MIN(b.LAST_LEVEL0) END
+    FROM (
+        SELECT f.FILE#, MAX(l0.COMPLETION_TIME) AS LAST_LEVEL0
+        FROM V$DATAFILE f
+        LEFT JOIN (
+            SELECT bd.FILE#, bd.COMPLETION_TIME
+            FROM V$BACKUP_DATAFILE bd
+            WHERE bd.INCREMENTAL_LEVEL = 0
+              AND EXISTS (
+                  SELECT 1 FROM V$BACKUP_PIECE p
+                  WHERE p.SET_STAMP = bd.SET_STAMP
+                    AND p.SET_COUNT = bd.SET_COUNT
+                    AND p.STATUS = 'A'
+              )
+        ) l0 ON l0.FILE# = f.FILE#
+        GROUP BY f.FILE#
+    ) b
+"""
+
+IMAGE_COPY_QUERY = """
+    SELECT (SELECT COUNT(*) FROM V$DATAFILE),
+           (SELECT COUNT(DISTINCT FILE#) FROM V$DATAFILE_COPY WHERE TAG = :tag AND STATUS = 'A')
+    FROM DUAL
+"""
+
+# Tablespaces resueltos por estrategia: {strategy_id: (objetos, huella del diccionario, tablespaces)}
+_object_tablespaces_cache: Dict[int, tuple] = {}
+_object_tablespaces_lock = threading.Lock()
+
+# Pasos del mantenimiento del catálogo, en orden
+CATALOG_MAINTENANCE_COMMANDS = {
+    'crosscheck': "CROSSCHECK BACKUP;",                   # Marca EXPIRED las piezas que ya no están en disco
+    'delete_expired': "DELETE NOPROMPT EXPIRED BACKUP;",  # Quita sus registros del control file
+}
+
+# custom_parameters['incremental_mode'] de las estrategias incrementales
+INCREMENTAL_MODES = ('differential', 'cumulative', 'image_copy')
+
 class OracleService:
     def __init__(self):
         self.connection = OracleConnection()
     
-    def generate_rman_script(self, strategy_data: Dict[str, Any], backup_path: str) -> str:
-        """Genera el script RMAN para la estrategia de backup - USANDO PARALELISMO DE LA ESTRATEGIA"""
-        
-        accessible_backup_path = 'C:/temp/oracle_backups'
-        os.makedirs(accessible_backup_path, exist_ok=True)
+    def generate_rman_script(
+        self,
+        strategy_data: Dict[str, Any],
+        backup_path: str,
+        command_id: Optional[str] = None,
+        tag: Optional[str] = None,
+        incremental_plan: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Genera el script RMAN para la estrategia de backup - USANDO PARALELISMO DE LA ESTRATEGIA
+
+        Las piezas se escriben en ``backup_path`` (directorio de la ejecución) y
+        todos los BACKUP llevan ``tag`` para identificar las piezas de esta
+        ejecución en el catálogo. ``command_id`` etiqueta las sesiones de los
+        canales (CLIENT_INFO) para poder seguir el progreso en V$SESSION_LONGOPS.
+        ``incremental_plan`` (ver ``plan_incremental_backup``) se calcula aquí si
+        no se recibe y la estrategia es incremental.
+        """
         
-        backup_format = os.path.join(accessible_backup_path, "backup_%d_%T_%U.bkp").replace("\\", "/")
+        backup_format = os.path.join(backup_path, "%d_%T_%U.bkp").replace("\\", "/")
+        tag_clause = f" TAG '{tag}'" if tag else ""
         script_lines = []
         
         # USAR EL PARALELISMO DE LA ESTRATEGIA O VALOR POR DEFECTO
-        parallel_degree = strategy_data.get('parallel_degree', 1)
+        parallel_degree = strategy_data.get('parallel_degree') or 1
+        backup_type = strategy_data['backup_type']
         
-        script_lines.extend([
-            f"CONFIGURE DEVICE TYPE DISK PARALLELISM {parallel_degree};",
-            "CONFIGURE RETENTION POLICY TO REDUNDANCY 1;",
-            "CONFIGURE CONTROLFILE AUTOBACKUP OFF;",
-        ])
+        partial_tablespaces = self.get_backup_tablespaces(strategy_data)
         
-        # CONFIGURAR CANALES INDIVIDUALES SI HAY PARALELISMO > 1
-        if parallel_degree > 1:
-            for i in range(1, parallel_degree + 1):
-                script_lines.append(f"CONFIGURE CHANNEL {i} DEVICE TYPE DISK FORMAT '{backup_format}';")
+        # Reparto entre canales según el tamaño real de los datafiles
+        datafiles = self.get_datafile_sizes(partial_tablespaces)
+        layout = plan_backup_layout(
+            datafiles,
+            parallel_degree,
+            parse_size(strategy_data.get('max_backup_size'))
+        )
+        layout_clause = datafile_clause(layout)
+        logger.info(
+            f"🧮 Plan RMAN: {layout['channels']} canales, {layout['datafiles']} datafiles "
+            f"({layout['total_bytes'] / (1024 ** 3):.2f} GB), sección={layout['section_size_mb']}M, "
+            f"filesperset={layout['files_per_set']}, maxpiecesize={layout['max_piece_size_mb']}M"
+        )
         
-        if strategy_data.get('compression', True):
-            script_lines.append("CONFIGURE COMPRESSION ALGORITHM 'HIGH' AS OF RELEASE 'DEFAULT' OPTIMIZE FOR LOAD TRUE;")
-
-        # MANTENIMIENTO PREVENTIVO
-        script_lines.extend([
-            "CROSSCHECK BACKUP;",           # Sincroniza catálogo
-            "DELETE EXPIRED BACKUP;",       # Elimina registros de backups físicamente desaparecidos
-            "DELETE OBSOLETE;",             # Limpia según política de retención
-        ])
+        # Solo comandos de backup: la retención (retention_engine) y CROSSCHECK /
+        # DELETE EXPIRED (catalog_maintenance) se ejecutan en sus propios jobs
+        script_lines.append("CONFIGURE CONTROLFILE AUTOBACKUP OFF;")
         
-        backup_type = strategy_data['backup_type']
+        compression_level = resolve_compression_level(strategy_data)
+        backupset = "AS COMPRESSED BACKUPSET" if compression_level else "AS BACKUPSET"
         
         script_lines.append("RUN {")
+        if command_id:
+            script_lines.append(f"  SET COMMAND ID TO '{command_id}';")
+        if compression_level:
+            # SET solo afecta a esta sesión: CONFIGURE es persistente y lo cambiarían
+            # las ejecuciones concurrentes de otras estrategias
+            script_lines.append(f"  SET COMPRESSION ALGORITHM '{compression_level}';")
+        
+        # Canales propios de la ejecución (no modifican la configuración persistente)
+        script_lines.extend(channel_allocations(layout, backup_format))
         
         if backup_type == 'full':
             script_lines.extend([
-                f"  BACKUP AS COMPRESSED BACKUPSET DATABASE FORMAT '{backup_format}';",
-                f"  BACKUP AS COMPRESSED BACKUPSET ARCHIVELOG ALL FORMAT '{backup_format}' DELETE INPUT;",
-                f"  BACKUP CURRENT CONTROLFILE FORMAT '{backup_format}';",
+                f"  BACKUP {backupset} DATABASE{layout_clause} FORMAT '{backup_format}'{tag_clause};",
+                f"  BACKUP {backupset} ARCHIVELOG ALL FORMAT '{backup_format}'{tag_clause} DELETE INPUT;",
+                f"  BACKUP CURRENT CONTROLFILE FORMAT '{backup_format}'{tag_clause};",
             ])
         
         elif backup_type == 'incremental':
+            plan = incremental_plan or self.plan_incremental_backup(strategy_data)
+            if plan['mode'] == 'image_copy':
+                # Copias imagen actualizadas: RMAN crea la copia nivel 0 si no existe
+                # y en cada ejecución aplica el incremental anterior sobre ella
+                image_format = os.path.join(plan['image_copy_path'], "%d_%T_%U.bkp").replace("\\", "/")
+                script_lines.extend([
+                    f"  RECOVER COPY OF DATABASE WITH TAG '{plan['image_copy_tag']}';",
+                    f"  BACKUP INCREMENTAL LEVEL 1 FOR RECOVER OF COPY WITH TAG '{plan['image_copy_tag']}' DATABASE FORMAT '{image_format}';",
+                ])
+            else:
+                cumulative = " CUMULATIVE" if plan['level'] == 1 and plan['mode'] == 'cumulative' else ""
+                script_lines.append(
+                    f"  BACKUP {backupset} INCREMENTAL LEVEL {plan['level']}{cumulative} DATABASE{layout_clause} FORMAT '{backup_format}'{tag_clause};"
+                )
             script_lines.extend([
-                f"  BACKUP AS COMPRESSED BACKUPSET INCREMENTAL LEVEL 1 DATABASE FORMAT '{backup_format}';",
-                f"  BACKUP AS COMPRESSED BACKUPSET ARCHIVELOG ALL FORMAT '{backup_format}' DELETE INPUT;",
-                f"  BACKUP CURRENT CONTROLFILE FORMAT '{backup_format}';",
+                f"  BACKUP {backupset} ARCHIVELOG ALL FORMAT '{backup_format}'{tag_clause} DELETE INPUT;",
+                f"  BACKUP CURRENT CONTROLFILE FORMAT '{backup_format}'{tag_clause};",
             ])
         
         elif backup_type == 'partial':
-            backup_parts = []
-            
-            if strategy_data.get('tablespaces'):
-                for ts in strategy_data['tablespaces']:
-                    backup_parts.append(f"TABLESPACE {ts}")
-            
-            if strategy_data.get('schemas'):
-                schema_tablespaces = self._get_tablespaces_for_schemas(strategy_data['schemas'])
-                for ts in schema_tablespaces:
-                    backup_parts.append(f"TABLESPACE {ts}")
-            
-            if backup_parts:
-                tablespace_list = " ".join(backup_parts)
-                script_lines.append(f"  BACKUP AS COMPRESSED BACKUPSET {tablespace_list} FORMAT '{backup_format}';")
+            if partial_tablespaces:
+                tablespace_list = ", ".join(partial_tablespaces)
+                script_lines.append(
+                    f"  BACKUP {backupset} TABLESPACE {tablespace_list}{layout_clause} FORMAT '{backup_format}'{tag_clause};"
+                )
             
             script_lines.extend([
-                f"  BACKUP AS COMPRESSED BACKUPSET ARCHIVELOG ALL FORMAT '{backup_format}' DELETE INPUT;",
-                f"  BACKUP CURRENT CONTROLFILE FORMAT '{backup_format}';",
+                f"  BACKUP {backupset} ARCHIVELOG ALL FORMAT '{backup_format}'{tag_clause} DELETE INPUT;",
+                f"  BACKUP CURRENT CONTROLFILE FORMAT '{backup_format}'{tag_clause};",
             ])
         
-        script_lines.append("  DELETE NOPROMPT OBSOLETE;") # Limpiar backups obsoletos
         script_lines.append("}")
         
         script_lines.extend([  # Comandos finales
@@ -99,40 +212,255 @@ class OracleService:
 
         return script_content
     
-    def _get_tablespaces_for_schemas(self, schemas: List[str]) -> List[str]:
-        """Obtiene los tablespaces asociados a los schemas especificados"""
+    def get_block_change_tracking_status(self) -> Optional[str]:
+        """Estado de V$BLOCK_CHANGE_TRACKING (ENABLED/DISABLED) o None si no se pudo consultar"""
+        try:
+            rows = self.connection.execute_query(CHANGE_TRACKING_QUERY)
+            return rows[0][0] if rows else None
+        except Exception as e:
+            logger.warning(f"No se pudo consultar V$BLOCK_CHANGE_TRACKING: {str(e)}")
+            return None
+    
+    def get_run_input_bytes(self, command_id: str, run_started: datetime) -> Optional[int]:
+        """Bytes que leyó RMAN en una ejecución (datafiles y archivelogs) o None si no se pudo consultar"""
+        try:
+            rows = self.connection.execute_query(
+                RUN_INPUT_BYTES_QUERY, {'command_id': command_id, 'run_started': run_started}
+            )
+            return int(rows[0][0]) if rows and rows[0][0] is not None else None
+        except Exception as e:
+            logger.warning(f"No se pudo consultar V$RMAN_BACKUP_JOB_DETAILS: {str(e)}")
+            return None
+    
+    def plan_incremental_backup(self, strategy_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Decide el nivel y el modo de un backup incremental.
+
+        ``custom_parameters['incremental_mode']`` elige entre 'differential'
+        (por defecto), 'cumulative' e 'image_copy'. Se hace un nivel 0 cuando no
+        hay una base completa disponible o cuando es más antigua que
+        ``level0_interval_days`` (acotado por la retención de la estrategia,
+        para no depender de una base que ya se eliminó). En 'image_copy' el nivel
+        es siempre 1, o 'copy' cuando RMAN va a crear las copias imagen que faltan.
+        """
+        params = strategy_data.get('custom_parameters') or {}
+        mode = str(params.get('incremental_mode') or 'differential').lower()
+        if mode not in INCREMENTAL_MODES:
+            logger.warning(f"⚠️ Modo incremental desconocido '{mode}', se usa 'differential'")
+            mode = 'differential'
+        
+        interval_days = int(params.get('level0_interval_days') or settings.INCREMENTAL_LEVEL0_INTERVAL_DAYS)
+        if strategy_data.get('retention_days'):
+            interval_days = min(interval_days, strategy_data['retention_days'])
+        
+        change_tracking = self.get_block_change_tracking_status()
+        plan = {
+            'mode': mode,
+            'level': 1,
+            'change_tracking': change_tracking,
+            'level0_interval_days': interval_days,
+            'last_level0': None,
+            'reason': None,
+        }
+        
+        if mode == 'image_copy':
+            plan['image_copy_tag'] = FileUtils.generate_image_copy_tag(strategy_data['id'])
+            plan['image_copy_path'] = FileUtils.get_image_copy_path(strategy_data['id'])
+            try:
+                rows = self.connection.execute_query(IMAGE_COPY_QUERY, {'tag': plan['image_copy_tag']})
+                datafiles, copies = rows[0] if rows else (0, 0)
+            except Exception as e:
+                logger.warning(f"No se pudo consultar V$DATAFILE_COPY: {str(e)}")
+                datafiles, copies = None, None
+            if datafiles is not None and copies < datafiles:
+                # El mismo script crea las copias que faltan (no hay nivel 0 en backupsets)
+                plan['level'] = 'copy'
+                plan['reason'] = f"copias imagen incompletas ({copies}/{datafiles} datafiles)"
+        else:
+            try:
+                rows = self.connection.execute_query(LEVEL0_BASELINE_QUERY)
+                plan['last_level0'] = rows[0][0] if rows else None
+            except Exception as e:
+                logger.warning(f"No se pudo consultar la base nivel 0, se hará un nivel 0: {str(e)}")
+            
+            if plan['last_level0'] is None:
+                plan['level'] = 0
+                plan['reason'] = "no hay un nivel 0 disponible para todos los datafiles"
+            elif datetime.now() - plan['last_level0'] > timedelta(days=interval_days):
+                plan['level'] = 0
+                plan['reason'] = f"el nivel 0 tiene más de {interval_days} días"
+        
+        if change_tracking != 'ENABLED':
+            logger.warning("⚠️ Block change tracking no habilitado: el incremental leerá todos los bloques")
+        logger.info(
+            f"📐 Incremental {mode}: "
+            + ("creación de copias imagen" if plan['level'] == 'copy' else f"nivel {plan['level']}")
+            + (f" ({plan['reason']})" if plan['reason'] else "")
+        )
+        return plan
+    
+    def get_backup_tablespaces(self, strategy_data: Dict[str, Any]) -> Optional[List[str]]:
+        """Tablespaces de un backup parcial (incluye los de sus esquemas y tablas); None si es de toda la BD"""
+        if strategy_data['backup_type'] != 'partial':
+            return None
+        tablespaces = list(strategy_data.get('tablespaces') or [])
+        if strategy_data.get('schemas') or strategy_data.get('tables'):
+            tablespaces.extend(self.resolve_object_tablespaces(
+                strategy_data.get('schemas'),
+                strategy_data.get('tables'),
+                strategy_data.get('id')
+            ))
+        return list(dict.fromkeys(tablespaces))
+    
+    def get_datafile_sizes(self, tablespaces: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Tamaño de los datafiles (DBA_DATA_FILES), opcionalmente de ciertos tablespaces"""
         try:
-            tablespaces = set()
-            for schema in schemas:
-                query = f"""
-                SELECT DEFAULT_TABLESPACE 
-                FROM DBA_USERS 
-                WHERE USERNAME = UPPER('{schema}')
-                """
-                result = self.connection.execute_query(query)
-                if result:
-                    tablespaces.add(result[0][0])
+            rows = self.connection.execute_query(
+                "SELECT FILE_ID, TABLESPACE_NAME, BYTES FROM DBA_DATA_FILES"
+            )
+        except Exception as e:
+            logger.warning(f"No se pudo leer DBA_DATA_FILES, se usa el reparto por defecto: {str(e)}")
+            return []
+        
+        wanted = {ts.upper() for ts in tablespaces} if tablespaces is not None else None
+        return [
+            {'file_id': file_id, 'tablespace': tablespace, 'bytes': int(size or 0)}
+            for file_id, tablespace, size in rows
+            if wanted is None or tablespace.upper() in wanted
+        ]
+    
+    def resolve_object_tablespaces(
+        self,
+        schemas: Optional[List[str]],
+        tables: Optional[List[str]],
+        strategy_id: Optional[int] = None
+    ) -> List[str]:
+        """Tablespaces con algún segmento de ``schemas`` o de ``tables`` (incluye sus LOB).
+
+        Una sola consulta a DBA_SEGMENTS con variables bind. Con ``strategy_id``
+        el resultado se guarda por estrategia y se reutiliza mientras no cambie
+        el diccionario (COUNT y MAX(LAST_DDL_TIME) de los objetos en DBA_OBJECTS).
+        """
+        owners = sorted({schema.strip().upper() for schema in schemas or [] if schema.strip()})
+        table_names = sorted(
+            {self._split_table_name(table) for table in tables or [] if table.strip()},
+            key=lambda item: (item[0] or "", item[1])
+        )
+        if not owners and not table_names:
+            return []
+        
+        objects_key = (tuple(owners), tuple(table_names))
+        try:
+            params: Dict[str, Any] = {}
+            rows = self.connection.execute_query(
+                "SELECT COUNT(*), MAX(o.LAST_DDL_TIME) FROM DBA_OBJECTS o WHERE "
+                + self._object_filter("o.OWNER", "o.OBJECT_NAME", owners, table_names, params),
+                params
+            )
+            fingerprint = tuple(rows[0]) if rows else None
+            
+            if strategy_id is not None:
+                with _object_tablespaces_lock:
+                    cached = _object_tablespaces_cache.get(strategy_id)
+                if cached and cached[0] == objects_key and cached[1] == fingerprint:
+                    return list(cached[2])
+            
+            params = {}
+            query = (
+                "SELECT DISTINCT s.TABLESPACE_NAME FROM DBA_SEGMENTS s WHERE "
+                + self._object_filter("s.OWNER", "s.SEGMENT_NAME", owners, table_names, params)
+            )
+            if table_names:
+                # Los LOB de una tabla son segmentos con otro nombre
+                query += (
+                    " OR (s.OWNER, s.SEGMENT_NAME) IN (SELECT l.OWNER, l.SEGMENT_NAME FROM DBA_LOBS l WHERE "
+                    + self._object_filter("l.OWNER", "l.TABLE_NAME", [], table_names, params, prefix="l")
+                    + ")"
+                )
+            tablespaces = sorted(row[0] for row in self.connection.execute_query(query, params))
+            
+            if strategy_id is not None:
+                with _object_tablespaces_lock:
+                    _object_tablespaces_cache[strategy_id] = (objects_key, fingerprint, tablespaces)
+            logger.info(f"🗂️ Tablespaces de {len(owners)} esquemas y {len(table_names)} tablas: {', '.join(tablespaces) or 'ninguno'}")
             return list(tablespaces)
         except Exception as e:
-            logger.error(f"Error obteniendo tablespaces para schemas: {str(e)}")
+            logger.error(f"Error obteniendo tablespaces de esquemas/tablas: {str(e)}")
             return []
+    
+    @staticmethod
+    def _split_table_name(table: str) -> tuple:
+        """'HR.EMPLOYEES' -> ('HR', 'EMPLOYEES'); 'employees' -> (None, 'EMPLOYEES')"""
+        owner, _, name = table.strip().upper().rpartition('.')
+        return (owner or None, name)
+    
+    def _object_filter(
+        self,
+        owner_column: str,
+        name_column: str,
+        owners: List[str],
+        table_names: List[tuple],
+        params: Dict[str, Any],
+        prefix: str = "o"
+    ) -> str:
+        """Condición (con binds en ``params``) que selecciona objetos de esos esquemas o tablas"""
+        conditions = []
+        if owners:
+            names = []
+            for index, owner in enumerate(owners):
+                params[f"{prefix}owner{index}"] = owner
+                names.append(f":{prefix}owner{index}")
+            conditions.append(f"{owner_column} IN ({', '.join(names)})")
+        for index, (owner, name) in enumerate(table_names):
+            params[f"{prefix}table{index}"] = name
+            if owner:
+                params[f"{prefix}table_owner{index}"] = owner
+                conditions.append(f"({owner_column} = :{prefix}table_owner{index} AND {name_column} = :{prefix}table{index})")
+            else:
+                conditions.append(f"{name_column} = :{prefix}table{index}")
+        return "(" + " OR ".join(conditions) + ")"
         
-    def execute_rman_backup(self, rman_script: str, strategy_id: int) -> Dict[str, Any]:
-        """Ejecuta el script RMAN y retorna el resultado - VERSIÓN MEJORADA CON LOG"""
+    async def execute_rman_backup(
+        self,
+        rman_script: str,
+        strategy_id: int,
+        run_id: Optional[int] = None,
+        backup_dir: Optional[str] = None,
+        tag: Optional[str] = None,
+        extra_tags: Optional[List[str]] = None,
+        on_output: Optional[OutputHandler] = None,
+        line_handlers: Optional[List[LineHandler]] = None,
+        command_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Ejecuta el script RMAN de forma asíncrona y retorna el resultado.
+
+        El log de RMAN se ingiere mientras se escribe en ``rman_log_store``;
+        ``log_content`` solo contiene la cola del log. ``backup_dir`` es el
+        directorio de la ejecución y ``tag`` el TAG usado en el script, con el
+        que se identifican sus piezas; ``extra_tags`` añade otros TAG del script
+        (p. ej. el de las copias imagen). Con ``command_id`` (SET COMMAND ID del
+        script) se obtienen los bytes que leyó la ejecución (``input_bytes``).
+        """
         result = {
             'success': False,
             'output': '',
             'error': '',
             'backup_files': [],
+            'backup_pieces': [],
             'backup_size_bytes': 0,
-            'log_content': ''  # Nuevo campo para el contenido del log
+            'input_bytes': None,
+            'log_content': '',
+            'log_size_bytes': 0,
+            'rman_errors': [],
+            'cancelled': False
         }
         
+        run_id = run_id if run_id is not None else strategy_id
         temp_file_path = None
         log_file_path = None
+        tailer = None
         
         try:
-            backup_dir = 'C:/temp/oracle_backups'
+            backup_dir = backup_dir or FileUtils.get_run_backup_path(strategy_id, datetime.now())
             os.makedirs(backup_dir, exist_ok=True)
             logger.info(f"Directorio de backup: {backup_dir}")
 
@@ -149,79 +477,73 @@ class OracleService:
             log_file_path = os.path.abspath(os.path.join(backup_dir, log_filename))
             logger.info(f"Archivo de log: {log_file_path}")
             
-            # Buscar RMAN
-            rman_executable = "rman"
-            if not rman_executable:
-                result['error'] = "No se pudo encontrar el ejecutable RMAN."
-                return result
+            # Piezas anunciadas por RMAN ("piece handle=... tag=...")
+            parsed_pieces: List[Dict[str, str]] = []
             
-            # Comando RMAN
-            rman_cmd = f'{rman_executable} target \'sys/123@XE AS SYSDBA\' cmdfile={temp_file_path} log={log_file_path}'
-
-            logger.info(f"Comando RMAN: {rman_cmd}")
+            async def collect_piece(line: str):
+                event = parse_rman_line(line)
+                if event and event['type'] == 'piece':
+                    parsed_pieces.append(event)
+            
+            # Hora del servidor de BD: V$BACKUP_PIECE usa su reloj, no el de la aplicación
+            run_started = await asyncio.to_thread(self._database_now)
             
-            # Ejecutar comando RMAN
+            # Seguir el log mientras RMAN lo escribe
+            writer = await asyncio.to_thread(rman_log_store.open_writer, run_id)
+            tailer = RmanLogTailer(log_file_path, writer, (line_handlers or []) + [collect_piece])
+            tailer.start()
+            
+            # Ejecutar RMAN sin bloquear el event loop
             logger.info("🚀 Iniciando ejecución de RMAN...")
+            try:
+                execution = await rman_executor.run(
+                    run_id,
+                    temp_file_path,
+                    log_file=log_file_path,
+                    on_output=on_output
+                )
+            finally:
+                await tailer.stop()
+            logger.info(f"RMAN finalizado con código: {execution['returncode']}")
+            logger.info(
+                f"Log RMAN ingerido: {writer.total_bytes} bytes "
+                f"({writer.compressed_bytes} comprimidos)"
+            )
+            
+            result['output'] = execution['stdout']
+            result['error'] = execution['stderr']
+            result['cancelled'] = execution['cancelled']
+            result['log_content'] = tailer.tail_text
+            result['log_size_bytes'] = writer.total_bytes
+            result['rman_errors'] = tailer.errors
             
-            process = subprocess.Popen(
-                rman_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                shell=True,
-                encoding='utf-8',
-                errors='ignore'
+            # Las piezas escritas existen aunque la ejecución falle o se cancele
+            pieces = await asyncio.to_thread(
+                self.collect_backup_pieces, run_started, parsed_pieces, tag, extra_tags
             )
-
-            try:
-                stdout, stderr = process.communicate(timeout=3600)
-                logger.info(f"RMAN finalizado con código: {process.returncode}")
-                
-                # Leer el contenido del archivo de log
-                if os.path.exists(log_file_path):
-                    with open(log_file_path, 'r', encoding='utf-8', errors='ignore') as log_file:
-                        result['log_content'] = log_file.read()
-                        logger.info(f"Contenido del log leído ({len(result['log_content'])} caracteres)")
-                else:
-                    logger.warning(f"Archivo de log no encontrado: {log_file_path}")
-                    result['log_content'] = "Archivo de log no generado"
-
-                # ✅ DETECTAR ARCHIVOS DE BACKUP CREADOS
-                backup_files = self._find_backup_files(backup_dir, strategy_id)
-                result['backup_files'] = backup_files
-                result['backup_size_bytes'] = self._calculate_total_size(backup_files)
-                
-                logger.info(f"📁 Archivos de backup detectados: {len(backup_files)}")
-                logger.info(f"📊 Tamaño total del backup: {result['backup_size_bytes'] / (1024*1024):.2f} MB")
-                    
-                # Combinar salidas para el resultado
-                result['output'] = stdout
-                result['error'] = stderr
-                
-                # DEBUG: Mostrar resumen del log
-                if result['log_content']:
-                    log_preview = result['log_content'][:500] + "..." if len(result['log_content']) > 500 else result['log_content']
-                    logger.info(f"Preview del log RMAN: {log_preview}")
-                    
-            except subprocess.TimeoutExpired:
-                process.kill()
-                stdout, stderr = process.communicate()
-                result['error'] = "Timeout: El comando RMAN tardó más de 1 hora"
-                logger.error("Timeout en ejecución RMAN")
-                
-                # Intentar leer el log incluso en timeout
-                if os.path.exists(log_file_path):
-                    with open(log_file_path, 'r', encoding='utf-8', errors='ignore') as log_file:
-                        result['log_content'] = log_file.read()
-                
+            result['backup_pieces'] = pieces
+            result['backup_files'] = [piece.handle for piece in pieces]
+            result['backup_size_bytes'] = sum(piece.bytes or 0 for piece in pieces)
+            if command_id:
+                result['input_bytes'] = await asyncio.to_thread(self.get_run_input_bytes, command_id, run_started)
+            
+            logger.info(f"📁 Piezas de backup de esta ejecución: {len(pieces)}")
+            logger.info(f"📊 Tamaño total del backup: {result['backup_size_bytes'] / (1024*1024):.2f} MB")
+            
+            if execution['timed_out']:
+                result['error'] = f"Timeout: El comando RMAN superó {settings.RMAN_TIMEOUT_SECONDS} segundos"
+                return result
+            
+            if execution['cancelled']:
+                result['error'] = "Ejecución de RMAN cancelada"
                 return result
             
-            result['success'] = process.returncode == 0
+            result['success'] = execution['returncode'] == 0
             
             if result['success']:
                 logger.info("✅ Backup completado exitosamente")
             else:
-                logger.error(f"❌ Backup falló con código: {process.returncode}")
+                logger.error(f"❌ Backup falló con código: {execution['returncode']}")
 
             return result
             
@@ -229,71 +551,111 @@ class OracleService:
             logger.error(f"💥 Error ejecutando backup RMAN: {str(e)}", exc_info=True)
             result['error'] = str(e)
             
-            # Intentar leer el log incluso en error
-            if log_file_path and os.path.exists(log_file_path):
-                try:
-                    with open(log_file_path, 'r', encoding='utf-8', errors='ignore') as log_file:
-                        result['log_content'] = log_file.read()
-                except Exception as log_error:
-                    logger.error(f"Error leyendo archivo de log: {log_error}")
+            # Conservar lo que se haya ingerido del log incluso en error
+            if tailer:
+                result['log_content'] = tailer.tail_text
+                result['rman_errors'] = tailer.errors
             
             return result
         finally:
-            # Limpiar archivos temporales
-            try:
-                if temp_file_path and os.path.exists(temp_file_path):
-                    os.remove(temp_file_path)
-                    logger.info(f"Archivo temporal eliminado: {temp_file_path}")
-            except Exception as e:
-                logger.warning(f"No se pudo eliminar archivo temporal: {e}")
+            # Limpiar archivos temporales (el log ya quedó en el almacén comprimido)
+            for path in (temp_file_path, log_file_path if tailer else None):
+                try:
+                    if path and os.path.exists(path):
+                        os.remove(path)
+                        logger.info(f"Archivo temporal eliminado: {path}")
+                except Exception as e:
+                    logger.warning(f"No se pudo eliminar archivo temporal: {e}")
 
-    def _find_backup_files(self, backup_dir: str, strategy_id: int) -> List[str]:
-        """Encuentra todos los archivos de backup creados en el directorio"""
+    def _database_now(self) -> datetime:
+        """SYSDATE del servidor Oracle (o la hora local si no hay conexión)"""
         try:
-            # Patrones de nombres de archivos de backup RMAN
-            patterns = [
-                f"*backup*{strategy_id}*.bkp",
-                f"*BACKUP*{strategy_id}*.BKP", 
-                "backup_*.bkp",
-                "BACKUP_*.BKP",
-                "*.bkp"  # Todos los archivos .bkp
-            ]
-            
-            backup_files = []
-            for pattern in patterns:
-                full_pattern = os.path.join(backup_dir, pattern)
-                matches = glob.glob(full_pattern)
-                backup_files.extend(matches)
-            
-            # Eliminar duplicados y archivos de log
-            backup_files = [f for f in set(backup_files) 
-                        if not f.endswith('.log') and os.path.isfile(f)]
-            
-            # Ordenar por fecha de modificación (más recientes primero)
-            backup_files.sort(key=os.path.getmtime, reverse=True)
-            
-            logger.info(f"🔍 Búsqueda de archivos de backup: encontrados {len(backup_files)}")
-            for file in backup_files:
-                size_mb = os.path.getsize(file) / (1024 * 1024)
-                logger.info(f"   📄 {os.path.basename(file)} - {size_mb:.2f} MB")
-                
-            return backup_files
-            
+            rows = self.connection.execute_query("SELECT SYSDATE FROM DUAL")
+            if rows:
+                return rows[0][0]
         except Exception as e:
-            logger.error(f"Error buscando archivos de backup: {str(e)}")
-            return []
+            logger.warning(f"No se pudo leer SYSDATE, se usa la hora local: {str(e)}")
+        return datetime.now()
 
-    def _calculate_total_size(self, file_paths: List[str]) -> int:
-        """Calcula el tamaño total en bytes de una lista de archivos"""
-        total_size = 0
-        for file_path in file_paths:
+    def collect_backup_pieces(
+        self,
+        run_started: datetime,
+        parsed_pieces: List[Dict[str, str]],
+        tag: Optional[str] = None,
+        extra_tags: Optional[List[str]] = None
+    ) -> List[BackupPieceCreate]:
+        """Obtiene las piezas exactas generadas por una ejecución.
+
+        Consulta V$BACKUP_PIECE/V$BACKUP_SET desde el inicio de la ejecución,
+        acotando por el TAG de la ejecución (o, sin él, por los tags/handles que
+        RMAN anunció en su salida) para no tomar piezas de otras ejecuciones
+        concurrentes. Si el catálogo no está disponible, usa directamente las
+        líneas "piece handle=" del log.
+        """
+        tags = [tag] + list(extra_tags or []) if tag else sorted({piece['tag'] for piece in parsed_pieces if piece.get('tag')})
+        handles = sorted({piece['handle'] for piece in parsed_pieces})
+        
+        query = BACKUP_PIECES_QUERY
+        params: Dict[str, Any] = {'run_started': run_started}
+        rows = None
+        if tags and len(tags) <= MAX_IN_LIST:
+            query += self._in_clause("p.TAG", "tag", tags, params)
+        elif handles and len(handles) <= MAX_IN_LIST:
+            query += self._in_clause("p.HANDLE", "handle", handles, params)
+        elif not handles:
+            # Sin tag ni handles la consulta tomaría piezas de ejecuciones concurrentes
+            logger.warning("⚠️ RMAN no reportó tags ni piezas; no se registran piezas de esta ejecución")
+            return []
+        else:
+            query = None  # Demasiados handles para filtrar: se usan los de la salida de RMAN
+        
+        if query:
             try:
-                if os.path.exists(file_path):
-                    total_size += os.path.getsize(file_path)
+                rows = self.connection.execute_query(query + " ORDER BY p.SET_STAMP, p.PIECE#", params)
             except Exception as e:
-                logger.warning(f"Error calculando tamaño de {file_path}: {str(e)}")
+                logger.warning(f"No se pudo consultar V$BACKUP_PIECE, se usa la salida de RMAN: {str(e)}")
+        
+        if rows:
+            return [
+                BackupPieceCreate(
+                    bs_key=recid,
+                    set_stamp=set_stamp,
+                    set_count=set_count,
+                    piece_number=piece_number,
+                    handle=handle,
+                    tag=tag,
+                    bytes=int(size) if size is not None else None,
+                    backup_type=backup_type,
+                    incremental_level=incremental_level,
+                    controlfile_included=controlfile_included == 'YES',
+                    datafiles_included=datafiles_included == 'YES',
+                    status=piece_status,
+                    source='catalog',
+                    start_time=start_time,
+                    completion_time=completion_time
+                )
+                for (recid, set_stamp, set_count, piece_number, handle, tag, size, backup_type,
+                     incremental_level, controlfile_included, datafiles_included, piece_status,
+                     start_time, completion_time) in rows
+            ]
         
-        return total_size
+        return [
+            BackupPieceCreate(
+                handle=handle,
+                tag=next((piece['tag'] for piece in parsed_pieces if piece['handle'] == handle), None),
+                bytes=os.path.getsize(handle) if os.path.isfile(handle) else None,
+                status='A',
+                source='rman_output'
+            )
+            for handle in handles
+        ]
+
+    def _in_clause(self, column: str, prefix: str, values: List[str], params: Dict[str, Any]) -> str:
+        names = []
+        for index, value in enumerate(values):
+            params[f"{prefix}{index}"] = value
+            names.append(f":{prefix}{index}")
+        return f" AND {column} IN ({', '.join(names)})"
     
     def _extract_oracle_errors(self, output: str) -> str:
         """Extrae errores específicos de Oracle/RMAN del output"""
@@ -310,21 +672,37 @@ class OracleService:
         
         return "\n".join(errors) if errors else ""
     
-    def _extract_backup_files(self, backup_dir: str) -> List[str]:
-        """Extrae la lista de archivos de backup del directorio"""
-        backup_files = []
-        try:
-            for file in os.listdir(backup_dir):
-                if file.endswith('.bkp'):
-                    file_path = os.path.join(backup_dir, file)
-                    backup_files.append(file_path)
-        except Exception as e:
-            logger.error(f"Error extrayendo archivos de backup: {str(e)}")
-        
-        return backup_files
+    def get_existing_backup_sets(self, backup_set_keys: List[int]) -> set:
+        """Claves de backup set que aún figuran en el control file (lanza excepción si no se puede consultar)"""
+        existing = set()
+        keys = sorted(set(backup_set_keys))
+        for start in range(0, len(keys), MAX_IN_LIST):
+            params: Dict[str, Any] = {}
+            query = EXISTING_BACKUP_SETS_QUERY + self._in_clause("s.RECID", "bs", keys[start:start + MAX_IN_LIST], params)
+            existing.update(row[0] for row in self.connection.execute_query(query, params))
+        return existing
+    
+    def generate_delete_backupsets_script(self, backup_set_keys: List[int], command_id: Optional[str] = None) -> str:
+        """Script RMAN que elimina backup sets completos (piezas y registros del control file)"""
+        script_lines = ["RUN {"]
+        if command_id:
+            script_lines.append(f"  SET COMMAND ID TO '{command_id}';")
+        keys = ", ".join(str(key) for key in sorted(set(backup_set_keys)))
+        script_lines.extend([f"  DELETE NOPROMPT BACKUPSET {keys};", "}", "EXIT;"])
+        return "\n".join(script_lines)
+    
+    def generate_catalog_maintenance_script(self, step: str, command_id: Optional[str] = None) -> str:
+        """Script RMAN de un paso del mantenimiento del catálogo (``crosscheck`` o ``delete_expired``)"""
+        if step not in CATALOG_MAINTENANCE_COMMANDS:
+            raise ValueError(f"Paso de mantenimiento no soportado: {step}")
+        script_lines = ["RUN {"]
+        if command_id:
+            script_lines.append(f"  SET COMMAND ID TO '{command_id}';")
+        script_lines.extend([f"  {CATALOG_MAINTENANCE_COMMANDS[step]}", "}", "EXIT;"])
+        return "\n".join(script_lines)
     
     def verify_backup(self, backup_files: List[str]) -> bool:
-        """Verifica la integridad básica de los archivos de backup"""
+        """Comprobación rápida de existencia y tamaño (la lectura con RMAN la hace backup_verifier)"""
         if not backup_files:
             logger.warning("No hay archivos de backup para verificar")
             return False
@@ -353,8 +731,36 @@ class OracleService:
             logger.error(f"Error en verificación de backup: {str(e)}")
         return False
     
-    def restore_test(self, backup_files: List[str]) -> bool:
-        """Realiza una prueba de restauración (opcional)"""
-        # Esta función podría implementar una verificación más completa
-        # realizando una restauración de prueba en un área temporal
-        return self.verify_backup(backup_files)
\ No newline at end of file
+    def generate_validate_script(
+        self,
+        mode: str,
+        backup_set_keys: Optional[List[int]] = None,
+        tablespaces: Optional[List[str]] = None,
+        command_id: Optional[str] = None
+    ) -> str:
+        """Script RMAN de verificación (no escribe datafiles).
+
+        - ``backupset``: VALIDATE BACKUPSET lee cada pieza de la ejecución y
+          comprueba sus bloques.
+        - ``restore``: RESTORE ... VALIDATE comprueba que los backups que RMAN
+          elegiría para restaurar la BD (o los ``tablespaces`` de un backup
+          parcial) existen y son legibles.
+        """
+        check_logical = " CHECK LOGICAL" if settings.VERIFY_CHECK_LOGICAL else ""
+        script_lines = ["RUN {"]
+        if command_id:
+            script_lines.append(f"  SET COMMAND ID TO '{command_id}';")
+        
+        if mode == 'backupset':
+            if not backup_set_keys:
+                raise ValueError("No hay backup sets registrados para validar")
+            keys = ", ".join(str(key) for key in sorted(set(backup_set_keys)))
+            script_lines.append(f"  VALIDATE{check_logical} BACKUPSET {keys};")
+        elif mode == 'restore':
+            target = f"TABLESPACE {', '.join(tablespaces)}" if tablespaces else "DATABASE"
+            script_lines.append(f"  RESTORE {target} VALIDATE{check_logical};")
+        else:
+            raise ValueError(f"Modo de verificación no soportado: {mode}")
+        
+        script_lines.extend(["}", "EXIT;"])
+        return "\n".join(script_lines)
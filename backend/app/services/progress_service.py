@@ -0,0 +1,211 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Set
+import logging
+from app.core.config import settings
+from app.utils.oracle_connection import OracleConnection
+from app.utils.rman_output_parser import parse_rman_line
+
+logger = logging.getLogger(__name__)
+
+# Sesiones RMAN etiquetadas con SET COMMAND ID TO 'run_<log_id>'
+LONGOPS_QUERY = """
+    SELECT s.CLIENT_INFO, l.OPNAME, l.SOFAR, l.TOTALWORK, l.ELAPSED_SECONDS, l.TIME_REMAINING
+    FROM V$SESSION_LONGOPS l
+    JOIN V$SESSION s ON s.SID = l.SID AND s.SERIAL# = l.SERIAL#
+    WHERE l.OPNAME LIKE 'RMAN%'
+      AND l.TOTALWORK > 0
+      AND s.CLIENT_INFO LIKE 'id=run\\_%' ESCAPE '\\'
+"""
+
+BLOCK_SIZE_QUERY = "SELECT VALUE FROM V$PARAMETER WHERE NAME = 'db_block_size'"
+
+
+def command_id_for_run(log_id: int) -> str:
+    """COMMAND ID usado en el script RMAN para identificar las sesiones de una ejecución"""
+    return f"run_{log_id}"
+
+
+class BackupProgressTracker:
+    """Seguimiento en vivo de los backups en ejecución.
+
+    Combina dos fuentes:
+      - la salida de RMAN (canales activos, fase, piezas generadas)
+      - muestreos de V$SESSION_LONGOPS para porcentaje, MB/s y ETA
+
+    Los cambios se publican a los suscriptores (endpoint SSE) como máximo una
+    vez por segundo por ejecución.
+    """
+
+    def __init__(self):
+        self._runs: Dict[int, Dict[str, Any]] = {}
+        self._dirty: Set[int] = set()
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._loop_task: Optional[asyncio.Task] = None
+        self._block_size: Optional[int] = None
+
+    def start_run(self, log_id: int, strategy_id: int, strategy_name: str):
+        self._runs[log_id] = {
+            'log_id': log_id,
+            'strategy_id': strategy_id,
+            'strategy_name': strategy_name,
+            'status': 'running',
+            'phase': 'starting',
+            'started_at': datetime.now().isoformat(),
+            'percent': 0.0,
+            'processed_mb': 0.0,
+            'throughput_mb_s': None,
+            'eta_seconds': None,
+            'active_channels': [],
+            'backup_sets_completed': 0,
+            'datafiles_processed': 0,
+            'pieces': 0,
+            'last_piece': None,
+            'last_error': None,
+            'updated_at': datetime.now().isoformat(),
+        }
+        self._dirty.add(log_id)
+        self._ensure_loop()
+
+    def finish_run(self, log_id: int, status: str):
+        run = self._runs.pop(log_id, None)
+        if run is None:
+            return
+        self._dirty.discard(log_id)
+        run.update({
+            'status': status,
+            'percent': 100.0 if status == 'completed' else run['percent'],
+            'eta_seconds': 0 if status == 'completed' else None,
+            'active_channels': [],
+            'updated_at': datetime.now().isoformat(),
+        })
+        self._publish({'event': 'finished', 'data': run})
+
+    async def handle_line(self, log_id: int, line: str):
+        """Actualiza el estado de una ejecución con una línea del log RMAN"""
+        run = self._runs.get(log_id)
+        event = parse_rman_line(line)
+        if run is None or event is None:
+            return
+
+        if event['type'] == 'set_start':
+            run['phase'] = event['phase']
+            if event['channel'] not in run['active_channels']:
+                run['active_channels'].append(event['channel'])
+        elif event['type'] == 'set_complete':
+            run['backup_sets_completed'] += 1
+            if event['channel'] in run['active_channels']:
+                run['active_channels'].remove(event['channel'])
+        elif event['type'] == 'datafile':
+            run['datafiles_processed'] += 1
+        elif event['type'] == 'piece':
+            run['pieces'] += 1
+            run['last_piece'] = event['handle']
+        elif event['type'] == 'error':
+            run['last_error'] = f"{event['code']}: {event['message']}"
+
+        run['updated_at'] = datetime.now().isoformat()
+        self._dirty.add(log_id)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [dict(run) for run in self._runs.values()]
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=100)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def _publish(self, message: Dict[str, Any]):
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Cliente lento: descartar el mensaje más antiguo
+                try:
+                    queue.get_nowait()
+                    queue.put_nowait(message)
+                except (asyncio.QueueEmpty, asyncio.QueueFull):
+                    pass
+
+    def _ensure_loop(self):
+        if self._loop_task is None or self._loop_task.done():
+            self._loop_task = asyncio.create_task(self._run_loop())
+
+    async def _run_loop(self):
+        """Publica cambios cada segundo y muestrea V$SESSION_LONGOPS periódicamente"""
+        last_sample = 0.0
+        while self._runs:
+            if time.monotonic() - last_sample >= settings.PROGRESS_SAMPLE_SECONDS:
+                last_sample = time.monotonic()
+                try:
+                    await self._sample_longops()
+                except Exception as e:
+                    logger.debug(f"No se pudo muestrear V$SESSION_LONGOPS: {str(e)}")
+
+            for log_id in list(self._dirty):
+                run = self._runs.get(log_id)
+                if run is not None:
+                    self._publish({'event': 'progress', 'data': dict(run)})
+            self._dirty.clear()
+
+            await asyncio.sleep(settings.PROGRESS_PUSH_SECONDS)
+
+    async def _sample_longops(self):
+        if self._block_size is None:
+            rows = await OracleConnection.execute_query_async(BLOCK_SIZE_QUERY)
+            self._block_size = int(rows[0][0]) if rows else 8192
+
+        rows = await OracleConnection.execute_query_async(LONGOPS_QUERY)
+        aggregates: Dict[int, tuple] = {}
+        details: Dict[int, List[tuple]] = {}
+        for client_info, opname, sofar, totalwork, elapsed, remaining in rows:
+            log_id = self._log_id_from_client_info(client_info)
+            if log_id not in self._runs:
+                continue
+            if 'aggregate input' in opname.lower():
+                aggregates[log_id] = (sofar, totalwork, elapsed, remaining)
+            elif 'aggregate' not in opname.lower():
+                details.setdefault(log_id, []).append((sofar, totalwork, elapsed, remaining))
+
+        for log_id, run in self._runs.items():
+            sample = aggregates.get(log_id)
+            if sample is None and log_id in details:
+                # Sin fila agregada: sumar el trabajo de los canales activos
+                channel_rows = details[log_id]
+                sample = (
+                    sum(row[0] for row in channel_rows),
+                    sum(row[1] for row in channel_rows),
+                    max(row[2] or 0 for row in channel_rows),
+                    max(row[3] or 0 for row in channel_rows),
+                )
+            if sample is None:
+                continue
+
+            sofar, totalwork, elapsed, remaining = sample
+            processed_mb = sofar * self._block_size / (1024 * 1024)
+            run['percent'] = round(min(sofar / totalwork * 100, 100.0), 2)
+            run['processed_mb'] = round(processed_mb, 2)
+            if elapsed:
+                run['throughput_mb_s'] = round(processed_mb / elapsed, 2)
+            if remaining is not None:
+                run['eta_seconds'] = int(remaining)
+            elif elapsed and sofar:
+                run['eta_seconds'] = int(elapsed * (totalwork - sofar) / sofar)
+            run['updated_at'] = datetime.now().isoformat()
+            self._dirty.add(log_id)
+
+    def _log_id_from_client_info(self, client_info: Optional[str]) -> Optional[int]:
+        # Formato: "id=run_42,rman channel=ORA_DISK_1"
+        try:
+            command_id = client_info.split(',')[0].split('=', 1)[1]
+            return int(command_id[len('run_'):])
+        except (AttributeError, IndexError, ValueError):
+            return None
+
+
+# Instancia global del seguimiento de progreso
+progress_tracker = BackupProgressTracker()
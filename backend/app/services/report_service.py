@@ -0,0 +1,247 @@
+import asyncio
+import glob
+import hashlib
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple, BinaryIO
+import logging
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.models.log import BackupStatus
+from app.repositories.log_repo import LogRepository
+from app.services.log_service import LogService
+from app.utils.pdf_writer import PdfWriter, PdfReport
+
+logger = logging.getLogger(__name__)
+
+# Incrementar al cambiar el diseño del reporte para invalidar la caché
+REPORT_LAYOUT_VERSION = 1
+
+FAILURE_COLUMNS = [("ID", 50), ("Estrategia", 130), ("Inicio", 110), ("Duración", 60), ("Error", 412)]
+RUN_COLUMNS = [
+    ("ID", 50), ("Estrategia", 120), ("Nivel", 55), ("Estado", 65), ("Inicio", 105),
+    ("Fin", 105), ("Duración", 55), ("Tamaño (MB)", 65), ("Mensaje", 142),
+]
+STRATEGY_COLUMNS = [
+    ("ID", 40), ("Estrategia", 200), ("Total", 60), ("Completados", 80), ("Fallidos", 70),
+    ("Éxito %", 60), ("Tamaño (MB)", 90), ("Duración media", 90), ("Último", 72),
+]
+
+
+def _format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return ""
+    seconds = int(seconds)
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{hours}h {minutes:02d}m" if hours else f"{minutes}m {seconds:02d}s"
+
+
+def _format_datetime(value: Optional[datetime]) -> str:
+    return value.strftime("%Y-%m-%d %H:%M:%S") if value else ""
+
+
+class AuditReportService:
+    """Genera el reporte PDF de auditoría de backups.
+
+    Los logs se leen por lotes desde ``LogRepository`` y las páginas se escriben
+    al archivo a medida que se completan, por lo que la memoria no depende del
+    número de filas. Los reportes de rangos ya cerrados se guardan en disco con
+    el hash de su contenido como nombre y se reutilizan mientras los datos no cambien.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.log_repo = LogRepository(db)
+        self.log_service = LogService(db)
+
+    async def get_pdf_report(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        strategy_id: Optional[int] = None
+    ) -> Tuple[str, bool]:
+        """Retorna la ruta del PDF y si es un archivo temporal que debe borrarse tras enviarlo"""
+        statistics = await self.log_service.get_range_statistics(
+            start_date, end_date, strategy_id, by_strategy=True
+        )
+        fingerprint = await self.log_repo.get_range_fingerprint(start_date, end_date, strategy_id)
+
+        # Un rango es cacheable si ya terminó y no tiene ejecuciones abiertas
+        cacheable = end_date < datetime.now() and statistics['running'] == 0
+
+        range_key = hashlib.sha256(
+            f"{start_date.isoformat()}|{end_date.isoformat()}|{strategy_id}".encode('utf-8')
+        ).hexdigest()[:16]
+        content_hash = hashlib.sha256(json.dumps({
+            'version': REPORT_LAYOUT_VERSION,
+            'range': range_key,
+            'fingerprint': fingerprint,
+            'statistics': statistics,
+        }, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+        await asyncio.to_thread(os.makedirs, settings.REPORT_CACHE_PATH, exist_ok=True)
+        cached_path = os.path.join(settings.REPORT_CACHE_PATH, f"audit_{range_key}_{content_hash}.pdf")
+        if cacheable and await asyncio.to_thread(os.path.exists, cached_path):
+            logger.info(f"📄 Reporte de auditoría servido desde caché: {os.path.basename(cached_path)}")
+            return cached_path, False
+
+        temp_path = os.path.join(settings.REPORT_CACHE_PATH, f".audit_{uuid.uuid4().hex}.tmp")
+        try:
+            await self._render(temp_path, start_date, end_date, strategy_id, statistics)
+        except Exception:
+            await asyncio.to_thread(_remove_if_exists, temp_path)
+            raise
+
+        if not cacheable:
+            return temp_path, True
+
+        await asyncio.to_thread(_store_in_cache, temp_path, cached_path, range_key)
+        logger.info(f"📄 Reporte de auditoría generado y cacheado: {os.path.basename(cached_path)}")
+        return cached_path, False
+
+    async def _render(
+        self,
+        path: str,
+        start_date: datetime,
+        end_date: datetime,
+        strategy_id: Optional[int],
+        statistics: Dict[str, Any]
+    ):
+        """Maqueta el reporte; la maquetación y las escrituras al archivo van en hilos"""
+        strategy_names = {
+            row['strategy_id']: row['strategy_name'] or f"Estrategia {row['strategy_id']}"
+            for row in statistics.get('by_strategy', [])
+        }
+        period = f"{_format_datetime(start_date)} a {_format_datetime(end_date)}"
+
+        output = await asyncio.to_thread(open, path, 'wb')
+        try:
+            report = await asyncio.to_thread(
+                _render_summary, output, period, strategy_id, strategy_names, statistics
+            )
+
+            await asyncio.to_thread(_begin_section, report, "Detalle de fallos", FAILURE_COLUMNS)
+            async for rows in self.log_repo.stream_export_rows(
+                start_date, end_date, strategy_id, status=BackupStatus.FAILED,
+                batch_size=settings.LOG_EXPORT_BATCH_SIZE
+            ):
+                await asyncio.to_thread(_add_rows, report, [
+                    [
+                        row['id'],
+                        strategy_names.get(row['strategy_id'], row['strategy_id']),
+                        _format_datetime(row['start_time']),
+                        _format_duration(row['duration_seconds']),
+                        row['error_message'] or row['message'],
+                    ]
+                    for row in rows
+                ], 4)
+            report.end_table()
+
+            await asyncio.to_thread(_begin_section, report, "Registro de ejecuciones", RUN_COLUMNS)
+            async for rows in self.log_repo.stream_export_rows(
+                start_date, end_date, strategy_id,
+                batch_size=settings.LOG_EXPORT_BATCH_SIZE
+            ):
+                await asyncio.to_thread(_add_rows, report, [
+                    [
+                        row['id'],
+                        strategy_names.get(row['strategy_id'], row['strategy_id']),
+                        row['level'].value,
+                        row['status'].value,
+                        _format_datetime(row['start_time']),
+                        _format_datetime(row['end_time']),
+                        _format_duration(row['duration_seconds']),
+                        row['backup_size_mb'] if row['backup_size_mb'] is not None else "",
+                        row['message'],
+                    ]
+                    for row in rows
+                ])
+            report.end_table()
+
+            await asyncio.to_thread(report.finish)
+        finally:
+            await asyncio.to_thread(output.close)
+
+
+def _render_summary(
+    output: BinaryIO,
+    period: str,
+    strategy_id: Optional[int],
+    strategy_names: Dict[int, str],
+    statistics: Dict[str, Any]
+) -> PdfReport:
+    """Encabezado, resumen y tabla por estrategia (escribe al archivo)"""
+    report = PdfReport(
+        PdfWriter(output, title=f"Reporte de auditoría de backups ({period})"),
+        header=f"{settings.APP_TITLE} - Reporte de auditoría - {period}"
+    )
+
+    report.heading("Reporte de auditoría de backups", size=16)
+    report.key_values([
+        ("Periodo", period),
+        ("Estrategia", strategy_names.get(strategy_id, strategy_id) if strategy_id else "Todas"),
+        ("Generado", _format_datetime(datetime.now())),
+    ])
+    report.spacer()
+
+    report.heading("Resumen")
+    report.key_values([
+        ("Total de ejecuciones", statistics['total_backups']),
+        ("Completadas", statistics['completed']),
+        ("Fallidas", statistics['failed']),
+        ("En ejecución", statistics['running']),
+        ("Tasa de éxito", f"{statistics['success_rate']}%"),
+        ("Tamaño total (MB)", statistics['total_size_mb']),
+        ("Duración media", _format_duration(statistics['average_duration_seconds'])),
+    ])
+    report.spacer()
+
+    if statistics['most_common_errors']:
+        report.heading("Errores más frecuentes")
+        report.begin_table([("Ocurrencias", 80), ("Error", 682)])
+        for error in statistics['most_common_errors']:
+            report.table_row([error['count'], error['error']])
+        report.end_table()
+
+    report.heading("Resumen por estrategia")
+    report.begin_table(STRATEGY_COLUMNS)
+    for row in statistics.get('by_strategy', []):
+        total = row['total_backups']
+        report.table_row([
+            row['strategy_id'],
+            strategy_names[row['strategy_id']],
+            total,
+            row['completed'],
+            row['failed'],
+            f"{row['completed'] / total * 100:.1f}" if total else "0.0",
+            row['total_size_mb'],
+            _format_duration(row['average_duration_seconds']),
+            row['last_backup'].strftime("%Y-%m-%d") if row['last_backup'] else "",
+        ])
+    report.end_table()
+    return report
+
+
+def _begin_section(report: PdfReport, title: str, columns: List[tuple]):
+    report.heading(title)
+    report.begin_table(columns)
+
+
+def _add_rows(report: PdfReport, rows: List[List[Any]], wrap_last: int = 1):
+    """Agrega un lote de filas; las páginas completas se escriben al archivo"""
+    for values in rows:
+        report.table_row(values, wrap_last=wrap_last)
+
+
+def _remove_if_exists(path: str):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def _store_in_cache(temp_path: str, cached_path: str, range_key: str):
+    # Reemplazar versiones anteriores del mismo rango (los datos cambiaron)
+    for stale in glob.glob(os.path.join(settings.REPORT_CACHE_PATH, f"audit_{range_key}_*.pdf")):
+        os.remove(stale)
+    os.replace(temp_path, cached_path)
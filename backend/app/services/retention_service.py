@@ -0,0 +1,198 @@
+import asyncio
+import glob
+import os
+from datetime import datetime
+from typing import Dict, Any, List, Tuple
+import logging
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.backup_executor import backup_executor
+from app.models.backup_piece import BackupPiece
+from app.models.strategy import Strategy, BackupType
+from app.repositories.backup_piece_repo import BackupPieceRepository
+from app.repositories.log_repo import LogRepository
+from app.repositories.strategy_repo import StrategyRepository
+from app.services.oracle_service import OracleService
+from app.services.rman_executor import RmanExecutor
+from app.utils.rman_output_parser import parse_rman_line
+from app.utils.retention_plan import build_retention_plan, plan_deletions
+
+logger = logging.getLogger(__name__)
+
+RETENTION_COMMAND_PREFIX = "RETENTION_"
+
+
+class RetentionEngine:
+    """Retención por ventana de recuperación a partir del catálogo backup_pieces.
+
+    Para cada estrategia se conserva todo lo necesario para recuperar a
+    cualquier momento de los últimos ``retention_days`` días: la ejecución
+    completada más reciente con un backup base (completo o nivel 0) anterior
+    al inicio de la ventana y todo lo posterior. Las ejecuciones anteriores a
+    esa base son obsoletas y se eliminan con ``DELETE BACKUPSET``, que borra
+    cada backup set entero junto con su registro en el control file. En las
+    estrategias de copias imagen se eliminan los nivel 1 anteriores a la
+    ventana que RECOVER COPY ya aplicó sobre la copia.
+
+    Se ejecuta como job propio (RETENTION_INTERVAL_HOURS), de a una estrategia
+    y en pausa mientras haya backups en curso.
+    """
+
+    def __init__(self):
+        self.executor = RmanExecutor()
+        self.oracle_service = OracleService()
+        self._lock = asyncio.Lock()
+        self._stats = {
+            'runs': 0,
+            'backup_sets_deleted': 0,
+            'pieces_deleted': 0,
+            'bytes_freed': 0,
+            'errors': 0,
+            'last_run_at': None,
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self._stats, 'running': self._lock.locked()}
+
+    async def plan(self, strategy: Strategy) -> Dict[str, Any]:
+        """Ejecuciones que la política eliminaría, sin borrar nada"""
+        plan, _ = await self._build_plan(strategy)
+        return plan
+
+    async def apply(self, strategy: Strategy, dry_run: bool = False) -> Dict[str, Any]:
+        """Elimina las ejecuciones obsoletas de una estrategia.
+
+        Con ``dry_run`` solo informa qué backup sets y archivos se eliminarían.
+        """
+        plan, obsolete = await self._build_plan(strategy)
+        summary = {**plan, 'dry_run': dry_run, 'backup_sets_deleted': 0, 'pieces_deleted': 0, 'bytes_freed': 0}
+        if not obsolete:
+            return summary
+
+        # Los sets que ya no están en el control file solo se marcan en el catálogo
+        backup_set_keys = sorted({piece.bs_key for piece in obsolete if piece.bs_key is not None})
+        existing = set()
+        if backup_set_keys:
+            existing = await asyncio.to_thread(self.oracle_service.get_existing_backup_sets, backup_set_keys)
+        deletions = plan_deletions(obsolete, existing)
+        if dry_run:
+            summary['backup_sets_to_delete'] = deletions['backup_sets']
+            summary['orphan_files_to_delete'] = [piece.handle for piece in deletions['orphan_files']]
+            return summary
+
+        if deletions['backup_sets']:
+            script = self.oracle_service.generate_delete_backupsets_script(
+                deletions['backup_sets'], f"{RETENTION_COMMAND_PREFIX}{strategy.id}"
+            )
+            execution = await self.executor.run_script(strategy.id, script)
+            errors = [
+                f"{event['code']}: {event['message']}"
+                for event in map(parse_rman_line, execution['stdout'].splitlines())
+                if event and event['type'] == 'error'
+            ]
+            if execution['returncode'] != 0 or execution['timed_out']:
+                raise RuntimeError(
+                    "RMAN no pudo eliminar los backup sets obsoletos: "
+                    + ("; ".join(errors[:5]) or execution['stderr'] or f"código {execution['returncode']}")
+                )
+
+        # Piezas sin backup set (tomadas de la salida de RMAN): se borran los archivos
+        removed_orphans = await asyncio.to_thread(self._remove_files, deletions['orphan_files'])
+        deleted = [piece for piece in obsolete if piece.bs_key is not None] + removed_orphans
+
+        async with AsyncSessionLocal() as db:
+            await BackupPieceRepository(db).mark_deleted([piece.id for piece in deleted])
+        await asyncio.to_thread(self._cleanup_run_directories, obsolete)
+
+        summary['backup_sets_deleted'] = len(deletions['backup_sets'])
+        summary['pieces_deleted'] = len(deleted)
+        summary['bytes_freed'] = sum(piece.bytes or 0 for piece in deleted)
+        self._stats['backup_sets_deleted'] += summary['backup_sets_deleted']
+        self._stats['pieces_deleted'] += summary['pieces_deleted']
+        self._stats['bytes_freed'] += summary['bytes_freed']
+        logger.info(
+            f"🗑️ Retención estrategia {strategy.id}: {len(plan['obsolete_runs'])} ejecuciones obsoletas, "
+            f"{len(deletions['backup_sets'])} backup sets, {summary['bytes_freed'] / (1024 * 1024):.2f} MB liberados"
+        )
+        return summary
+
+    async def run_all(self) -> Dict[str, Any]:
+        """Aplica la retención a todas las estrategias, de a una"""
+        if self._lock.locked():
+            return {'skipped': True, 'reason': 'La retención ya está en ejecución'}
+
+        async with self._lock:
+            async with AsyncSessionLocal() as db:
+                strategies = await StrategyRepository(db).get_all()
+
+            results = []
+            for strategy in strategies:
+                # Prioridad baja: no competir con los backups en curso
+                while backup_executor.get_status()['running_count'] > 0:
+                    await asyncio.sleep(settings.RETENTION_PAUSE_SECONDS)
+                try:
+                    results.append(await self.apply(strategy))
+                except Exception as e:
+                    self._stats['errors'] += 1
+                    logger.error(f"❌ Error aplicando retención a la estrategia {strategy.id}: {str(e)}")
+                    results.append({'strategy_id': strategy.id, 'error': str(e)})
+
+        self._stats['runs'] += 1
+        self._stats['last_run_at'] = datetime.now().isoformat()
+        return {
+            'strategies': len(results),
+            'backup_sets_deleted': sum(result.get('backup_sets_deleted', 0) for result in results),
+            'bytes_freed': sum(result.get('bytes_freed', 0) for result in results),
+            'results': results,
+        }
+
+    async def scheduled_run(self):
+        """Punto de entrada del job programado"""
+        try:
+            await self.run_all()
+        except Exception as e:
+            logger.error(f"Error en el job de retención: {str(e)}", exc_info=True)
+
+    async def _build_plan(self, strategy: Strategy) -> Tuple[Dict[str, Any], List[BackupPiece]]:
+        async with AsyncSessionLocal() as db:
+            pieces = await BackupPieceRepository(db).get_available_by_strategy(strategy.id)
+            statuses = await LogRepository(db).get_statuses({piece.log_id for piece in pieces})
+        image_copy = str((strategy.custom_parameters or {}).get('incremental_mode') or '').lower() == 'image_copy'
+        return build_retention_plan(
+            strategy.id, strategy.retention_days or settings.RETENTION_DAYS, pieces, statuses, datetime.now(),
+            image_copy=strategy.backup_type == BackupType.INCREMENTAL and image_copy
+        )
+
+    def _remove_files(self, pieces: List[BackupPiece]) -> List[BackupPiece]:
+        removed = []
+        for piece in pieces:
+            try:
+                os.remove(piece.handle)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.error(f"No se pudo eliminar la pieza {piece.handle}: {str(e)}")
+                continue
+            removed.append(piece)
+        return removed
+
+    def _cleanup_run_directories(self, pieces: List[BackupPiece]):
+        """Borra los manifiestos de las ejecuciones eliminadas y los directorios que quedan vacíos"""
+        directories = {os.path.dirname(piece.handle) for piece in pieces}
+        log_ids = {piece.log_id for piece in pieces}
+        for directory in directories:
+            for log_id in log_ids:
+                for manifest in glob.glob(os.path.join(directory, f"manifest_{log_id}.*")):
+                    try:
+                        os.remove(manifest)
+                    except OSError:
+                        pass
+            try:
+                os.rmdir(directory)
+                logger.info(f"Directorio de backups vacío eliminado: {directory}")
+            except OSError:
+                pass  # No está vacío: quedan piezas de ejecuciones vigentes
+
+
+# Instancia global del motor de retención
+retention_engine = RetentionEngine()
@@ -0,0 +1,256 @@
+import asyncio
+import os
+import subprocess
+import tempfile
+import logging
+from typing import Dict, Any, Optional, List, Callable, Awaitable, Union
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Callback que recibe (stream, línea) por cada línea emitida por RMAN
+OutputHandler = Callable[[str, str], Awaitable[None]]
+
+STREAM_LIMIT = 1024 * 1024  # Máximo por línea leída del subproceso
+
+
+class RmanExecutor:
+    """Ejecuta RMAN como subproceso asyncio sin bloquear el event loop.
+
+    Cada ejecución se registra por ``run_id`` para poder cancelarla desde la API.
+    Si el event loop no soporta subprocesos (SelectorEventLoop en Windows, usado
+    por uvicorn con --reload), se recurre a un hilo con ``subprocess.Popen``.
+    """
+
+    def __init__(self):
+        self._processes: Dict[int, Union[asyncio.subprocess.Process, subprocess.Popen]] = {}
+        self._cancelled: set = set()
+
+    def build_command(self, cmdfile: str, log_file: Optional[str] = None) -> List[str]:
+        """Construye la línea de comandos de RMAN como lista de argumentos"""
+        command = [settings.RMAN_PATH, "target", f"'{settings.RMAN_TARGET}'", f"cmdfile={cmdfile}"]
+        if log_file:
+            command.append(f"log={log_file}")
+        return command
+
+    def is_running(self, run_id: int) -> bool:
+        return run_id in self._processes
+
+    def get_running_ids(self) -> List[int]:
+        return list(self._processes.keys())
+
+    async def run(
+        self,
+        run_id: int,
+        cmdfile: str,
+        log_file: Optional[str] = None,
+        timeout: Optional[float] = None,
+        on_output: Optional[OutputHandler] = None
+    ) -> Dict[str, Any]:
+        """Ejecuta RMAN y espera a que termine, transmitiendo stdout/stderr línea a línea"""
+        command = self.build_command(cmdfile, log_file)
+        timeout = timeout or settings.RMAN_TIMEOUT_SECONDS
+        logger.info(f"Comando RMAN (run {run_id}): {' '.join(command)}")
+
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                limit=STREAM_LIMIT
+            )
+        except NotImplementedError:
+            logger.warning("El event loop no soporta subprocesos asyncio; usando hilo dedicado")
+            return await self._run_in_thread(run_id, command, timeout, on_output)
+
+        self._processes[run_id] = process
+        result = self._empty_result()
+
+        try:
+            stdout_task = asyncio.create_task(self._pump(process.stdout, 'stdout', on_output))
+            stderr_task = asyncio.create_task(self._pump(process.stderr, 'stderr', on_output))
+
+            try:
+                await asyncio.wait_for(process.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                result['timed_out'] = True
+                logger.error(f"Timeout en ejecución RMAN (run {run_id}) tras {timeout} segundos")
+                await self._terminate(process)
+
+            stdout_lines, stderr_lines = await asyncio.gather(stdout_task, stderr_task)
+            result['stdout'] = "\n".join(stdout_lines)
+            result['stderr'] = "\n".join(stderr_lines)
+            result['returncode'] = process.returncode
+            result['cancelled'] = run_id in self._cancelled
+            return result
+
+        except asyncio.CancelledError:
+            # La tarea que esperaba el backup fue cancelada: no dejar RMAN huérfano
+            await self._terminate(process)
+            raise
+        finally:
+            self._processes.pop(run_id, None)
+            self._cancelled.discard(run_id)
+
+    async def run_script(
+        self,
+        run_id: int,
+        script: str,
+        timeout: Optional[float] = None,
+        on_output: Optional[OutputHandler] = None
+    ) -> Dict[str, Any]:
+        """Ejecuta un script RMAN corto desde un archivo temporal que se borra al terminar"""
+        temp_file = tempfile.NamedTemporaryFile(mode='w', suffix='.rman', delete=False, encoding='utf-8')
+        try:
+            temp_file.write(script)
+            temp_file.close()
+            return await self.run(run_id, temp_file.name, timeout=timeout, on_output=on_output)
+        finally:
+            try:
+                os.remove(temp_file.name)
+            except OSError:
+                pass
+
+    async def cancel(self, run_id: int) -> bool:
+        """Cancela una ejecución de RMAN en curso"""
+        process = self._processes.get(run_id)
+        if process is None:
+            return False
+
+        self._cancelled.add(run_id)
+        logger.warning(f"🛑 Cancelando ejecución RMAN (run {run_id})")
+        if isinstance(process, subprocess.Popen):
+            await asyncio.to_thread(self._terminate_blocking, process)
+        else:
+            await self._terminate(process)
+        return True
+
+    async def _pump(
+        self,
+        stream: asyncio.StreamReader,
+        name: str,
+        on_output: Optional[OutputHandler]
+    ) -> List[str]:
+        """Lee un stream del subproceso línea a línea"""
+        lines = []
+        while True:
+            raw = await stream.readline()
+            if not raw:
+                break
+            line = raw.decode('utf-8', errors='ignore').rstrip('\r\n')
+            lines.append(line)
+            if on_output:
+                try:
+                    await on_output(name, line)
+                except Exception as e:
+                    logger.warning(f"Error procesando salida RMAN: {str(e)}")
+        return lines
+
+    async def _terminate(self, process: asyncio.subprocess.Process, grace_seconds: float = 10):
+        """Termina el proceso RMAN, forzando kill si no responde"""
+        if process.returncode is not None:
+            return
+        try:
+            process.terminate()
+            await asyncio.wait_for(process.wait(), timeout=grace_seconds)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+        except ProcessLookupError:
+            pass
+
+    async def _run_in_thread(
+        self,
+        run_id: int,
+        command: List[str],
+        timeout: float,
+        on_output: Optional[OutputHandler]
+    ) -> Dict[str, Any]:
+        """Alternativa para loops sin soporte de subprocesos: Popen en un hilo"""
+        loop = asyncio.get_running_loop()
+
+        def forward(name: str, line: str):
+            if on_output:
+                asyncio.run_coroutine_threadsafe(on_output(name, line), loop)
+
+        process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding='utf-8',
+            errors='ignore'
+        )
+        self._processes[run_id] = process
+        result = self._empty_result()
+
+        try:
+            stdout_lines, stderr_lines, timed_out = await asyncio.to_thread(
+                self._communicate_blocking, process, timeout, forward
+            )
+            result['stdout'] = "\n".join(stdout_lines)
+            result['stderr'] = "\n".join(stderr_lines)
+            result['returncode'] = process.returncode
+            result['timed_out'] = timed_out
+            result['cancelled'] = run_id in self._cancelled
+            return result
+        except asyncio.CancelledError:
+            await asyncio.to_thread(self._terminate_blocking, process)
+            raise
+        finally:
+            self._processes.pop(run_id, None)
+            self._cancelled.discard(run_id)
+
+    def _communicate_blocking(self, process: subprocess.Popen, timeout: float, forward):
+        import threading
+
+        stdout_lines: List[str] = []
+        stderr_lines: List[str] = []
+
+        def read(stream, name, target):
+            for line in iter(stream.readline, ''):
+                line = line.rstrip('\r\n')
+                target.append(line)
+                forward(name, line)
+            stream.close()
+
+        readers = [
+            threading.Thread(target=read, args=(process.stdout, 'stdout', stdout_lines), daemon=True),
+            threading.Thread(target=read, args=(process.stderr, 'stderr', stderr_lines), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+
+        timed_out = False
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            timed_out = True
+            self._terminate_blocking(process)
+
+        for reader in readers:
+            reader.join()
+        return stdout_lines, stderr_lines, timed_out
+
+    def _terminate_blocking(self, process: subprocess.Popen, grace_seconds: float = 10):
+        if process.poll() is not None:
+            return
+        process.terminate()
+        try:
+            process.wait(timeout=grace_seconds)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+    def _empty_result(self) -> Dict[str, Any]:
+        return {
+            'returncode': None,
+            'stdout': '',
+            'stderr': '',
+            'timed_out': False,
+            'cancelled': False
+        }
+
+
+# Instancia global compartida por el scheduler y la API
+rman_executor = RmanExecutor()
@@ -0,0 +1,129 @@
+import asyncio
+import os
+import re
+from collections import deque
+from typing import Optional, Callable, Awaitable, List
+import logging
+from app.core.config import settings
+from app.utils.rman_log_store import RmanLogWriter
+
+logger = logging.getLogger(__name__)
+
+# Callback que recibe cada línea completa del log RMAN
+LineHandler = Callable[[str], Awaitable[None]]
+
+ERROR_PATTERN = re.compile(r'(RMAN|ORA)-\d+: [^\n]+')
+MAX_READ_BYTES = 1024 * 1024
+MAX_COLLECTED_ERRORS = 50
+
+
+class RmanLogTailer:
+    """Sigue el archivo de log de RMAN mientras se escribe.
+
+    Los bytes nuevos se envían al ``RmanLogWriter`` (bloques comprimidos) y cada
+    línea completa se entrega a los ``line_handlers``. En memoria solo se
+    conserva la cola del log y los errores RMAN/ORA encontrados.
+    """
+
+    def __init__(
+        self,
+        log_file_path: str,
+        writer: RmanLogWriter,
+        line_handlers: Optional[List[LineHandler]] = None,
+        poll_interval: Optional[float] = None
+    ):
+        self.log_file_path = log_file_path
+        self.writer = writer
+        self.line_handlers = line_handlers or []
+        self.poll_interval = poll_interval or settings.RMAN_LOG_POLL_SECONDS
+        self.errors: List[str] = []
+        self._tail = deque()
+        self._tail_size = 0
+        self._position = 0
+        self._partial = b""
+        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def bytes_read(self) -> int:
+        return self._position
+
+    @property
+    def tail_text(self) -> str:
+        return b"".join(self._tail).decode('utf-8', errors='ignore')
+
+    def start(self):
+        self._task = asyncio.create_task(self._follow())
+
+    async def stop(self):
+        """Detiene el seguimiento tras leer lo que quede en el archivo"""
+        self._stop.set()
+        if self._task:
+            await self._task
+        await asyncio.to_thread(self.writer.close)
+
+    async def _follow(self):
+        while True:
+            stopping = self._stop.is_set()
+            try:
+                data = await asyncio.to_thread(self._read_new_bytes)
+            except Exception as e:
+                logger.warning(f"Error leyendo log RMAN {self.log_file_path}: {str(e)}")
+                data = b""
+
+            if data:
+                await asyncio.to_thread(self.writer.write, data)
+                self._remember_tail(data)
+                await self._emit_lines(data)
+                continue
+
+            if stopping:
+                break
+
+            await asyncio.to_thread(self.writer.flush_if_stale)
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+        if self._partial:
+            await self._dispatch(self._partial.decode('utf-8', errors='ignore').rstrip('\r'))
+            self._partial = b""
+
+    def _read_new_bytes(self) -> bytes:
+        if not os.path.exists(self.log_file_path):
+            return b""
+        with open(self.log_file_path, 'rb') as log_file:
+            log_file.seek(self._position)
+            data = log_file.read(MAX_READ_BYTES)
+        self._position += len(data)
+        return data
+
+    def _remember_tail(self, data: bytes):
+        self._tail.append(data)
+        self._tail_size += len(data)
+        while self._tail and self._tail_size - len(self._tail[0]) >= settings.RMAN_LOG_TAIL_BYTES:
+            self._tail_size -= len(self._tail.popleft())
+        # Un solo bloque puede medir hasta MAX_READ_BYTES: recortar el más antiguo
+        excess = self._tail_size - settings.RMAN_LOG_TAIL_BYTES
+        if excess > 0:
+            self._tail[0] = self._tail[0][excess:]
+            self._tail_size -= excess
+
+    async def _emit_lines(self, data: bytes):
+        lines = (self._partial + data).split(b"\n")
+        self._partial = lines.pop()
+        for raw in lines:
+            await self._dispatch(raw.decode('utf-8', errors='ignore').rstrip('\r'))
+
+    async def _dispatch(self, line: str):
+        if len(self.errors) < MAX_COLLECTED_ERRORS:
+            match = ERROR_PATTERN.search(line)
+            if match:
+                self.errors.append(match.group(0))
+
+        for handler in self.line_handlers:
+            try:
+                await handler(line)
+            except Exception as e:
+                logger.warning(f"Error procesando línea del log RMAN: {str(e)}")
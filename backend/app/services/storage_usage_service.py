@@ -0,0 +1,120 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, Any
+import logging
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.backup_executor import backup_executor
+from app.repositories.backup_piece_repo import BackupPieceRepository
+from app.repositories.storage_usage_repo import StorageUsageRepository
+from app.utils.file_utils import FileUtils
+from app.utils.storage_usage import disk_drift
+
+logger = logging.getLogger(__name__)
+
+
+class StorageUsageService:
+    """Índice de uso de disco de los backups (tabla backup_storage_usage).
+
+    BackupPieceRepository lo mantiene al registrar, eliminar o no encontrar
+    piezas, así que las consultas por estrategia, por día y el total leen unas
+    pocas filas agregadas en lugar de recorrer BACKUP_BASE_PATH.
+    ``reconcile`` compara el catálogo con los archivos de BACKUP_BASE_PATH
+    (las piezas borradas a mano pasan a scrub_status 'missing' y se informan
+    los archivos que no están catalogados) y luego reconstruye el índice desde
+    las piezas que ocupan disco, con la tabla bloqueada para que los backups de
+    otros procesos no se cuenten dos veces.
+    """
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self._tasks: set = set()
+        self._stats = {
+            'reconciles': 0,
+            'last_reconcile_at': None,
+            'last_reconcile_seconds': None,
+            'files': None,
+            'bytes': None,
+            'missing_pieces': None,
+            'untracked_files': None,
+            'untracked_bytes': None,
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self._stats, 'reconciling': self._lock.locked()}
+
+    def reconcile_in_background(self) -> asyncio.Task:
+        """Reconstruye el índice sin bloquear a quien lo pide"""
+        task = asyncio.create_task(self.reconcile())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def reconcile(self) -> Dict[str, Any]:
+        """Sincroniza el catálogo con el disco y reemplaza el índice con lo que registra backup_pieces"""
+        if self._lock.locked():
+            return {'skipped': True, 'reason': 'La reconciliación ya está en ejecución'}
+
+        async with self._lock:
+            # Los backups de este proceso registran sus piezas al terminar
+            while backup_executor.get_status()['running_count'] > 0:
+                await asyncio.sleep(settings.STORAGE_RECONCILE_PAUSE_SECONDS)
+
+            started = time.monotonic()
+            try:
+                async with AsyncSessionLocal() as db:
+                    piece_repo = BackupPieceRepository(db)
+                    # El catálogo se lee antes del recorrido: una pieza registrada
+                    # durante el recorrido no se confunde con una borrada
+                    pieces = await piece_repo.get_catalog_handles()
+                    disk_files = await asyncio.to_thread(FileUtils.scan_backup_files)
+                    drift = disk_drift(pieces, disk_files, settings.BACKUP_BASE_PATH)
+                    if drift['missing']:
+                        await piece_repo.update_scrub_results(
+                            {piece_id: 'missing' for piece_id in drift['missing']}, datetime.now()
+                        )
+                    usage = await StorageUsageRepository(db).rebuild_from_pieces()
+            except Exception as e:
+                logger.error(f"❌ Error reconciliando el uso de disco: {str(e)}", exc_info=True)
+                return {'error': str(e)}
+
+        rows = len(usage)
+        elapsed = round(time.monotonic() - started, 2)
+        files = sum(totals[0] for totals in usage.values())
+        size = sum(totals[1] for totals in usage.values())
+        self._stats.update({
+            'reconciles': self._stats['reconciles'] + 1,
+            'last_reconcile_at': datetime.now().isoformat(),
+            'last_reconcile_seconds': elapsed,
+            'files': files,
+            'bytes': size,
+            'missing_pieces': len(drift['missing']),
+            'untracked_files': drift['untracked_files'],
+            'untracked_bytes': drift['untracked_bytes'],
+        })
+        if drift['missing']:
+            logger.warning(f"⚠️ {len(drift['missing'])} piezas del catálogo ya no están en disco: marcadas 'missing'")
+        if drift['untracked_files']:
+            logger.warning(
+                f"⚠️ {drift['untracked_files']} archivos en disco no están en el catálogo "
+                f"({drift['untracked_bytes'] / (1024 * 1024):.2f} MB), p. ej. {drift['untracked_sample'][0]}"
+            )
+        logger.info(
+            f"💾 Uso de disco reconciliado en {elapsed}s: {files} archivos, "
+            f"{size / (1024 * 1024):.2f} MB en {rows} filas (estrategia, día)"
+        )
+        return {
+            'rows': rows,
+            'files': files,
+            'bytes': size,
+            'missing_pieces': len(drift['missing']),
+            'untracked_files': drift['untracked_files'],
+            'untracked_bytes': drift['untracked_bytes'],
+            'untracked_sample': drift['untracked_sample'],
+            'elapsed_seconds': elapsed,
+        }
+
+
+# Instancia global del índice de uso de disco
+storage_usage = StorageUsageService()
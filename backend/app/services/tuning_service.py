@@ -0,0 +1,126 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+import logging
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.models.strategy import Strategy, StrategyUpdate, BackupType
+from app.repositories.log_repo import LogRepository
+from app.repositories.strategy_repo import StrategyRepository
+from app.services.oracle_service import OracleService
+from app.utils.rman_layout import resolve_compression_level
+from app.utils.tuning_plan import build_recommendation, window_runs
+
+logger = logging.getLogger(__name__)
+
+CPU_COUNT_QUERY = "SELECT VALUE FROM V$PARAMETER WHERE NAME = 'cpu_count'"
+
+# Rendimiento de E/S de los backups recientes: AGGREGATE es la lectura total de
+# cada canal y INPUT la de cada archivo (LONG_WAITS/IO_COUNT alto = disco lento)
+ASYNC_IO_QUERY = """
+    SELECT TYPE, SUM(EFFECTIVE_BYTES_PER_SECOND), COUNT(*), SUM(IO_COUNT), SUM(LONG_WAITS)
+    FROM V$BACKUP_ASYNC_IO
+    WHERE OPEN_TIME >= :since
+      AND TYPE IN ('AGGREGATE', 'INPUT')
+      AND EFFECTIVE_BYTES_PER_SECOND > 0
+    GROUP BY TYPE
+"""
+
+# Proporción de esperas largas de E/S a partir de la cual los discos limitan
+IO_BOUND_WAIT_RATIO = 0.2
+# Sin historial, muestras de V$BACKUP_ASYNC_IO de este periodo
+ASYNC_IO_LOOKBACK = timedelta(days=30)
+
+
+class TuningAdvisor:
+    """Recomienda canales y nivel de compresión por estrategia.
+
+    Parte del rendimiento por canal observado en las últimas ejecuciones
+    (backup_logs) o, sin historial, en V$BACKUP_ASYNC_IO, y busca la mayor
+    compresión que permita terminar dentro de la ventana objetivo con los CPU
+    disponibles. Si la E/S ya es el cuello de botella no propone más canales.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.log_repo = LogRepository(db)
+        self.strategy_repo = StrategyRepository(db)
+        self.oracle_service = OracleService()
+
+    async def recommend(self, strategy: Strategy) -> Dict[str, Any]:
+        strategy_data = strategy.model_dump()
+        params = strategy.custom_parameters or {}
+        target_minutes = int(params.get('target_window_minutes') or settings.BACKUP_TARGET_WINDOW_MINUTES)
+        current_channels = strategy.parallel_degree or 1
+        current_level = resolve_compression_level(strategy_data)
+
+        runs = await self.log_repo.get_run_metrics(strategy.id, settings.TUNING_HISTORY_RUNS)
+        # La ventana debe cubrir el peor caso: en las incrementales, los nivel 0
+        runs = window_runs(runs, strategy.backup_type == BackupType.INCREMENTAL)
+        since = min((run['start_time'] for run in runs), default=None)
+        metrics = await asyncio.to_thread(self._collect_database_metrics, strategy_data, since)
+        return build_recommendation(strategy.id, target_minutes, current_channels, current_level, runs, metrics)
+
+    async def apply(self, strategy: Strategy, recommendation: Optional[Dict[str, Any]] = None) -> Optional[Strategy]:
+        """Guarda en la estrategia los canales y la compresión recomendados"""
+        recommendation = recommendation or await self.recommend(strategy)
+        recommended = recommendation['recommended']
+        params = dict(strategy.custom_parameters or {})
+        if recommended['compression_level']:
+            params['compression_level'] = recommended['compression_level']
+
+        updated = await self.strategy_repo.update(
+            strategy.id,
+            StrategyUpdate(parallel_degree=recommended['parallel_degree'], custom_parameters=params)
+        )
+        if updated:
+            logger.info(
+                f"🎛️ Estrategia {strategy.id} ajustada: {recommended['parallel_degree']} canales, "
+                f"compresión {recommended['compression_level'] or 'desactivada'}"
+            )
+        return updated
+
+    async def auto_tune(self, strategy: Strategy) -> Optional[Dict[str, Any]]:
+        """Aplica la recomendación si la estrategia tiene custom_parameters['auto_tune']"""
+        if not (strategy.custom_parameters or {}).get('auto_tune'):
+            return None
+        recommendation = await self.recommend(strategy)
+        if recommendation['changed']:
+            await self.apply(strategy, recommendation)
+        return recommendation
+
+    def _collect_database_metrics(self, strategy_data: Dict[str, Any], since: Optional[datetime]) -> Dict[str, Any]:
+        metrics = {
+            'cpu_count': os.cpu_count() or 1,
+            'input_mb': 0.0,
+            'channel_rate_mb_s': None,
+            'io_wait_ratio': None,
+            'io_bound': False,
+        }
+        connection = self.oracle_service.connection
+
+        try:
+            rows = connection.execute_query(CPU_COUNT_QUERY)
+            if rows:
+                metrics['cpu_count'] = int(rows[0][0])
+        except Exception as e:
+            logger.warning(f"No se pudo leer cpu_count, se usan los CPU locales: {str(e)}")
+
+        datafiles = self.oracle_service.get_datafile_sizes(
+            self.oracle_service.get_backup_tablespaces(strategy_data)
+        )
+        metrics['input_mb'] = sum(datafile['bytes'] for datafile in datafiles) / (1024 * 1024)
+
+        try:
+            rows = connection.execute_query(ASYNC_IO_QUERY, {'since': since or datetime.now() - ASYNC_IO_LOOKBACK})
+        except Exception as e:
+            logger.warning(f"No se pudo consultar V$BACKUP_ASYNC_IO: {str(e)}")
+            rows = []
+        for io_type, total_rate, count, io_count, long_waits in rows:
+            if io_type == 'AGGREGATE' and count:
+                metrics['channel_rate_mb_s'] = total_rate / count / (1024 * 1024)
+            elif io_type == 'INPUT' and io_count:
+                metrics['io_wait_ratio'] = round(long_waits / io_count, 3)
+                metrics['io_bound'] = metrics['io_wait_ratio'] >= IO_BOUND_WAIT_RATIO
+
+        return metrics
@@ -0,0 +1,197 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+import logging
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.verification import Verification, VerificationCreate, VerificationMode, VerificationStatus
+from app.repositories.verification_repo import VerificationRepository
+from app.repositories.backup_piece_repo import BackupPieceRepository
+from app.repositories.strategy_repo import StrategyRepository
+from app.repositories.log_repo import LogRepository
+from app.services.oracle_service import OracleService
+from app.services.rman_executor import RmanExecutor
+from app.utils.rman_output_parser import parse_rman_line
+
+logger = logging.getLogger(__name__)
+
+VERIFICATION_COMMAND_PREFIX = "VERIFY_"
+
+
+class BackupVerifier:
+    """Verificación de backups con RMAN fuera del camino crítico del backup.
+
+    Las verificaciones se guardan en backup_verifications y las procesan
+    VERIFY_MAX_CONCURRENT workers con su propio RmanExecutor, así no ocupan
+    cupos de backup_executor ni alargan la ventana de backup. Las que quedaron
+    en cola o en curso al detener la aplicación se retoman al iniciar.
+    """
+
+    def __init__(self):
+        self.executor = RmanExecutor()
+        self.oracle_service = OracleService()
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[int, Dict[str, Any]] = {}
+        self._stats = {'verified': 0, 'failed': 0, 'errors': 0}
+
+    async def start(self):
+        if self._workers:
+            return
+        try:
+            async with AsyncSessionLocal() as db:
+                pending = await VerificationRepository(db).get_pending()
+        except Exception as e:
+            logger.warning(f"No se pudieron recuperar verificaciones pendientes: {str(e)}")
+            pending = []
+        for verification in pending:
+            self._queue.put_nowait(verification.id)
+        if pending:
+            logger.info(f"🔍 Verificaciones pendientes recuperadas: {len(pending)}")
+
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(max(1, settings.VERIFY_MAX_CONCURRENT))
+        ]
+        logger.info(f"✅ Verificador de backups iniciado ({len(self._workers)} workers)")
+
+    async def stop(self):
+        """Detiene los workers; RMAN en curso se termina y la verificación se retoma al iniciar"""
+        for worker in self._workers:
+            worker.cancel()
+        for worker in self._workers:
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
+        self._workers = []
+
+    async def enqueue(self, log_id: int, strategy_id: int, mode: VerificationMode) -> Verification:
+        """Registra una verificación en cola para las piezas de una ejecución"""
+        async with AsyncSessionLocal() as db:
+            verification = await VerificationRepository(db).create(
+                VerificationCreate(log_id=log_id, strategy_id=strategy_id, mode=mode)
+            )
+        self._queue.put_nowait(verification.id)
+        logger.info(f"🔍 Verificación {verification.id} ({mode.value}) en cola para el log {log_id}")
+        return verification
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            'workers': len(self._workers),
+            'queued': self._queue.qsize(),
+            'running': list(self._running.values()),
+        }
+
+    async def _worker(self):
+        while True:
+            verification_id = await self._queue.get()
+            try:
+                await self._verify(verification_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._stats['errors'] += 1
+                logger.error(f"Error en la verificación {verification_id}: {str(e)}", exc_info=True)
+                await self._finish(verification_id, {
+                    'status': VerificationStatus.ERROR,
+                    'rman_errors': str(e),
+                    'finished_at': datetime.now(),
+                })
+
+    async def _verify(self, verification_id: int):
+        async with AsyncSessionLocal() as db:
+            repo = VerificationRepository(db)
+            verification = await repo.get_by_id(verification_id)
+            if verification is None or verification.status not in (VerificationStatus.QUEUED, VerificationStatus.RUNNING):
+                return
+            pieces = await BackupPieceRepository(db).get_by_log(verification.log_id)
+            strategy = await StrategyRepository(db).get_by_id(verification.strategy_id)
+
+            mode = verification.mode
+            backup_set_keys = sorted({piece.bs_key for piece in pieces if piece.bs_key is not None and piece.status == 'A'})
+            if mode == VerificationMode.BACKUPSET and not backup_set_keys:
+                # Piezas tomadas de la salida de RMAN (sin catálogo): probar la restauración
+                logger.warning(f"Log {verification.log_id} sin backup sets en el catálogo, se usa RESTORE VALIDATE")
+                mode = VerificationMode.RESTORE
+
+            tablespaces = None
+            if mode == VerificationMode.RESTORE and strategy is not None:
+                tablespaces = await asyncio.to_thread(
+                    self.oracle_service.get_backup_tablespaces, strategy.model_dump()
+                )
+
+            started_at = datetime.now()
+            await repo.update(verification_id, {
+                'status': VerificationStatus.RUNNING,
+                'mode': mode.value,
+                'backup_sets': ", ".join(str(key) for key in backup_set_keys) or None,
+                'started_at': started_at,
+            })
+
+        script = self.oracle_service.generate_validate_script(
+            mode.value, backup_set_keys, tablespaces, f"{VERIFICATION_COMMAND_PREFIX}{verification_id}"
+        )
+        self._running[verification_id] = {
+            'verification_id': verification_id,
+            'log_id': verification.log_id,
+            'mode': mode.value,
+            'started_at': started_at.isoformat(),
+        }
+        started = time.monotonic()
+        try:
+            execution = await self.executor.run_script(
+                verification_id, script, timeout=settings.VERIFY_TIMEOUT_SECONDS
+            )
+        finally:
+            self._running.pop(verification_id, None)
+
+        output = "\n".join(filter(None, [execution['stdout'], execution['stderr']]))
+        events = [event for event in map(parse_rman_line, output.splitlines()) if event]
+        errors = [f"{event['code']}: {event['message']}" for event in events if event['type'] == 'error']
+        pieces_checked = len({event['handle'] for event in events if event['type'] == 'piece'})
+        if execution['timed_out']:
+            errors.append(f"Timeout: la verificación superó {settings.VERIFY_TIMEOUT_SECONDS} segundos")
+
+        verified = execution['returncode'] == 0 and not errors
+        self._stats['verified' if verified else 'failed'] += 1
+        await self._finish(verification_id, {
+            'status': VerificationStatus.VERIFIED if verified else VerificationStatus.FAILED,
+            'pieces_checked': pieces_checked,
+            'rman_errors': "\n".join(dict.fromkeys(errors)) or None,
+            'output_tail': output[-settings.VERIFY_OUTPUT_TAIL_BYTES:],
+            'finished_at': datetime.now(),
+            'duration_seconds': round(time.monotonic() - started, 2),
+        })
+        if verified:
+            logger.info(f"✅ Verificación {verification_id} correcta: {pieces_checked} piezas leídas ({mode.value})")
+        else:
+            logger.error(f"❌ Verificación {verification_id} fallida ({mode.value}): {errors[:3]}")
+
+    async def _finish(self, verification_id: int, values: Dict[str, Any]):
+        """Guarda el resultado y lo resume en los detalles del log de la ejecución"""
+        try:
+            async with AsyncSessionLocal() as db:
+                repo = VerificationRepository(db)
+                await repo.update(verification_id, values)
+                verification = await repo.get_by_id(verification_id)
+                if verification is None:
+                    return
+
+                await LogRepository(db).merge_details(verification.log_id, {
+                    'verification': {
+                        'id': verification.id,
+                        'mode': verification.mode.value,
+                        'status': verification.status.value,
+                        'backup_sets': verification.backup_sets,
+                        'pieces_checked': verification.pieces_checked,
+                        'finished_at': verification.finished_at.isoformat() if verification.finished_at else None,
+                    }
+                })
+        except Exception as e:
+            logger.error(f"No se pudo guardar el resultado de la verificación {verification_id}: {str(e)}")
+
+
+# Instancia global del verificador de backups
+backup_verifier = BackupVerifier()
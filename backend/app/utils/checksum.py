@@ -0,0 +1,78 @@
+import hashlib
+import mmap
+import os
+import time
+from typing import Dict, Any, Optional
+
+# Las funciones de este módulo se ejecutan en procesos del ProcessPoolExecutor
+# de checksum_service: no deben depender de la configuración ni de la BD.
+
+DEFAULT_ALGORITHM = "sha256"
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+# Por debajo de este tamaño una lectura normal es tan rápida como mmap
+MMAP_MIN_BYTES = 64 * 1024 * 1024
+
+
+def hash_file(
+    path: str,
+    algorithm: str = DEFAULT_ALGORITHM,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_bytes_per_second: float = 0
+) -> Dict[str, Any]:
+    """Calcula el checksum de un archivo por bloques.
+
+    Los archivos grandes se recorren con mmap (sin copiar cada bloque a un
+    buffer de Python). Con ``max_bytes_per_second`` > 0 la lectura se frena
+    para no competir por E/S con los backups en curso. Nunca lanza
+    excepciones: los errores se devuelven en ``error``.
+    """
+    result = {'path': path, 'algorithm': algorithm, 'bytes': None, 'checksum': None, 'error': None}
+    started = time.monotonic()
+    try:
+        digest = hashlib.new(algorithm)
+        with open(path, 'rb') as piece_file:
+            size = os.fstat(piece_file.fileno()).st_size
+            result['bytes'] = size
+            if size >= MMAP_MIN_BYTES:
+                with mmap.mmap(piece_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    view = memoryview(mapped)
+                    try:
+                        for offset in range(0, size, chunk_size):
+                            digest.update(view[offset:offset + chunk_size])
+                            _throttle(started, offset + chunk_size, max_bytes_per_second)
+                    finally:
+                        view.release()
+            else:
+                read = 0
+                for chunk in iter(lambda: piece_file.read(chunk_size), b''):
+                    digest.update(chunk)
+                    read += len(chunk)
+                    _throttle(started, read, max_bytes_per_second)
+        result['checksum'] = digest.hexdigest()
+    except FileNotFoundError:
+        result['error'] = 'missing'
+    except (OSError, ValueError) as e:
+        result['error'] = str(e)
+    result['elapsed_seconds'] = round(time.monotonic() - started, 3)
+    return result
+
+
+def compare_checksum(expected_bytes: Optional[int], expected_checksum: str, result: Dict[str, Any]) -> str:
+    """scrub_status de una pieza a partir del resultado de ``hash_file``"""
+    if result['error'] == 'missing':
+        return 'missing'
+    if result['error']:
+        return 'error'
+    if expected_bytes and result['bytes'] != expected_bytes:
+        return 'size_changed'
+    if result['checksum'] != expected_checksum:
+        return 'mismatch'
+    return 'ok'
+
+
+def _throttle(started: float, bytes_done: int, max_bytes_per_second: float):
+    if max_bytes_per_second <= 0:
+        return
+    ahead = bytes_done / max_bytes_per_second - (time.monotonic() - started)
+    if ahead > 0:
+        time.sleep(ahead)
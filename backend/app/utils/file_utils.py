@@ -1,12 +1,16 @@
 import os
-import shutil
 import logging
-from typing import Optional
-from datetime import datetime
+from typing import Optional, Dict
+from datetime import datetime, date
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Subdirectorio por fecha de ejecución dentro de strategy_{id}
+RUN_DIR_DATE_FORMAT = "%Y%m%d"
+# Subdirectorio de las copias imagen dentro de strategy_{id}
+IMAGE_COPY_DIRNAME = "image_copy"
+
 class FileUtils:
     @staticmethod
     def ensure_directory(path: str) -> bool:
@@ -37,6 +41,41 @@ class FileUtils:
         FileUtils.ensure_directory(strategy_path)
         return os.path.join(strategy_path, filename) if filename else strategy_path
     
+    @staticmethod
+    def get_run_backup_path(strategy_id: int, run_date: datetime) -> str:
+        """Directorio de una ejecución: BACKUP_BASE_PATH/strategy_{id}/YYYYMMDD (absoluto, para RMAN)"""
+        run_path = os.path.abspath(os.path.join(
+            settings.BACKUP_BASE_PATH,
+            f"strategy_{strategy_id}",
+            run_date.strftime(RUN_DIR_DATE_FORMAT)
+        ))
+        os.makedirs(run_path, exist_ok=True)
+        return run_path
+    
+    @staticmethod
+    def generate_run_tag(strategy_id: int, started_at: datetime) -> str:
+        """TAG RMAN único por ejecución (máximo 31 caracteres)"""
+        return f"S{strategy_id}_{started_at.strftime('%Y%m%d%H%M%S')}"
+    
+    @staticmethod
+    def get_image_copy_path(strategy_id: int) -> str:
+        """Directorio fijo de las copias imagen actualizadas incrementalmente.
+
+        No tiene formato de fecha, por lo que la limpieza de ejecuciones no lo toca.
+        """
+        copy_path = os.path.abspath(os.path.join(
+            settings.BACKUP_BASE_PATH,
+            f"strategy_{strategy_id}",
+            IMAGE_COPY_DIRNAME
+        ))
+        os.makedirs(copy_path, exist_ok=True)
+        return copy_path
+    
+    @staticmethod
+    def generate_image_copy_tag(strategy_id: int) -> str:
+        """TAG estable de las copias imagen de una estrategia (RECOVER COPY ... WITH TAG)"""
+        return f"S{strategy_id}_IMAGE_COPY"
+    
     @staticmethod
     def calculate_file_size(file_path: str) -> Optional[float]:
         """Calcula el tamaño de un archivo en MB"""
@@ -50,48 +89,38 @@ class FileUtils:
             return None
     
     @staticmethod
-    def cleanup_old_backups(strategy_id: int, retention_days: int) -> int:
-        """Elimina backups antiguos según la política de retención"""
+    def get_usage_date(file_path: str, fallback: Optional[datetime] = None) -> date:
+        """Día al que se imputa un archivo en el índice de uso de disco.
+
+        Es la fecha del directorio de la ejecución (YYYYMMDD); fuera de esos
+        directorios (p. ej. image_copy) se usa ``fallback``.
+        """
         try:
-            strategy_path = os.path.join(settings.BACKUP_BASE_PATH, f"strategy_{strategy_id}")
-            if not os.path.exists(strategy_path):
-                return 0
-            
-            cutoff_time = datetime.now().timestamp() - (retention_days * 24 * 60 * 60)
-            deleted_count = 0
-            
-            for filename in os.listdir(strategy_path):
-                file_path = os.path.join(strategy_path, filename)
-                if os.path.isfile(file_path):
-                    file_time = os.path.getctime(file_path)
-                    if file_time < cutoff_time:
-                        try:
-                            os.remove(file_path)
-                            deleted_count += 1
-                            logger.info(f"Backup antiguo eliminado: {filename}")
-                        except Exception as e:
-                            logger.error(f"Error eliminando {filename}: {str(e)}")
-            
-            return deleted_count
-        except Exception as e:
-            logger.error(f"Error limpiando backups antiguos: {str(e)}")
-            return 0
+            return datetime.strptime(os.path.basename(os.path.dirname(file_path)), RUN_DIR_DATE_FORMAT).date()
+        except ValueError:
+            return (fallback or datetime.now()).date()
     
     @staticmethod
-    def get_backup_directory_size(strategy_id: int) -> float:
-        """Calcula el tamaño total del directorio de backup en MB"""
-        try:
-            strategy_path = os.path.join(settings.BACKUP_BASE_PATH, f"strategy_{strategy_id}")
-            if not os.path.exists(strategy_path):
-                return 0.0
-            
-            total_size = 0
-            for dirpath, dirnames, filenames in os.walk(strategy_path):
+    def scan_backup_files() -> Dict[str, int]:
+        """Recorre BACKUP_BASE_PATH/strategy_* y retorna {ruta absoluta: bytes} de cada archivo"""
+        files: Dict[str, int] = {}
+        base_path = os.path.abspath(settings.BACKUP_BASE_PATH)
+        if not os.path.isdir(base_path):
+            return files
+        
+        with os.scandir(base_path) as entries:
+            strategy_dirs = [
+                entry.path for entry in entries
+                if entry.is_dir() and entry.name.startswith("strategy_") and entry.name[9:].isdigit()
+            ]
+        
+        for strategy_dir in strategy_dirs:
+            for dirpath, dirnames, filenames in os.walk(strategy_dir):
                 for filename in filenames:
                     file_path = os.path.join(dirpath, filename)
-                    total_size += os.path.getsize(file_path)
-            
-            return total_size / (1024 * 1024)  # Convertir a MB
-        except Exception as e:
-            logger.error(f"Error calculando tamaño del directorio: {str(e)}")
-            return 0.0
\ No newline at end of file
+                    try:
+                        files[file_path] = os.stat(file_path).st_size
+                    except OSError:
+                        continue  # Borrado durante el recorrido
+        
+        return files
@@ -1,3 +1,7 @@
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
 import cx_Oracle
 from typing import Optional, Dict, Any, List
 import logging
@@ -6,59 +10,216 @@ from app.core.config import settings
 logger = logging.getLogger(__name__)
 
 class OracleConnection:
-    _connection = None
-    
+    _pool = None
+    _pool_lock = threading.Lock()
+    _stats_lock = threading.Lock()
+    _stats = {
+        'checkouts': 0,
+        'checkout_failures': 0,
+        'waits': 0,
+        'total_wait_ms': 0.0,
+        'total_checkout_ms': 0.0,
+        'max_checkout_ms': 0.0,
+        'last_checkout_ms': 0.0,
+        'stale_dropped': 0,
+    }
+
+    @classmethod
+    def _build_dsn(cls) -> str:
+        """Construye el DSN a partir de la configuración"""
+        if ':' in settings.ORACLE_DSN and '/' in settings.ORACLE_DSN:
+            host_port, service_name = settings.ORACLE_DSN.split('/')
+            if ':' in host_port:
+                host, port = host_port.split(':')
+            else:
+                host, port = host_port, '1521'
+
+            return cx_Oracle.makedsn(host, port, service_name=service_name)
+        return settings.ORACLE_DSN
+
+    @classmethod
+    def get_pool(cls):
+        """Obtiene (o crea) el pool de sesiones Oracle"""
+        if cls._pool is None:
+            with cls._pool_lock:
+                if cls._pool is None:
+                    try:
+                        cls._pool = cx_Oracle.SessionPool(
+                            user=settings.ORACLE_USER,
+                            password=settings.ORACLE_PASSWORD,
+                            dsn=cls._build_dsn(),
+                            min=settings.ORACLE_POOL_MIN,
+                            max=settings.ORACLE_POOL_MAX,
+                            increment=settings.ORACLE_POOL_INCREMENT,
+                            threaded=True,
+                            getmode=cx_Oracle.SPOOL_ATTRVAL_TIMEDWAIT,
+                            wait_timeout=settings.ORACLE_POOL_WAIT_TIMEOUT_MS,
+                            timeout=settings.ORACLE_POOL_IDLE_TIMEOUT,
+                            max_lifetime_session=settings.ORACLE_POOL_MAX_LIFETIME,
+                            encoding="UTF-8"
+                        )
+                        logger.info(
+                            f"Pool de sesiones Oracle creado "
+                            f"(min={settings.ORACLE_POOL_MIN}, max={settings.ORACLE_POOL_MAX})"
+                        )
+                    except Exception as e:
+                        logger.error(f"Error al conectar con Oracle: {str(e)}")
+                        raise
+        return cls._pool
+
     @classmethod
-    def get_connection(cls):
-        """Obtiene una conexión a la base de datos Oracle"""
-        if cls._connection is None:
+    def close_pool(cls):
+        """Cierra el pool de sesiones"""
+        with cls._pool_lock:
+            if cls._pool is not None:
+                try:
+                    cls._pool.close(force=True)
+                    logger.info("Pool de sesiones Oracle cerrado")
+                except Exception as e:
+                    logger.warning(f"Error cerrando pool Oracle: {str(e)}")
+                finally:
+                    cls._pool = None
+
+    @classmethod
+    def _checkout(cls, pool):
+        """Toma una sesión del pool validándola con ping; descarta las caducadas"""
+        for _ in range(settings.ORACLE_POOL_MAX + 1):
+            connection = pool.acquire()
             try:
-                # Parsear DSN
-                if ':' in settings.ORACLE_DSN and '/' in settings.ORACLE_DSN:
-                    host_port, service_name = settings.ORACLE_DSN.split('/')
-                    if ':' in host_port:
-                        host, port = host_port.split(':')
-                    else:
-                        host, port = host_port, '1521'
-                    
-                    dsn = cx_Oracle.makedsn(host, port, service_name=service_name)
+                connection.ping()
+                return connection
+            except cx_Oracle.Error:
+                logger.warning("Sesión Oracle caducada descartada del pool")
+                with cls._stats_lock:
+                    cls._stats['stale_dropped'] += 1
+                try:
+                    pool.drop(connection)
+                except cx_Oracle.Error:
+                    pass
+        raise cx_Oracle.DatabaseError("No se pudo obtener una sesión válida del pool")
+
+    @classmethod
+    @contextmanager
+    def acquire(cls):
+        """Context manager que presta una conexión validada del pool"""
+        pool = cls.get_pool()
+        had_to_wait = pool.busy >= pool.max
+        started = time.perf_counter()
+        try:
+            connection = cls._checkout(pool)
+        except Exception:
+            with cls._stats_lock:
+                cls._stats['checkout_failures'] += 1
+            raise
+        cls._record_checkout((time.perf_counter() - started) * 1000, had_to_wait)
+
+        broken = False
+        try:
+            yield connection
+        except cx_Oracle.DatabaseError:
+            # Verificar si el error dejó la sesión inutilizable
+            try:
+                connection.ping()
+            except cx_Oracle.Error:
+                broken = True
+            raise
+        finally:
+            try:
+                if broken:
+                    with cls._stats_lock:
+                        cls._stats['stale_dropped'] += 1
+                    pool.drop(connection)
                 else:
-                    dsn = settings.ORACLE_DSN
-                
-                cls._connection = cx_Oracle.connect(
-                    user=settings.ORACLE_USER,
-                    password=settings.ORACLE_PASSWORD,
-                    dsn=dsn
-                )
-                logger.info("Conexión a Oracle establecida exitosamente")
-            except Exception as e:
-                logger.error(f"Error al conectar con Oracle: {str(e)}")
-                raise
-        return cls._connection
-    
+                    pool.release(connection)
+            except cx_Oracle.Error as e:
+                logger.warning(f"Error devolviendo sesión al pool: {str(e)}")
+
+    @classmethod
+    def _record_checkout(cls, elapsed_ms: float, had_to_wait: bool):
+        with cls._stats_lock:
+            stats = cls._stats
+            stats['checkouts'] += 1
+            stats['total_checkout_ms'] += elapsed_ms
+            stats['last_checkout_ms'] = elapsed_ms
+            stats['max_checkout_ms'] = max(stats['max_checkout_ms'], elapsed_ms)
+            if had_to_wait:
+                stats['waits'] += 1
+                stats['total_wait_ms'] += elapsed_ms
+
+    @classmethod
+    def get_pool_stats(cls) -> Dict[str, Any]:
+        """Estadísticas del pool para el endpoint de salud"""
+        with cls._stats_lock:
+            stats = dict(cls._stats)
+
+        checkouts = stats['checkouts']
+        pool_info = {
+            'initialized': cls._pool is not None,
+            'min': settings.ORACLE_POOL_MIN,
+            'max': settings.ORACLE_POOL_MAX,
+            'busy': 0,
+            'opened': 0,
+        }
+        if cls._pool is not None:
+            try:
+                pool_info['busy'] = cls._pool.busy
+                pool_info['opened'] = cls._pool.opened
+            except cx_Oracle.Error:
+                pass
+
+        pool_info.update({
+            'checkouts': checkouts,
+            'checkout_failures': stats['checkout_failures'],
+            'stale_dropped': stats['stale_dropped'],
+            'waits': stats['waits'],
+            'avg_wait_ms': round(stats['total_wait_ms'] / stats['waits'], 2) if stats['waits'] else 0.0,
+            'avg_checkout_ms': round(stats['total_checkout_ms'] / checkouts, 2) if checkouts else 0.0,
+            'max_checkout_ms': round(stats['max_checkout_ms'], 2),
+            'last_checkout_ms': round(stats['last_checkout_ms'], 2),
+        })
+        return pool_info
+
     @classmethod
     def execute_query(cls, query: str, params: Optional[Dict] = None) -> List:
         """Ejecuta una consulta y retorna los resultados"""
-        connection = cls.get_connection()
-        cursor = connection.cursor()
+        with cls.acquire() as connection:
+            cursor = connection.cursor()
+            try:
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+
+                if query.strip().upper().startswith('SELECT'):
+                    return cursor.fetchall()
+                else:
+                    connection.commit()
+                    return []
+            except Exception as e:
+                connection.rollback()
+                logger.error(f"Error ejecutando query: {str(e)}")
+                raise
+            finally:
+                cursor.close()
+
+    @classmethod
+    async def execute_query_async(cls, query: str, params: Optional[Dict] = None) -> List:
+        """Ejecuta una consulta en un hilo para no bloquear el event loop"""
+        return await asyncio.to_thread(cls.execute_query, query, params)
+
+    @classmethod
+    def ping(cls) -> bool:
+        """Verificación ligera de conectividad (sin consultar el diccionario)"""
         try:
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-            
-            if query.strip().upper().startswith('SELECT'):
-                return cursor.fetchall()
-            else:
-                connection.commit()
-                return []
-        except Exception as e:
-            connection.rollback()
-            logger.error(f"Error ejecutando query: {str(e)}")
-            raise
-        finally:
-            cursor.close()
-    
+            cls.execute_query("SELECT 1 FROM DUAL")
+            return True
+        except Exception:
+            return False
+
+    @classmethod
+    async def ping_async(cls) -> bool:
+        return await asyncio.to_thread(cls.ping)
+
     @classmethod
     def check_archivelog_mode(cls) -> bool:
         """Verifica si la base de datos está en modo ARCHIVELOG"""
@@ -69,16 +230,20 @@ class OracleConnection:
         except Exception as e:
             logger.error(f"Error verificando modo ARCHIVELOG: {str(e)}")
             return False
-    
+
+    @classmethod
+    async def check_archivelog_mode_async(cls) -> bool:
+        return await asyncio.to_thread(cls.check_archivelog_mode)
+
     @classmethod
     def get_database_info(cls) -> Dict[str, Any]:
         """Obtiene información general de la base de datos"""
         try:
             info = {}
-            
+
             # Información de la base de datos
             db_query = """
-                SELECT NAME, DBID, CREATED, LOG_MODE, OPEN_MODE, 
+                SELECT NAME, DBID, CREATED, LOG_MODE, OPEN_MODE,
                         (SELECT COUNT(*) FROM V$DATAFILE) as datafiles,
                         (SELECT COUNT(*) FROM V$TABLESPACE) as tablespaces
                 FROM V$DATABASE
@@ -94,44 +259,52 @@ class OracleConnection:
                     'datafiles_count': db_result[0][5],
                     'tablespaces_count': db_result[0][6]
                 })
-            
+
             # Información de tablespaces
             ts_query = """
-                SELECT TABLESPACE_NAME, STATUS, CONTENTS, 
-                        (SELECT SUM(BYTES) FROM DBA_DATA_FILES WHERE TABLESPACE_NAME = ts.TABLESPACE_NAME) as size_bytes
+                SELECT ts.TABLESPACE_NAME, ts.STATUS, ts.CONTENTS, df.size_bytes
                 FROM DBA_TABLESPACES ts
-                ORDER BY TABLESPACE_NAME
+                LEFT JOIN (
+                    SELECT TABLESPACE_NAME, SUM(BYTES) as size_bytes
+                    FROM DBA_DATA_FILES
+                    GROUP BY TABLESPACE_NAME
+                ) df ON df.TABLESPACE_NAME = ts.TABLESPACE_NAME
+                ORDER BY ts.TABLESPACE_NAME
             """
             ts_result = cls.execute_query(ts_query)
             info['tablespaces'] = [
                 {
-                    'name': row[0], 
-                    'status': row[1], 
+                    'name': row[0],
+                    'status': row[1],
                     'contents': row[2],
                     'size_bytes': row[3] or 0
                 }
                 for row in ts_result
             ]
-            
+
             # Información de schemas
             schema_query = """
                 SELECT USERNAME, ACCOUNT_STATUS, CREATED, DEFAULT_TABLESPACE
-                FROM DBA_USERS 
+                FROM DBA_USERS
                 WHERE ACCOUNT_STATUS = 'OPEN'
                 ORDER BY USERNAME
             """
             schema_result = cls.execute_query(schema_query)
             info['schemas'] = [
                 {
-                    'username': row[0], 
-                    'status': row[1], 
+                    'username': row[0],
+                    'status': row[1],
                     'created': row[2],
                     'default_tablespace': row[3]
                 }
                 for row in schema_result
             ]
-            
+
             return info
         except Exception as e:
             logger.error(f"Error obteniendo información de la BD: {str(e)}")
-            return {}
\ No newline at end of file
+            return {}
+
+    @classmethod
+    async def get_database_info_async(cls) -> Dict[str, Any]:
+        return await asyncio.to_thread(cls.get_database_info)
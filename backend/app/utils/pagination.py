@@ -0,0 +1,32 @@
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+from sqlalchemy import and_, or_
+
+# Paginación por clave (keyset) sobre (start_time DESC, id DESC): el id
+# desempata las filas con el mismo start_time para no repetir ni saltar filas.
+
+
+def encode_cursor(start_time: datetime, row_id: int) -> str:
+    """Cursor opaco con la clave de la última fila de la página"""
+    payload = json.dumps({'t': start_time.isoformat(), 'id': row_id})
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Lanza ValueError si el cursor no es uno generado por ``encode_cursor``"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return datetime.fromisoformat(payload['t']), int(payload['id'])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Cursor de paginación inválido: {cursor}") from e
+
+
+def keyset_condition(time_column, id_column, cursor: str):
+    """Filas posteriores al cursor en el orden (time_column DESC, id_column DESC)"""
+    cursor_time, cursor_id = decode_cursor(cursor)
+    return or_(
+        time_column < cursor_time,
+        and_(time_column == cursor_time, id_column < cursor_id)
+    )
@@ -0,0 +1,294 @@
+import zlib
+from collections import defaultdict
+from datetime import datetime
+from typing import BinaryIO, List, Optional, Sequence
+
+# Anchos (1/1000 em) de Helvetica para los caracteres ASCII 32-126
+HELVETICA_WIDTHS = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+DEFAULT_WIDTH = 556
+BOLD_FACTOR = 1.06
+
+# A4 apaisado, en puntos
+PAGE_WIDTH = 842
+PAGE_HEIGHT = 595
+MARGIN = 40
+
+
+# Tabla carácter -> ancho; los caracteres fuera de ASCII usan el ancho por defecto
+_WIDTH_TABLE = defaultdict(lambda: DEFAULT_WIDTH, {chr(32 + index): width for index, width in enumerate(HELVETICA_WIDTHS)})
+_char_width = _WIDTH_TABLE.__getitem__
+MAX_CHAR_WIDTH = max(HELVETICA_WIDTHS)
+
+
+def _measure(text: str) -> int:
+    return sum(map(_char_width, text))
+
+
+def _scale(size: float, bold: bool) -> float:
+    return size / 1000 * (BOLD_FACTOR if bold else 1)
+
+
+def text_width(text: str, size: float, bold: bool = False) -> float:
+    return _measure(text) * _scale(size, bold)
+
+
+def fit_text(text: str, max_width: float, size: float, bold: bool = False) -> str:
+    """Recorta ``text`` con '...' para que quepa en ``max_width``"""
+    limit = max_width / _scale(size, bold)
+    if len(text) * MAX_CHAR_WIDTH <= limit or _measure(text) <= limit:
+        return text
+
+    available = limit - 3 * _char_width(".")
+    used = 0
+    for index, char in enumerate(text):
+        used += _char_width(char)
+        if used > available:
+            return text[:index] + "..."
+    return text
+
+
+def wrap_text(text: str, max_width: float, size: float, max_lines: Optional[int] = None) -> List[str]:
+    """Divide ``text`` en líneas que quepan en ``max_width``"""
+    if max_lines:
+        # Evita medir textos enormes de los que solo se mostrarán unas líneas
+        text = text[:max_lines * 200]
+
+    limit = max_width / _scale(size, False)
+    space = _char_width(" ")
+    lines = []
+    for paragraph in text.splitlines() or [""]:
+        current, current_width = "", 0
+        for word in paragraph.split(" "):
+            word_width = _measure(word)
+            if not current and word_width <= limit:
+                current, current_width = word, word_width
+            elif current and current_width + space + word_width <= limit:
+                current, current_width = f"{current} {word}", current_width + space + word_width
+            else:
+                if current:
+                    lines.append(current)
+                current = fit_text(word, max_width, size)
+                current_width = _measure(current)
+        lines.append(current)
+
+    if max_lines and len(lines) > max_lines:
+        lines = lines[:max_lines]
+        lines[-1] = fit_text(lines[-1] + " ...", max_width, size)
+    return lines
+
+
+def _escape(text: str) -> bytes:
+    encoded = text.encode('cp1252', errors='replace')
+    return encoded.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+class PdfWriter:
+    """Escritor PDF mínimo que emite cada página al archivo en cuanto se cierra.
+
+    Solo mantiene en memoria el contenido de la página actual y la tabla de
+    offsets, por lo que el consumo no crece con el número de páginas. Usa las
+    fuentes estándar Helvetica/Helvetica-Bold (WinAnsiEncoding), que no se
+    incrustan en el archivo.
+    """
+
+    CATALOG_ID = 1
+    PAGES_ID = 2
+    FONT_ID = 3
+    BOLD_FONT_ID = 4
+
+    def __init__(self, output: BinaryIO, title: str = ""):
+        self.output = output
+        self.title = title
+        self._offsets = {}
+        self._next_id = 5
+        self._page_ids: List[int] = []
+        self._content: Optional[List[bytes]] = None
+        self._position = 0
+
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._write_object(self.FONT_ID, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+        self._write_object(self.BOLD_FONT_ID, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+
+    @property
+    def page_count(self) -> int:
+        return len(self._page_ids) + (1 if self._content is not None else 0)
+
+    def begin_page(self):
+        if self._content is not None:
+            self.end_page()
+        self._content = []
+
+    def end_page(self):
+        if self._content is None:
+            return
+        stream = zlib.compress(b"\n".join(self._content))
+        self._content = None
+
+        content_id = self._allocate_id()
+        self._write_object(
+            content_id,
+            b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream) + stream + b"\nendstream"
+        )
+        page_id = self._allocate_id()
+        self._write_object(page_id, (
+            f"<< /Type /Page /Parent {self.PAGES_ID} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 {self.FONT_ID} 0 R /F2 {self.BOLD_FONT_ID} 0 R >> >> "
+            f"/Contents {content_id} 0 R >>"
+        ).encode('ascii'))
+        self._page_ids.append(page_id)
+
+    def text(self, x: float, y: float, text: str, size: float = 9, bold: bool = False,
+             color: Sequence[float] = (0, 0, 0)):
+        font = "F2" if bold else "F1"
+        self._content.append(
+            b"%.3f %.3f %.3f rg BT /%s %.1f Tf %.2f %.2f Td (" % (*color, font.encode('ascii'), size, x, y)
+            + _escape(text) + b") Tj ET"
+        )
+
+    def line(self, x1: float, y1: float, x2: float, y2: float, width: float = 0.5,
+             color: Sequence[float] = (0.6, 0.6, 0.6)):
+        self._content.append(b"%.3f %.3f %.3f RG %.2f w %.2f %.2f m %.2f %.2f l S" % (*color, width, x1, y1, x2, y2))
+
+    def rect(self, x: float, y: float, width: float, height: float, fill: Sequence[float]):
+        self._content.append(b"%.3f %.3f %.3f rg %.2f %.2f %.2f %.2f re f" % (*fill, x, y, width, height))
+
+    def close(self):
+        """Escribe el árbol de páginas, el catálogo y la tabla xref"""
+        self.end_page()
+        kids = " ".join(f"{page_id} 0 R" for page_id in self._page_ids)
+        self._write_object(
+            self.PAGES_ID,
+            f"<< /Type /Pages /Kids [{kids}] /Count {len(self._page_ids)} >>".encode('ascii')
+        )
+        self._write_object(self.CATALOG_ID, f"<< /Type /Catalog /Pages {self.PAGES_ID} 0 R >>".encode('ascii'))
+        info_id = self._allocate_id()
+        created = datetime.now().strftime("D:%Y%m%d%H%M%S")
+        self._write_object(
+            info_id,
+            b"<< /Title (" + _escape(self.title) + b") /CreationDate (" + created.encode('ascii') + b") >>"
+        )
+
+        xref_position = self._position
+        size = self._next_id
+        lines = [b"xref", b"0 %d" % size, b"0000000000 65535 f "]
+        for object_id in range(1, size):
+            lines.append(b"%010d 00000 n " % self._offsets[object_id])
+        self._write(b"\n".join(lines) + b"\n")
+        self._write(
+            f"trailer\n<< /Size {size} /Root {self.CATALOG_ID} 0 R /Info {info_id} 0 R >>\n"
+            f"startxref\n{xref_position}\n%%EOF\n".encode('ascii')
+        )
+
+    def _allocate_id(self) -> int:
+        object_id = self._next_id
+        self._next_id += 1
+        return object_id
+
+    def _write_object(self, object_id: int, body: bytes):
+        self._offsets[object_id] = self._position
+        self._write(b"%d 0 obj\n" % object_id + body + b"\nendobj\n")
+
+    def _write(self, data: bytes):
+        self.output.write(data)
+        self._position += len(data)
+
+
+class PdfReport:
+    """Maquetación de flujo sobre ``PdfWriter``: títulos, párrafos y tablas con
+    salto de página automático, encabezado y pie con número de página."""
+
+    LINE_HEIGHT = 13
+    HEADER_FILL = (0.90, 0.92, 0.96)
+
+    def __init__(self, writer: PdfWriter, header: str):
+        self.writer = writer
+        self.header = header
+        self.y = 0.0
+        self._table_columns: Optional[List[tuple]] = None
+        self._new_page()
+
+    def heading(self, text: str, size: float = 13):
+        self._ensure_space(size + self.LINE_HEIGHT * 2)
+        self.y -= size + 4
+        self.writer.text(MARGIN, self.y, text, size=size, bold=True, color=(0.12, 0.23, 0.45))
+        self.y -= 6
+
+    def paragraph(self, text: str, size: float = 9, bold: bool = False):
+        for line in wrap_text(text, PAGE_WIDTH - 2 * MARGIN, size):
+            self._ensure_space(self.LINE_HEIGHT)
+            self.y -= self.LINE_HEIGHT
+            self.writer.text(MARGIN, self.y, line, size=size, bold=bold)
+
+    def spacer(self, height: float = 8):
+        self.y -= height
+
+    def key_values(self, items: Sequence[tuple], label_width: float = 180):
+        for label, value in items:
+            self._ensure_space(self.LINE_HEIGHT)
+            self.y -= self.LINE_HEIGHT
+            self.writer.text(MARGIN, self.y, label, bold=True)
+            self.writer.text(MARGIN + label_width, self.y, str(value))
+
+    def begin_table(self, columns: Sequence[tuple]):
+        """``columns``: secuencia de (título, ancho en puntos)"""
+        self._table_columns = list(columns)
+        self._ensure_space(self.LINE_HEIGHT * 3)
+        self._table_header()
+
+    def table_row(self, values: Sequence[str], wrap_last: int = 1):
+        """Agrega una fila; la última columna puede ocupar hasta ``wrap_last`` líneas"""
+        columns = self._table_columns
+        last_title, last_width = columns[-1]
+        last_lines = wrap_text(str(values[-1] or ""), last_width - 4, 8, max_lines=wrap_last) if wrap_last > 1 else None
+        height = self.LINE_HEIGHT * (len(last_lines) if last_lines else 1)
+
+        if self.y - height < MARGIN + 20:
+            self._new_page()
+            self._table_header()
+
+        self.y -= self.LINE_HEIGHT
+        x = MARGIN
+        for index, (value, (_, width)) in enumerate(zip(values, columns)):
+            if index == len(columns) - 1 and last_lines:
+                for line_number, line in enumerate(last_lines):
+                    self.writer.text(x + 2, self.y - line_number * self.LINE_HEIGHT, line, size=8)
+            else:
+                self.writer.text(x + 2, self.y, fit_text(str(value), width - 4, 8), size=8)
+            x += width
+        self.y -= height - self.LINE_HEIGHT
+        self.writer.line(MARGIN, self.y - 3, x, self.y - 3, width=0.3, color=(0.85, 0.85, 0.85))
+
+    def end_table(self):
+        self._table_columns = None
+        self.spacer()
+
+    def finish(self):
+        self.writer.close()
+
+    def _table_header(self):
+        self.y -= self.LINE_HEIGHT + 2
+        total_width = sum(width for _, width in self._table_columns)
+        self.writer.rect(MARGIN, self.y - 4, total_width, self.LINE_HEIGHT + 2, self.HEADER_FILL)
+        x = MARGIN
+        for title, width in self._table_columns:
+            self.writer.text(x + 2, self.y, fit_text(title, width - 4, 8, bold=True), size=8, bold=True)
+            x += width
+
+    def _ensure_space(self, height: float):
+        if self.y - height < MARGIN + 20:
+            self._new_page()
+
+    def _new_page(self):
+        self.writer.begin_page()
+        page_number = self.writer.page_count
+        self.writer.text(MARGIN, PAGE_HEIGHT - MARGIN + 10, self.header, size=8, color=(0.4, 0.4, 0.4))
+        self.writer.line(MARGIN, PAGE_HEIGHT - MARGIN + 4, PAGE_WIDTH - MARGIN, PAGE_HEIGHT - MARGIN + 4)
+        self.writer.text(PAGE_WIDTH - MARGIN - 50, MARGIN - 15, f"Página {page_number}", size=8, color=(0.4, 0.4, 0.4))
+        self.y = PAGE_HEIGHT - MARGIN - 6
@@ -0,0 +1,148 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Any, List, Tuple
+from app.models.log import BackupStatus
+
+# Cálculo puro de la política de retención (sin BD ni RMAN): recibe piezas de
+# backup_pieces (BackupPiece o cualquier objeto con los mismos atributos) y el
+# estado de cada ejecución.
+
+
+def is_base_piece(piece) -> bool:
+    """Pieza de un backup de datafiles desde el que se puede restaurar (completo o incremental nivel 0).
+
+    Los sets de solo control file o SPFILE también tienen BACKUP_TYPE 'D', por
+    eso se exige ``datafiles_included``.
+    """
+    if not getattr(piece, 'datafiles_included', False):
+        return False
+    return piece.backup_type == 'D' or (piece.backup_type == 'I' and piece.incremental_level == 0)
+
+
+def build_retention_plan(
+    strategy_id: int,
+    retention_days: int,
+    pieces: List[Any],
+    statuses: Dict[int, str],
+    now: datetime,
+    image_copy: bool = False
+) -> Tuple[Dict[str, Any], List[Any]]:
+    """Calcula la base de la ventana de recuperación y las ejecuciones anteriores a ella.
+
+    La base es la ejecución completada más reciente con un backup base que
+    terminó antes del inicio de la ventana; todo lo que terminó antes de que
+    empezara la base es obsoleto. Sin base no se elimina nada. Retorna el plan
+    y las piezas obsoletas.
+
+    Con ``image_copy`` la base es la copia imagen (V$DATAFILE_COPY, fuera de
+    backup_pieces): una ejecución que terminó antes de la ventana es obsoleta
+    cuando otra completada posterior ya aplicó su nivel 1 con RECOVER COPY.
+    """
+    window_start = now - timedelta(days=retention_days)
+
+    runs: Dict[int, List[Any]] = defaultdict(list)
+    for piece in pieces:
+        runs[piece.log_id].append(piece)
+
+    def started(run_pieces: List[Any]) -> datetime:
+        return min(piece.start_time or piece.completion_time or piece.created_at or now for piece in run_pieces)
+
+    def completed(run_pieces: List[Any]) -> datetime:
+        return max(piece.completion_time or piece.created_at or now for piece in run_pieces)
+
+    if image_copy:
+        return _image_copy_plan(strategy_id, retention_days, window_start, runs, statuses, started, completed)
+
+    baselines = [
+        log_id for log_id, run_pieces in runs.items()
+        if statuses.get(log_id) == BackupStatus.COMPLETED.value
+        and any(is_base_piece(piece) for piece in run_pieces)
+        and completed(run_pieces) <= window_start
+    ]
+    baseline = max(baselines, key=lambda log_id: completed(runs[log_id]), default=None)
+
+    obsolete_ids = []
+    if baseline is not None:
+        baseline_started = started(runs[baseline])
+        obsolete_ids = sorted(log_id for log_id, run_pieces in runs.items() if completed(run_pieces) < baseline_started)
+
+    plan = _plan_summary(strategy_id, retention_days, window_start, runs, obsolete_ids, completed)
+    plan['baseline_log_id'] = baseline
+    plan['baseline_completed_at'] = completed(runs[baseline]).isoformat() if baseline is not None else None
+    return plan, [piece for log_id in obsolete_ids for piece in runs[log_id]]
+
+
+RunTime = Callable[[List[Any]], datetime]
+
+
+def _image_copy_plan(
+    strategy_id: int,
+    retention_days: int,
+    window_start: datetime,
+    runs: Dict[int, List[Any]],
+    statuses: Dict[int, str],
+    started: RunTime,
+    completed: RunTime
+) -> Tuple[Dict[str, Any], List[Any]]:
+    """Ejecuciones de copias imagen cuyo nivel 1 ya se fusionó en la copia"""
+    merges = [
+        started(run_pieces) for log_id, run_pieces in runs.items()
+        if statuses.get(log_id) == BackupStatus.COMPLETED.value
+    ]
+    obsolete_ids = sorted(
+        log_id for log_id, run_pieces in runs.items()
+        if completed(run_pieces) <= window_start
+        and any(merge_started >= completed(run_pieces) for merge_started in merges)
+    )
+    plan = _plan_summary(strategy_id, retention_days, window_start, runs, obsolete_ids, completed)
+    plan['baseline_log_id'] = None
+    plan['baseline_completed_at'] = None
+    plan['image_copy'] = True
+    return plan, [piece for log_id in obsolete_ids for piece in runs[log_id]]
+
+
+def _plan_summary(
+    strategy_id: int,
+    retention_days: int,
+    window_start: datetime,
+    runs: Dict[int, List[Any]],
+    obsolete_ids: List[int],
+    completed: RunTime
+) -> Dict[str, Any]:
+    obsolete_runs = [
+        {
+            'log_id': log_id,
+            'completed_at': completed(runs[log_id]).isoformat(),
+            'pieces': len(runs[log_id]),
+            'bytes': sum(piece.bytes or 0 for piece in runs[log_id]),
+            'backup_sets': sorted({piece.bs_key for piece in runs[log_id] if piece.bs_key is not None}),
+        }
+        for log_id in obsolete_ids
+    ]
+    return {
+        'strategy_id': strategy_id,
+        'retention_days': retention_days,
+        'window_start': window_start.isoformat(),
+        'image_copy': False,
+        'kept_runs': len(runs) - len(obsolete_ids),
+        'obsolete_runs': obsolete_runs,
+        'reclaimable_bytes': sum(run['bytes'] for run in obsolete_runs),
+    }
+
+
+def plan_deletions(obsolete: List[Any], existing_backup_sets: set) -> Dict[str, List[Any]]:
+    """Reparte las piezas obsoletas según cómo se eliminan.
+
+    - ``backup_sets``: claves aún en el control file, para DELETE BACKUPSET.
+    - ``catalog_only``: piezas de sets que ya no están en el control file; solo se marcan.
+    - ``orphan_files``: piezas sin backup set (de la salida de RMAN); se borra el archivo.
+    """
+    keys = sorted({piece.bs_key for piece in obsolete if piece.bs_key is not None})
+    return {
+        'backup_sets': [key for key in keys if key in existing_backup_sets],
+        'catalog_only': [
+            piece for piece in obsolete
+            if piece.bs_key is not None and piece.bs_key not in existing_backup_sets
+        ],
+        'orphan_files': [piece for piece in obsolete if piece.bs_key is None],
+    }
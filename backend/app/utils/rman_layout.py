@@ -0,0 +1,124 @@
+import math
+import re
+import logging
+from typing import List, Dict, Any, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+GB = 1024 * MB
+
+# Una sección más pequeña que esto no compensa el costo de coordinar canales
+MIN_SECTION_SIZE = 256 * MB
+# Secciones objetivo por canal: más secciones reparten mejor la carga entre canales
+SECTIONS_PER_CHANNEL = 4
+MAX_FILES_PER_SET = 64
+
+# Algoritmos de SET COMPRESSION ALGORITHM; solo BASIC no requiere
+# la licencia de Advanced Compression
+COMPRESSION_LEVELS = ('BASIC', 'LOW', 'MEDIUM', 'HIGH')
+
+SIZE_PATTERN = re.compile(r'^\s*(\d+(?:[.,]\d+)?)\s*([KMGT]?)B?\s*$', re.IGNORECASE)
+SIZE_UNITS = {'': MB, 'K': 1024, 'M': MB, 'G': GB, 'T': 1024 * GB}
+
+
+def parse_size(value: Optional[str]) -> Optional[int]:
+    """Convierte '500M', '4G', '1.5 GB' o '2048' (MB) en bytes; None si no es válido"""
+    if not value:
+        return None
+    match = SIZE_PATTERN.match(str(value))
+    if not match:
+        return None
+    number = float(match.group(1).replace(',', '.'))
+    size = int(number * SIZE_UNITS[match.group(2).upper()])
+    return size if size > 0 else None
+
+
+def resolve_compression_level(strategy_data: Dict[str, Any]) -> Optional[str]:
+    """Algoritmo de compresión de la estrategia (None si no comprime).
+
+    ``custom_parameters['compression_level']`` tiene prioridad sobre
+    RMAN_COMPRESSION_LEVEL. Sin ADVANCED_COMPRESSION_LICENSED se usa BASIC.
+    """
+    if not strategy_data.get('compression', True):
+        return None
+    params = strategy_data.get('custom_parameters') or {}
+    level = str(params.get('compression_level') or settings.RMAN_COMPRESSION_LEVEL).upper()
+    if level not in COMPRESSION_LEVELS:
+        logger.warning(f"⚠️ Nivel de compresión desconocido '{level}', se usa BASIC")
+        return 'BASIC'
+    if level != 'BASIC' and not settings.ADVANCED_COMPRESSION_LICENSED:
+        logger.warning(f"⚠️ Compresión {level} requiere Advanced Compression, se usa BASIC")
+        return 'BASIC'
+    return level
+
+
+def plan_backup_layout(
+    datafiles: List[Dict[str, Any]],
+    channels: int,
+    max_piece_bytes: Optional[int] = None
+) -> Dict[str, Any]:
+    """Calcula cómo repartir el backup de ``datafiles`` entre ``channels`` canales.
+
+    - Si algún archivo supera la porción equilibrada de un canal, se usa
+      SECTION SIZE para que varios canales lo procesen en paralelo.
+    - FILESPERSET limita cuántos archivos entran en un backup set, generando
+      suficientes sets pequeños para que todos los canales tengan trabajo.
+    - ``max_piece_bytes`` (max_backup_size de la estrategia) se aplica como
+      MAXPIECESIZE en los canales. RMAN no permite combinarlo con SECTION SIZE:
+      en ese caso la sección se limita a ese tamaño y se usa un archivo por set,
+      con lo que ninguna pieza de datafiles lo supera.
+    """
+    channels = max(1, channels)
+    sizes = [int(datafile['bytes'] or 0) for datafile in datafiles]
+    total_bytes = sum(sizes)
+    largest = max(sizes, default=0)
+
+    plan = {
+        'channels': channels,
+        'datafiles': len(sizes),
+        'total_bytes': total_bytes,
+        'largest_file_bytes': largest,
+        'section_size_mb': None,
+        'files_per_set': None,
+        'max_piece_size_mb': None,
+    }
+
+    if sizes and channels > 1:
+        balanced_share = total_bytes / channels
+        section_size = max(MIN_SECTION_SIZE, math.ceil(total_bytes / (channels * SECTIONS_PER_CHANNEL)))
+        if max_piece_bytes:
+            section_size = min(section_size, max(max_piece_bytes, MB))
+        if largest > balanced_share and largest > section_size:
+            plan['section_size_mb'] = math.ceil(section_size / MB)
+
+        files_per_set = math.ceil(len(sizes) / (channels * 2))
+        plan['files_per_set'] = min(MAX_FILES_PER_SET, max(1, files_per_set))
+
+    if max_piece_bytes:
+        if plan['section_size_mb']:
+            plan['files_per_set'] = 1
+        else:
+            plan['max_piece_size_mb'] = max(1, math.ceil(max_piece_bytes / MB))
+
+    return plan
+
+
+def datafile_clause(plan: Dict[str, Any]) -> str:
+    """Opciones del comando BACKUP de datafiles según el plan"""
+    clause = ""
+    if plan.get('section_size_mb'):
+        clause += f" SECTION SIZE {plan['section_size_mb']}M"
+    if plan.get('files_per_set'):
+        clause += f" FILESPERSET {plan['files_per_set']}"
+    return clause
+
+
+def channel_allocations(plan: Dict[str, Any], backup_format: str) -> List[str]:
+    """Líneas ALLOCATE CHANNEL para el bloque RUN"""
+    max_piece = f" MAXPIECESIZE {plan['max_piece_size_mb']}M" if plan.get('max_piece_size_mb') else ""
+    return [
+        f"  ALLOCATE CHANNEL ch{index} DEVICE TYPE DISK FORMAT '{backup_format}'{max_piece};"
+        for index in range(1, plan['channels'] + 1)
+    ]
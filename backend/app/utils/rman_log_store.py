@@ -0,0 +1,180 @@
+import os
+import json
+import time
+import zlib
+import threading
+import logging
+from typing import List, Dict, Any, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RmanLogStore:
+    """Almacén en disco de logs RMAN comprimidos por bloques.
+
+    Cada ejecución (``log_id`` de backup_logs) tiene dos archivos:
+      - ``{log_id}.chunks``: bloques zlib concatenados
+      - ``{log_id}.idx``: una línea JSON por bloque con su posición en el log
+        original (offset/length) y en el archivo comprimido (file_offset/compressed_length)
+
+    Con el índice se puede servir cualquier rango de bytes o la cola del log
+    descomprimiendo solo los bloques implicados.
+    """
+
+    def __init__(self, base_path: Optional[str] = None):
+        self.base_path = base_path or settings.RMAN_LOG_STORE_PATH
+
+    def _chunks_path(self, log_id: int) -> str:
+        return os.path.join(self.base_path, f"{log_id}.chunks")
+
+    def _index_path(self, log_id: int) -> str:
+        return os.path.join(self.base_path, f"{log_id}.idx")
+
+    def exists(self, log_id: int) -> bool:
+        return os.path.exists(self._index_path(log_id))
+
+    def open_writer(self, log_id: int) -> "RmanLogWriter":
+        os.makedirs(self.base_path, exist_ok=True)
+        self.delete(log_id)
+        return RmanLogWriter(self, log_id)
+
+    def load_index(self, log_id: int) -> List[Dict[str, Any]]:
+        """Carga el índice de bloques, ignorando una última línea a medio escribir"""
+        index = []
+        try:
+            with open(self._index_path(log_id), 'r', encoding='utf-8') as index_file:
+                for line in index_file:
+                    try:
+                        index.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        break
+        except FileNotFoundError:
+            pass
+        return index
+
+    def get_size(self, log_id: int) -> int:
+        """Tamaño en bytes del log original (sin comprimir)"""
+        index = self.load_index(log_id)
+        if not index:
+            return 0
+        return index[-1]['offset'] + index[-1]['length']
+
+    def read_range(self, log_id: int, offset: int, length: int) -> bytes:
+        """Lee ``length`` bytes del log original a partir de ``offset``"""
+        index = self.load_index(log_id)
+        if not index or length <= 0:
+            return b""
+
+        end = offset + length
+        parts = []
+        with open(self._chunks_path(log_id), 'rb') as chunks_file:
+            for entry in index:
+                chunk_start = entry['offset']
+                chunk_end = chunk_start + entry['length']
+                if chunk_end <= offset:
+                    continue
+                if chunk_start >= end:
+                    break
+
+                chunks_file.seek(entry['file_offset'])
+                data = zlib.decompress(chunks_file.read(entry['compressed_length']))
+                parts.append(data[max(offset - chunk_start, 0):min(end, chunk_end) - chunk_start])
+
+        return b"".join(parts)
+
+    def read_tail(self, log_id: int, nbytes: int) -> bytes:
+        """Lee los últimos ``nbytes`` del log original"""
+        size = self.get_size(log_id)
+        start = max(size - nbytes, 0)
+        return self.read_range(log_id, start, size - start)
+
+    def delete(self, log_id: int) -> bool:
+        deleted = False
+        for path in (self._chunks_path(log_id), self._index_path(log_id)):
+            if os.path.exists(path):
+                os.remove(path)
+                deleted = True
+        return deleted
+
+
+class RmanLogWriter:
+    """Escritor por bloques: acumula bytes y los comprime al llenar un bloque.
+
+    ``flush_if_stale`` permite publicar bloques parciales durante una ejecución
+    larga para que la cola del log esté disponible mientras RMAN sigue escribiendo.
+    """
+
+    def __init__(self, store: RmanLogStore, log_id: int):
+        self.store = store
+        self.log_id = log_id
+        self.chunk_size = settings.RMAN_LOG_CHUNK_SIZE
+        self.total_bytes = 0
+        self.compressed_bytes = 0
+        self._buffer = bytearray()
+        self._buffered_since: Optional[float] = None
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._chunks_file = open(store._chunks_path(log_id), 'ab')
+        self._index_file = open(store._index_path(log_id), 'a', encoding='utf-8')
+        self._file_offset = self._chunks_file.tell()
+
+    def write(self, data: bytes):
+        with self._lock:
+            if not data:
+                return
+            if self._buffered_since is None:
+                self._buffered_since = time.monotonic()
+            self._buffer.extend(data)
+            while len(self._buffer) >= self.chunk_size:
+                self._write_chunk(bytes(self._buffer[:self.chunk_size]))
+                del self._buffer[:self.chunk_size]
+
+    def flush_if_stale(self, max_age_seconds: Optional[float] = None):
+        max_age = max_age_seconds if max_age_seconds is not None else settings.RMAN_LOG_FLUSH_SECONDS
+        with self._lock:
+            if self._buffer and self._buffered_since is not None \
+                    and time.monotonic() - self._buffered_since >= max_age:
+                self._flush_buffer()
+
+    def flush(self):
+        with self._lock:
+            self._flush_buffer()
+
+    def close(self):
+        with self._lock:
+            self._flush_buffer()
+            self._chunks_file.close()
+            self._index_file.close()
+
+    def _flush_buffer(self):
+        if self._buffer:
+            self._write_chunk(bytes(self._buffer))
+            self._buffer.clear()
+        self._buffered_since = None
+
+    def _write_chunk(self, data: bytes):
+        compressed = zlib.compress(data, 6)
+        self._chunks_file.write(compressed)
+        self._chunks_file.flush()
+
+        # El índice se escribe después del bloque para que los lectores nunca vean
+        # una entrada que apunte a datos incompletos
+        entry = {
+            'seq': self._sequence,
+            'offset': self.total_bytes,
+            'length': len(data),
+            'file_offset': self._file_offset,
+            'compressed_length': len(compressed),
+        }
+        self._index_file.write(json.dumps(entry) + "\n")
+        self._index_file.flush()
+
+        self._sequence += 1
+        self._file_offset += len(compressed)
+        self.total_bytes += len(data)
+        self.compressed_bytes += len(compressed)
+
+
+# Instancia global del almacén de logs
+rman_log_store = RmanLogStore()
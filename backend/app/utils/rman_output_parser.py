@@ -0,0 +1,134 @@
+import re
+from typing import Optional, Dict, Any, List
+
+# Los mensajes de RMAN dependen de NLS_LANG; se reconocen en inglés y español
+PIECE_HANDLE_PATTERN = re.compile(
+    r'(?:piece handle|manejador de fragmentos?)=(\S+)\s+(?:tag|etiqueta)=(\S+)',
+    re.IGNORECASE
+)
+BACKUP_SET_START_PATTERN = re.compile(
+    r'(?:channel|canal) (\S+): (?:starting|iniciando)\b.*?'
+    r'(datafile|archived log|archive log|controlfile|spfile|archivo de datos|log archivado)',
+    re.IGNORECASE
+)
+INPUT_DATAFILE_PATTERN = re.compile(
+    r'(?:input datafile|archivo de datos de entrada) (?:file number|número de archivo)=(\d+)',
+    re.IGNORECASE
+)
+BACKUP_SET_COMPLETE_PATTERN = re.compile(
+    r'(?:channel|canal) (\S+): (?:backup set complete|juego de copias de seguridad terminado)'
+    r'.*?(\d+:\d{2}:\d{2})',
+    re.IGNORECASE
+)
+ERROR_PATTERN = re.compile(r'((?:RMAN|ORA)-\d+): ([^\n]+)')
+
+# Salida de CROSSCHECK / DELETE EXPIRED (mantenimiento del catálogo)
+CROSSCHECK_STATUS_PATTERN = re.compile(
+    r"(?:crosschecked backup piece|fragmento de copia de seguridad con comprobaci[oó]n cruzada)"
+    r"[^']*'(\w+)'",
+    re.IGNORECASE
+)
+CROSSCHECK_HANDLE_PATTERN = re.compile(
+    r'(?:piece handle|manejador de fragmentos?)=(\S+)\s+RECID=',
+    re.IGNORECASE
+)
+CROSSCHECKED_COUNT_PATTERN = re.compile(
+    r'(?:crosschecked|comprobados de forma cruzada) (\d+) (?:objects|objetos)',
+    re.IGNORECASE
+)
+DELETED_COUNT_PATTERN = re.compile(
+    r'(?:deleted|suprimidos?) (\d+) (?:EXPIRED objects|objetos EXPIRED)',
+    re.IGNORECASE
+)
+
+PHASES = {
+    'datafile': 'datafiles',
+    'archivo de datos': 'datafiles',
+    'archived log': 'archivelogs',
+    'archive log': 'archivelogs',
+    'log archivado': 'archivelogs',
+    'controlfile': 'controlfile',
+    'spfile': 'controlfile',
+}
+
+
+def parse_elapsed(elapsed: str) -> int:
+    """Convierte 'HH:MM:SS' en segundos"""
+    hours, minutes, seconds = (int(part) for part in elapsed.split(':'))
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def parse_rman_line(line: str) -> Optional[Dict[str, Any]]:
+    """Interpreta una línea de salida de RMAN.
+
+    Retorna un evento con ``type`` (piece, set_start, set_complete, datafile,
+    error) o None si la línea no aporta información de progreso.
+    """
+    match = PIECE_HANDLE_PATTERN.search(line)
+    if match:
+        return {'type': 'piece', 'handle': match.group(1), 'tag': match.group(2)}
+
+    match = BACKUP_SET_COMPLETE_PATTERN.search(line)
+    if match:
+        return {
+            'type': 'set_complete',
+            'channel': match.group(1),
+            'elapsed_seconds': parse_elapsed(match.group(2))
+        }
+
+    match = BACKUP_SET_START_PATTERN.search(line)
+    if match:
+        return {
+            'type': 'set_start',
+            'channel': match.group(1),
+            'phase': PHASES.get(match.group(2).lower(), 'datafiles')
+        }
+
+    match = INPUT_DATAFILE_PATTERN.search(line)
+    if match:
+        return {'type': 'datafile', 'file_number': int(match.group(1))}
+
+    match = ERROR_PATTERN.search(line)
+    if match:
+        return {'type': 'error', 'code': match.group(1), 'message': match.group(2).strip()}
+
+    return None
+
+
+def parse_catalog_maintenance_output(output: str) -> Dict[str, Any]:
+    """Resume la salida de CROSSCHECK BACKUP y DELETE EXPIRED BACKUP.
+
+    Retorna los objetos revisados y eliminados (sumando los de cada canal) y
+    los handles de las piezas que CROSSCHECK encontró EXPIRED.
+    """
+    expired_handles: List[str] = []
+    objects_crosschecked = 0
+    objects_deleted = 0
+    status = None
+    for line in output.splitlines():
+        match = CROSSCHECK_STATUS_PATTERN.search(line)
+        if match:
+            status = match.group(1).upper()
+            continue
+
+        match = CROSSCHECK_HANDLE_PATTERN.search(line)
+        if match:
+            if status == 'EXPIRED':
+                expired_handles.append(match.group(1))
+            status = None
+            continue
+
+        match = CROSSCHECKED_COUNT_PATTERN.search(line)
+        if match:
+            objects_crosschecked += int(match.group(1))
+            continue
+
+        match = DELETED_COUNT_PATTERN.search(line)
+        if match:
+            objects_deleted += int(match.group(1))
+
+    return {
+        'objects_crosschecked': objects_crosschecked,
+        'objects_deleted': objects_deleted,
+        'expired_handles': expired_handles,
+    }
@@ -0,0 +1,67 @@
+import os
+from datetime import date, datetime
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+from app.utils.file_utils import FileUtils, IMAGE_COPY_DIRNAME
+
+# Cálculos del índice de uso de disco sin BD: agregación por (estrategia, día)
+# y comparación del catálogo con los archivos de BACKUP_BASE_PATH.
+
+UsageDeltas = Dict[Tuple[int, date], List[int]]
+
+# Archivos de la aplicación que no son piezas del catálogo (huellas del checksum)
+MANIFEST_PREFIX = "manifest_"
+
+# Ejemplos de archivos sin catalogar incluidos en el informe de reconcile
+UNTRACKED_SAMPLE = 20
+
+
+def usage_deltas(rows: Iterable[Tuple[int, str, Optional[int], Optional[datetime]]], sign: int = 1) -> UsageDeltas:
+    """Agrupa (strategy_id, handle, bytes, fecha) en [archivos, bytes] por (estrategia, día)"""
+    deltas: UsageDeltas = {}
+    for strategy_id, handle, size, when in rows:
+        totals = deltas.setdefault((strategy_id, FileUtils.get_usage_date(handle, when)), [0, 0])
+        totals[0] += sign
+        totals[1] += sign * int(size or 0)
+    return deltas
+
+
+def normalize_path(path: str) -> str:
+    """Ruta comparable entre el handle de RMAN y el recorrido del disco"""
+    return os.path.normcase(os.path.abspath(path))
+
+
+def disk_drift(
+    pieces: Iterable[Tuple[int, str, Optional[str]]],
+    disk_files: Dict[str, int],
+    base_path: str
+) -> Dict[str, Any]:
+    """Compara las piezas del catálogo (id, handle, scrub_status) con los archivos en disco.
+
+    - ``missing``: ids de piezas bajo ``base_path`` que ya no están en disco
+      (las ya marcadas 'missing' no se repiten).
+    - ``untracked``: archivos en disco que no son piezas del catálogo, sin
+      contar las copias imagen ni los manifiestos de checksum.
+    """
+    on_disk = {normalize_path(path): size for path, size in disk_files.items()}
+    base = normalize_path(base_path) + os.sep
+
+    missing = []
+    catalogued = set()
+    for piece_id, handle, scrub_status in pieces:
+        path = normalize_path(handle)
+        catalogued.add(path)
+        if path.startswith(base) and path not in on_disk and scrub_status != 'missing':
+            missing.append(piece_id)
+
+    untracked = sorted(
+        path for path in on_disk
+        if path not in catalogued
+        and not os.path.basename(path).startswith(MANIFEST_PREFIX)
+        and os.path.basename(os.path.dirname(path)) != IMAGE_COPY_DIRNAME
+    )
+    return {
+        'missing': missing,
+        'untracked_files': len(untracked),
+        'untracked_bytes': sum(on_disk[path] for path in untracked),
+        'untracked_sample': untracked[:UNTRACKED_SAMPLE],
+    }
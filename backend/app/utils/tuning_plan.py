@@ -0,0 +1,147 @@
+import math
+import statistics
+from typing import Dict, Any, List, Optional, Tuple
+from app.core.config import settings
+
+# Cálculo puro de la recomendación de canales y compresión (sin BD ni RMAN):
+# recibe las ejecuciones de get_run_metrics y las métricas de la base de datos.
+
+MB = 1024 * 1024
+
+# Valores aproximados por algoritmo: velocidad relativa de un canal frente a
+# un backup sin compresión y tamaño resultante relativo a los datos leídos.
+# Ordenados de mayor a menor compresión.
+COMPRESSION_PROFILES = {
+    'HIGH': {'speed': 0.25, 'ratio': 0.22},
+    'BASIC': {'speed': 0.45, 'ratio': 0.27},
+    'MEDIUM': {'speed': 0.6, 'ratio': 0.28},
+    'LOW': {'speed': 0.85, 'ratio': 0.38},
+    None: {'speed': 1.0, 'ratio': 1.0},
+}
+
+# Los scripts anteriores configuraban siempre HIGH
+LEGACY_COMPRESSION_LEVEL = 'HIGH'
+
+MAX_PARALLEL_DEGREE = 32
+
+# Niveles de details['incremental']['level'] que leen todos los datafiles
+FULL_READ_LEVELS = (0, 'copy')
+
+
+def window_runs(runs: List[Dict[str, Any]], incremental: bool) -> List[Dict[str, Any]]:
+    """Ejecuciones que representan el peor caso de la ventana.
+
+    En las incrementales solo los nivel 0 (o la creación de copias imagen):
+    un nivel 1 lee una fracción de la base y no sirve para dimensionar el nivel 0.
+    """
+    if not incremental:
+        return runs
+    return [run for run in runs if (run['details'].get('incremental') or {}).get('level') in FULL_READ_LEVELS]
+
+
+def channel_rate(
+    runs: List[Dict[str, Any]],
+    metrics: Dict[str, Any],
+    current_level: Optional[str]
+) -> Tuple[Optional[float], Optional[str]]:
+    """MB/s que procesa un canal sin compresión y la fuente del dato.
+
+    Usa los bytes que leyó cada ejecución (details['input_bytes']); las
+    ejecuciones sin ese dato se ignoran.
+    """
+    rates = []
+    for run in runs:
+        details = run['details']
+        input_bytes = details.get('input_bytes')
+        if not input_bytes or not run.get('duration_seconds'):
+            continue
+        channels = details.get('parallel_degree') or 1
+        level = details.get('compression_level', LEGACY_COMPRESSION_LEVEL)
+        profile = COMPRESSION_PROFILES.get(level, COMPRESSION_PROFILES[LEGACY_COMPRESSION_LEVEL])
+        rates.append(input_bytes / MB / run['duration_seconds'] / channels / profile['speed'])
+    if rates:
+        return statistics.median(rates), 'history'
+
+    if metrics.get('channel_rate_mb_s'):
+        return metrics['channel_rate_mb_s'] / COMPRESSION_PROFILES[current_level]['speed'], 'async_io'
+    return None, None
+
+
+def build_recommendation(
+    strategy_id: int,
+    target_minutes: int,
+    current_channels: int,
+    current_level: Optional[str],
+    runs: List[Dict[str, Any]],
+    metrics: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Mayor compresión que termina ``metrics['input_mb']`` dentro de la ventana con los CPU disponibles"""
+    input_mb = metrics['input_mb']
+    reasons: List[str] = []
+    rate, source = channel_rate(runs, metrics, current_level)
+
+    recommendation = {
+        'strategy_id': strategy_id,
+        'target_window_minutes': target_minutes,
+        'current': {'parallel_degree': current_channels, 'compression_level': current_level},
+        'recommended': {'parallel_degree': current_channels, 'compression_level': current_level},
+        'estimated_duration_minutes': None,
+        'estimated_size_mb': None,
+        'meets_window': None,
+        'changed': False,
+        'basis': {
+            'runs_analyzed': len(runs),
+            'source': source,
+            'input_mb': round(input_mb, 2),
+            'channel_throughput_mb_s': round(rate, 2) if rate else None,
+            'cpu_count': metrics['cpu_count'],
+            'io_wait_ratio': metrics['io_wait_ratio'],
+            'io_bound': metrics['io_bound'],
+            'advanced_compression_licensed': settings.ADVANCED_COMPRESSION_LICENSED,
+        },
+        'reasons': reasons,
+    }
+
+    if not rate or not input_mb:
+        reasons.append("Sin datos suficientes (historial ni V$BACKUP_ASYNC_IO): se mantiene la configuración actual")
+        return recommendation
+
+    max_channels = max(1, min(MAX_PARALLEL_DEGREE, metrics['cpu_count']))
+    if metrics['io_bound']:
+        max_channels = min(max_channels, current_channels)
+        reasons.append("La E/S de lectura es el cuello de botella: más canales no acortarían el backup")
+
+    if current_level is None:
+        levels = [None]
+    elif settings.ADVANCED_COMPRESSION_LICENSED:
+        levels = [level for level in COMPRESSION_PROFILES if level is not None]
+    else:
+        levels = ['BASIC']
+        reasons.append("Sin licencia de Advanced Compression solo se considera BASIC")
+
+    window_seconds = target_minutes * 60
+    chosen = None
+    for level in levels:
+        level_rate = rate * COMPRESSION_PROFILES[level]['speed']
+        channels = max(1, math.ceil(input_mb / (level_rate * window_seconds)))
+        if channels <= max_channels:
+            chosen = (level, channels)
+            break
+    if chosen is None:
+        # Ni el algoritmo más rápido cabe: usar todos los canales posibles
+        chosen = (levels[-1], max_channels)
+        reasons.append(f"No se alcanza la ventana de {target_minutes} min con {max_channels} canales")
+
+    level, channels = chosen
+    duration_seconds = input_mb / (rate * COMPRESSION_PROFILES[level]['speed'] * channels)
+    recommendation['recommended'] = {'parallel_degree': channels, 'compression_level': level}
+    recommendation['estimated_duration_minutes'] = round(duration_seconds / 60, 1)
+    recommendation['estimated_size_mb'] = round(input_mb * COMPRESSION_PROFILES[level]['ratio'], 2)
+    recommendation['meets_window'] = duration_seconds <= window_seconds
+    recommendation['changed'] = (channels, level) != (current_channels, current_level)
+    if recommendation['changed']:
+        reasons.append(
+            f"{channels} canales con compresión {level or 'desactivada'}: "
+            f"~{recommendation['estimated_duration_minutes']} min estimados"
+        )
+    return recommendation
@@ -7,6 +7,10 @@ from datetime import datetime
 from app.core.config import settings
 from app.core.scheduler import BackupScheduler
 from app.core.database import AsyncSessionLocal
+from app.utils.oracle_connection import OracleConnection
+from app.services.notification_dispatcher import notification_dispatcher
+from app.services.verification_service import backup_verifier
+from app.services.checksum_service import checksum_service
 
 # Configurar logging
 logging.basicConfig(
@@ -24,8 +28,17 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("🚀 Iniciando Sistema de Gestión de Respaldo Oracle...")
     
+    # Iniciar envío de notificaciones en segundo plano (recupera las pendientes)
+    await notification_dispatcher.start()
+    
+    # Iniciar verificación de backups en segundo plano (retoma las pendientes)
+    await backup_verifier.start()
+    
     # Iniciar programador
     scheduler.start()
+    scheduler.schedule_checksum_scrub()
+    scheduler.schedule_retention()
+    scheduler.schedule_catalog_maintenance()
     logger.info("✅ Programador iniciado")
     
     # Cargar y programar estrategias activas
@@ -50,6 +63,10 @@ async def lifespan(app: FastAPI):
     logger.info("🛑 Deteniendo Sistema de Gestión de Respaldo Oracle...")
     scheduler.shutdown()
     logger.info("✅ Programador detenido")
+    await backup_verifier.stop()
+    checksum_service.shutdown()
+    await notification_dispatcher.stop()
+    OracleConnection.close_pool()
 
 # Crear aplicación FastAPI
 app = FastAPI(
@@ -65,6 +82,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Content-Range", "X-Log-Size", "X-Log-Offset"],
 )
 
 # ✅ IMPORTAR routers DESPUÉS de crear la app
@@ -2,7 +2,9 @@
 import asyncio
 import logging
 from app.core.database import engine, Base
-from app.models.database_models import UserModel, StrategyModel, LogModel
+from app.core.config import settings
+from app.core.log_schema import ensure_log_indexes, enable_log_partitioning
+from app.models.database_models import UserModel, StrategyModel, LogModel, BackupPieceModel, BackupNotificationModel, BackupVerificationModel, CatalogMaintenanceModel, StorageUsageModel
 
 logger = logging.getLogger(__name__)
 
@@ -11,6 +13,10 @@ async def create_tables():
     try:
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            # Instalaciones previas: create_all no agrega índices a tablas existentes
+            await ensure_log_indexes(conn)
+            if settings.LOG_PARTITIONING_ENABLED:
+                await enable_log_partitioning(conn)
         logger.info("✅ Tablas creadas exitosamente en la base de datos")
         return True
     except Exception as e:
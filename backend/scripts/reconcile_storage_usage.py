@@ -0,0 +1,30 @@
+# backend/scripts/reconcile_storage_usage.py
+import asyncio
+import sys
+import os
+
+# === Agregar el directorio raíz del proyecto (backend) al sys.path ===
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.config import settings
+from app.services.storage_usage_service import storage_usage
+
+async def reconcile_storage_usage():
+    """Compara backup_pieces con BACKUP_BASE_PATH y reconstruye backup_storage_usage"""
+    print(f"📂 Comparando el catálogo con: {os.path.abspath(settings.BACKUP_BASE_PATH)}")
+    result = await storage_usage.reconcile()
+    if 'error' in result:
+        print(f"❌ Error reconciliando el uso de disco: {result['error']}")
+        return
+    print(f"✅ {result['files']} archivos, {result['bytes'] / (1024 * 1024):.2f} MB "
+          f"en {result['rows']} filas (estrategia, día) - {result['elapsed_seconds']}s")
+    if result['missing_pieces']:
+        print(f"⚠️ {result['missing_pieces']} piezas ya no están en disco (marcadas 'missing')")
+    if result['untracked_files']:
+        print(f"⚠️ {result['untracked_files']} archivos sin catalogar "
+              f"({result['untracked_bytes'] / (1024 * 1024):.2f} MB):")
+        for path in result['untracked_sample']:
+            print(f"   - {path}")
+
+if __name__ == "__main__":
+    asyncio.run(reconcile_storage_usage())
@@ -6,7 +6,9 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.core.database import engine, Base
-from app.models.database_models import UserModel, StrategyModel, LogModel
+from app.core.config import settings
+from app.core.log_schema import ensure_log_indexes, enable_log_partitioning
+from app.models.database_models import UserModel, StrategyModel, LogModel, BackupPieceModel, BackupNotificationModel, BackupVerificationModel, CatalogMaintenanceModel, StorageUsageModel
 
 async def recreate_tables():
     print("🗑️ Eliminando tablas existentes...")
@@ -22,6 +24,10 @@ async def recreate_tables():
     try:
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            await ensure_log_indexes(conn)
+            if settings.LOG_PARTITIONING_ENABLED:
+                await enable_log_partitioning(conn)
+                print("🗂️ backup_logs particionada por mes")
         print("✅ Tablas creadas con sequences")
         
         # Verificar sequences creadas
@@ -35,6 +41,14 @@ async def recreate_tables():
             sequences = [row[0] for row in result]
             print(f"🔢 Sequences creadas: {sequences}")
             
+            result = await conn.execute(text("""
+                SELECT index_name 
+                FROM user_indexes 
+                WHERE table_name = 'BACKUP_LOGS'
+            """))
+            indexes = [row[0] for row in result]
+            print(f"📇 Índices de backup_logs: {indexes}")
+            
     except Exception as e:
         print(f"❌ Error creando tablas: {e}")
 
@@ -0,0 +1,6 @@
+# backend/tests/conftest.py
+import sys
+import os
+
+# === Agregar el directorio raíz del proyecto (backend) al sys.path ===
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
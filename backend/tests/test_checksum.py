@@ -0,0 +1,76 @@
+import hashlib
+
+import pytest
+
+from app.utils import checksum
+from app.utils.checksum import compare_checksum, hash_file
+
+CONTENT = bytes(range(256)) * 64  # 16 KB
+
+
+@pytest.fixture
+def piece(tmp_path):
+    path = tmp_path / "piece.bkp"
+    path.write_bytes(CONTENT)
+    return str(path)
+
+
+def test_small_file_uses_buffered_reads(piece, monkeypatch):
+    monkeypatch.setattr(checksum.mmap, 'mmap', lambda *args, **kwargs: pytest.fail("no debe usar mmap"))
+
+    result = hash_file(piece, chunk_size=1000)
+
+    assert result['error'] is None
+    assert result['bytes'] == len(CONTENT)
+    assert result['checksum'] == hashlib.sha256(CONTENT).hexdigest()
+
+
+def test_large_file_uses_mmap(piece, monkeypatch):
+    monkeypatch.setattr(checksum, 'MMAP_MIN_BYTES', 1024)
+    mapped = []
+    real_mmap = checksum.mmap.mmap
+
+    def tracking_mmap(*args, **kwargs):
+        mapped.append(args)
+        return real_mmap(*args, **kwargs)
+
+    monkeypatch.setattr(checksum.mmap, 'mmap', tracking_mmap)
+
+    result = hash_file(piece, algorithm="md5", chunk_size=1000)
+
+    assert mapped
+    assert result['checksum'] == hashlib.md5(CONTENT).hexdigest()
+
+
+def test_throttle_slows_reads(piece, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(checksum.time, 'sleep', sleeps.append)
+
+    hash_file(piece, chunk_size=4096, max_bytes_per_second=1024)
+
+    assert sleeps and all(delay > 0 for delay in sleeps)
+
+
+def test_missing_file(tmp_path):
+    result = hash_file(str(tmp_path / "gone.bkp"))
+
+    assert result['error'] == 'missing'
+    assert result['checksum'] is None
+
+
+def test_unknown_algorithm_is_reported_not_raised(piece):
+    result = hash_file(piece, algorithm="no-such-hash")
+
+    assert result['error']
+    assert result['checksum'] is None
+
+
+@pytest.mark.parametrize("result, expected", [
+    ({'error': 'missing', 'bytes': None, 'checksum': None}, 'missing'),
+    ({'error': 'Permission denied', 'bytes': None, 'checksum': None}, 'error'),
+    ({'error': None, 'bytes': 99, 'checksum': 'abc'}, 'size_changed'),
+    ({'error': None, 'bytes': 100, 'checksum': 'def'}, 'mismatch'),
+    ({'error': None, 'bytes': 100, 'checksum': 'abc'}, 'ok'),
+])
+def test_compare_checksum(result, expected):
+    assert compare_checksum(100, 'abc', result) == expected
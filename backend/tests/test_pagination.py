@@ -0,0 +1,63 @@
+import base64
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import Column, DateTime, Integer, MetaData, Table, create_engine, desc, insert, select
+from app.utils.pagination import encode_cursor, decode_cursor, keyset_condition
+
+
+def _b64(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def test_cursor_round_trip():
+    start_time = datetime(2026, 10, 17, 8, 30, 15, 123456)
+    assert decode_cursor(encode_cursor(start_time, 42)) == (start_time, 42)
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "no-es-base64!",
+    "ñandú",
+    _b64(b"no es json"),
+    _b64(b"[1, 2]"),
+    _b64(b'{"t": "2026-10-17T08:30:00"}'),
+    _b64(b'{"id": 5}'),
+    _b64(b'{"t": "ayer", "id": 5}'),
+    _b64(b'{"t": 20261017, "id": 5}'),
+    _b64(b'{"t": "2026-10-17T08:30:00", "id": "cinco"}'),
+])
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError, match="Cursor de paginación inválido"):
+        decode_cursor(cursor)
+
+
+def test_keyset_pages_do_not_skip_or_repeat_rows_with_equal_start_time():
+    metadata = MetaData()
+    logs = Table(
+        "logs", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("start_time", DateTime, nullable=False),
+    )
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+
+    base = datetime(2026, 10, 17, 2, 0)
+    # Tres grupos de filas con el mismo start_time, con ids intercalados
+    rows = [{"id": row_id, "start_time": base + timedelta(hours=row_id % 3)} for row_id in range(1, 11)]
+    with engine.begin() as conn:
+        conn.execute(insert(logs), rows)
+
+    expected = [row["id"] for row in sorted(rows, key=lambda row: (row["start_time"], row["id"]), reverse=True)]
+    seen, cursor = [], None
+    with engine.connect() as conn:
+        while True:
+            query = select(logs.c.id, logs.c.start_time).order_by(desc(logs.c.start_time), desc(logs.c.id)).limit(3)
+            if cursor:
+                query = query.where(keyset_condition(logs.c.start_time, logs.c.id, cursor))
+            page = conn.execute(query).all()
+            if not page:
+                break
+            seen.extend(row.id for row in page)
+            cursor = encode_cursor(page[-1].start_time, page[-1].id)
+
+    assert seen == expected
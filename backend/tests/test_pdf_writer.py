@@ -0,0 +1,74 @@
+import io
+import re
+import zlib
+
+from app.utils.pdf_writer import PdfReport, PdfWriter, fit_text, text_width, wrap_text
+
+
+def _build_report(rows=3):
+    output = io.BytesIO()
+    report = PdfReport(PdfWriter(output, title="Prueba (a) \\ b"), header="Encabezado")
+    report.heading("Reporte")
+    report.key_values([("Periodo", "2026-10-01 a 2026-10-17")])
+    report.begin_table([("ID", 50), ("Mensaje", 400)])
+    for index in range(rows):
+        report.table_row([index, f"fallo (ORA-{index}) en C:\\backups"])
+    report.end_table()
+    report.finish()
+    return output.getvalue()
+
+
+def _xref(data):
+    start = int(re.search(rb"startxref\n(\d+)\n%%EOF\n$", data).group(1))
+    lines = data[start:].split(b"\n")
+    assert lines[0] == b"xref"
+    first, count = map(int, lines[1].split())
+    return [int(line[:10]) for line in lines[3:2 + count]]
+
+
+def _page_text(data):
+    streams = re.findall(rb"stream\n(.*?)\nendstream", data, re.DOTALL)
+    return b"\n".join(zlib.decompress(stream) for stream in streams)
+
+
+def test_header_and_trailer():
+    data = _build_report()
+
+    assert data.startswith(b"%PDF-1.4\n")
+    assert data.endswith(b"%%EOF\n")
+    assert b"/Type /Catalog" in data
+
+
+def test_xref_offsets_point_at_objects():
+    data = _build_report(rows=200)
+    offsets = _xref(data)
+
+    assert len(offsets) > 4
+    for object_id, offset in enumerate(offsets, start=1):
+        assert data[offset:].startswith(b"%d 0 obj\n" % object_id)
+
+
+def test_pages_are_split_and_counted():
+    data = _build_report(rows=200)
+
+    pages = len(re.findall(rb"/Type /Page ", data))
+    assert pages > 1
+    assert b"/Count %d" % pages in data
+
+
+def test_cell_text_is_escaped():
+    data = _build_report(rows=1)
+    content = _page_text(data)
+
+    assert rb"(fallo \(ORA-0\) en C:\\backups) Tj" in content
+    assert rb"/Title (Prueba \(a\) \\ b)" in data
+
+
+def test_text_fitting():
+    assert fit_text("corto", 200, 9) == "corto"
+    clipped = fit_text("x" * 500, 100, 9)
+    assert clipped.endswith("...") and text_width(clipped, 9) <= 100
+
+    lines = wrap_text("palabra " * 100, 200, 9, max_lines=3)
+    assert len(lines) == 3
+    assert all(text_width(line, 9) <= 200 for line in lines)
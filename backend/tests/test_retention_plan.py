@@ -0,0 +1,151 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from app.utils.retention_plan import build_retention_plan, is_base_piece, plan_deletions
+
+NOW = datetime(2026, 10, 17, 12, 0, 0)
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+def _piece(log_id, days_ago, backup_type='I', level=1, datafiles=True, bs_key=None, size=100, handle=None):
+    completed = NOW - timedelta(days=days_ago)
+    return SimpleNamespace(
+        log_id=log_id,
+        backup_type=backup_type,
+        incremental_level=level if backup_type == 'I' else None,
+        datafiles_included=datafiles,
+        bs_key=bs_key if bs_key is not None else log_id * 10,
+        bytes=size,
+        start_time=completed - timedelta(hours=1),
+        completion_time=completed,
+        created_at=completed,
+        handle=handle or f"/backups/run_{log_id}.bkp",
+    )
+
+
+def _obsolete_ids(plan):
+    return [run['log_id'] for run in plan['obsolete_runs']]
+
+
+def test_base_piece_requires_datafiles():
+    assert is_base_piece(_piece(1, 0, backup_type='D'))
+    assert is_base_piece(_piece(1, 0, level=0))
+    assert not is_base_piece(_piece(1, 0, level=1))
+    # Autobackup de control file: BACKUP_TYPE 'D' sin datafiles
+    assert not is_base_piece(_piece(1, 0, backup_type='D', datafiles=False))
+
+
+def test_level0_level1_chain_keeps_baseline_and_later_incrementals():
+    pieces = [
+        _piece(1, 20, level=0), _piece(2, 19), _piece(3, 18),
+        _piece(4, 10, level=0), _piece(5, 9), _piece(6, 3),
+    ]
+    statuses = {piece.log_id: COMPLETED for piece in pieces}
+
+    plan, obsolete = build_retention_plan(7, 7, pieces, statuses, NOW)
+
+    assert plan['baseline_log_id'] == 4
+    assert _obsolete_ids(plan) == [1, 2, 3]
+    assert plan['kept_runs'] == 3
+    assert plan['reclaimable_bytes'] == 300
+    assert {piece.log_id for piece in obsolete} == {1, 2, 3}
+
+
+def test_window_boundary_mid_chain_keeps_the_whole_chain():
+    # La ventana empieza entre el nivel 1 del día 9 y el del día 6: el nivel 0
+    # del día 10 y sus incrementales siguen haciendo falta para recuperar.
+    pieces = [_piece(1, 10, level=0), _piece(2, 9), _piece(3, 6), _piece(4, 2)]
+    statuses = {piece.log_id: COMPLETED for piece in pieces}
+
+    plan, obsolete = build_retention_plan(7, 8, pieces, statuses, NOW)
+
+    assert plan['baseline_log_id'] == 1
+    assert obsolete == []
+    assert plan['kept_runs'] == 4
+
+
+def test_full_only_strategy_keeps_last_full_before_window():
+    pieces = [_piece(log_id, days, backup_type='D') for log_id, days in [(1, 21), (2, 14), (3, 7), (4, 0)]]
+    statuses = {piece.log_id: COMPLETED for piece in pieces}
+
+    plan, obsolete = build_retention_plan(7, 10, pieces, statuses, NOW)
+
+    assert plan['baseline_log_id'] == 2
+    assert _obsolete_ids(plan) == [1]
+    assert [piece.log_id for piece in obsolete] == [1]
+
+
+def test_controlfile_only_set_is_not_a_baseline():
+    # El nivel 1 del día 9 incluye el autobackup del control file ('D' sin datafiles)
+    pieces = [
+        _piece(1, 20, level=0),
+        _piece(2, 9), _piece(2, 9, backup_type='D', datafiles=False, bs_key=21),
+        _piece(3, 2),
+    ]
+    statuses = {1: COMPLETED, 2: COMPLETED, 3: COMPLETED}
+
+    plan, obsolete = build_retention_plan(7, 7, pieces, statuses, NOW)
+
+    assert plan['baseline_log_id'] == 1
+    assert obsolete == []
+
+
+def test_failed_runs_are_not_baselines():
+    pieces = [_piece(1, 20, level=0), _piece(2, 10, level=0), _piece(3, 2)]
+    statuses = {1: COMPLETED, 2: FAILED, 3: COMPLETED}
+
+    plan, _ = build_retention_plan(7, 7, pieces, statuses, NOW)
+
+    assert plan['baseline_log_id'] == 1
+    assert _obsolete_ids(plan) == []
+
+
+def test_without_baseline_nothing_is_deleted():
+    pieces = [_piece(1, 20), _piece(2, 10), _piece(3, 2, level=0)]
+    statuses = {piece.log_id: COMPLETED for piece in pieces}
+
+    plan, obsolete = build_retention_plan(7, 7, pieces, statuses, NOW)
+
+    assert plan['baseline_log_id'] is None
+    assert obsolete == []
+    assert plan['kept_runs'] == 3
+
+
+def test_plan_deletions_splits_by_how_pieces_are_removed():
+    in_controlfile = _piece(1, 20, bs_key=11)
+    aged_out = _piece(2, 19, bs_key=12)
+    orphan = _piece(3, 18, handle="/backups/orphan.bkp")
+    orphan.bs_key = None
+
+    deletions = plan_deletions([in_controlfile, aged_out, orphan], {11})
+
+    assert deletions['backup_sets'] == [11]
+    assert deletions['catalog_only'] == [aged_out]
+    assert deletions['orphan_files'] == [orphan]
+
+
+def test_image_copy_merged_level1_before_window_is_obsolete():
+    # Sin nivel 0 en backup_pieces: la copia imagen está en V$DATAFILE_COPY.
+    # Cada ejecución aplica con RECOVER COPY el nivel 1 de la anterior.
+    pieces = [_piece(1, 12), _piece(2, 10), _piece(3, 8), _piece(4, 1)]
+    statuses = {piece.log_id: COMPLETED for piece in pieces}
+
+    backupset_plan, _ = build_retention_plan(7, 7, pieces, statuses, NOW)
+    plan, obsolete = build_retention_plan(7, 7, pieces, statuses, NOW, image_copy=True)
+
+    assert backupset_plan['obsolete_runs'] == []
+    assert plan['image_copy'] is True
+    assert _obsolete_ids(plan) == [1, 2, 3]
+    assert {piece.log_id for piece in obsolete} == {1, 2, 3}
+
+
+def test_image_copy_level1_not_yet_merged_is_kept():
+    # La última ejecución completada es anterior a la ventana: su nivel 1
+    # todavía no se aplicó (la siguiente falló), así que se conserva.
+    pieces = [_piece(1, 12), _piece(2, 10), _piece(3, 2)]
+    statuses = {1: COMPLETED, 2: COMPLETED, 3: FAILED}
+
+    plan, _ = build_retention_plan(7, 7, pieces, statuses, NOW, image_copy=True)
+
+    assert _obsolete_ids(plan) == [1]
@@ -0,0 +1,104 @@
+import pytest
+from app.utils.rman_layout import (
+    GB, MB, MAX_FILES_PER_SET, MIN_SECTION_SIZE, SECTIONS_PER_CHANNEL,
+    channel_allocations, datafile_clause, parse_size, plan_backup_layout,
+)
+
+
+def _datafiles(*sizes):
+    return [{'file_id': index, 'bytes': size} for index, size in enumerate(sizes, start=1)]
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("500M", 500 * MB),
+    ("4G", 4 * GB),
+    ("1.5 GB", int(1.5 * GB)),
+    ("2048", 2048 * MB),
+    ("1,5G", int(1.5 * GB)),
+    ("", None),
+    ("0", None),
+    ("mucho", None),
+])
+def test_parse_size(value, expected):
+    assert parse_size(value) == expected
+
+
+def test_bigfile_datafile_is_split_in_sections_for_every_channel():
+    plan = plan_backup_layout(_datafiles(8 * 1024 * GB, 10 * GB), channels=4)
+
+    assert plan['section_size_mb'] is not None
+    sections = plan['largest_file_bytes'] / (plan['section_size_mb'] * MB)
+    assert sections >= 4 * SECTIONS_PER_CHANNEL - 1
+    assert plan['max_piece_size_mb'] is None
+    assert datafile_clause(plan) == f" SECTION SIZE {plan['section_size_mb']}M FILESPERSET 1"
+
+
+def test_more_channels_than_datafiles_uses_sections_so_all_channels_work():
+    plan = plan_backup_layout(_datafiles(GB, GB), channels=8)
+
+    assert plan['section_size_mb'] == MIN_SECTION_SIZE // MB
+    assert plan['files_per_set'] == 1
+    assert plan['largest_file_bytes'] * 2 / (plan['section_size_mb'] * MB) >= plan['channels']
+
+
+def test_small_files_are_not_sectioned_below_minimum():
+    plan = plan_backup_layout(_datafiles(*([10 * MB] * 6)), channels=8)
+
+    assert plan['section_size_mb'] is None
+    assert plan['files_per_set'] == 1
+
+
+def test_even_files_spread_across_sets_without_sections():
+    plan = plan_backup_layout(_datafiles(*([GB] * 40)), channels=4)
+
+    assert plan['section_size_mb'] is None
+    assert plan['files_per_set'] == 5  # 40 archivos / (4 canales * 2 sets)
+
+
+def test_files_per_set_is_capped():
+    plan = plan_backup_layout(_datafiles(*([MB] * 1000)), channels=2)
+
+    assert plan['files_per_set'] == MAX_FILES_PER_SET
+
+
+def test_single_channel_has_no_section_or_filesperset():
+    plan = plan_backup_layout(_datafiles(100 * GB, GB), channels=1)
+
+    assert plan['section_size_mb'] is None
+    assert plan['files_per_set'] is None
+    assert datafile_clause(plan) == ""
+
+
+def test_max_piece_size_without_sections_becomes_maxpiecesize():
+    plan = plan_backup_layout(_datafiles(*([GB] * 10)), channels=2, max_piece_bytes=2 * GB)
+
+    assert plan['section_size_mb'] is None
+    assert plan['max_piece_size_mb'] == 2048
+    allocations = channel_allocations(plan, "/backups/%U.bkp")
+    assert all(line.endswith(" MAXPIECESIZE 2048M;") for line in allocations)
+
+
+def test_max_piece_size_with_sections_limits_section_instead_of_maxpiecesize():
+    plan = plan_backup_layout(_datafiles(40 * GB), channels=4, max_piece_bytes=2 * GB)
+
+    # RMAN no admite MAXPIECESIZE junto con SECTION SIZE
+    assert plan['max_piece_size_mb'] is None
+    assert plan['section_size_mb'] == 2048
+    assert plan['files_per_set'] == 1
+
+
+def test_empty_or_unknown_sizes():
+    assert plan_backup_layout([], channels=4)['section_size_mb'] is None
+    plan = plan_backup_layout([{'bytes': None}], channels=0)
+    assert plan['channels'] == 1
+    assert plan['total_bytes'] == 0
+
+
+def test_channel_allocations_one_per_channel():
+    plan = plan_backup_layout(_datafiles(GB, GB, GB), channels=3)
+
+    assert channel_allocations(plan, "/b/%d_%T_%U.bkp") == [
+        "  ALLOCATE CHANNEL ch1 DEVICE TYPE DISK FORMAT '/b/%d_%T_%U.bkp';",
+        "  ALLOCATE CHANNEL ch2 DEVICE TYPE DISK FORMAT '/b/%d_%T_%U.bkp';",
+        "  ALLOCATE CHANNEL ch3 DEVICE TYPE DISK FORMAT '/b/%d_%T_%U.bkp';",
+    ]
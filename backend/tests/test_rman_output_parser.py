@@ -0,0 +1,95 @@
+from app.utils.rman_output_parser import parse_catalog_maintenance_output, parse_elapsed, parse_rman_line
+
+# Salida real de RMAN 19c (BACKUP con dos canales), recortada
+BACKUP_OUTPUT = """\
+allocated channel: ch1
+channel ch1: SID=152 device type=DISK
+channel ch1: starting compressed full datafile backup set
+channel ch1: specifying datafile(s) in backup set
+input datafile file number=00001 name=/u01/app/oracle/oradata/ORCL/system01.dbf
+input datafile file number=00003 name=/u01/app/oracle/oradata/ORCL/sysaux01.dbf
+channel ch1: starting piece 1 at 17-OCT-26
+channel ch2: starting compressed incremental level 0 datafile backup set
+channel ch1: finished piece 1 at 17-OCT-26
+piece handle=/backups/strategy_1/20261017/ORCL_20261017_0k36e2fh_1_1.bkp tag=S1_20261017020000 comment=NONE
+channel ch1: backup set complete, elapsed time: 00:01:05
+channel ch1: starting compressed archived log backup set
+channel ch1: specifying archived log(s) in backup set
+input archived log thread=1 sequence=42 RECID=40 STAMP=1183432211
+RMAN-03009: failure of backup command on ch2 channel at 10/17/2026 02:03:00
+ORA-19502: write error on file "/backups/strategy_1/20261017/ORCL_20261017_0l36e2fh_1_1.bkp", block number 1024 (block size=8192)
+"""
+
+
+def _events(output):
+    return [event for event in map(parse_rman_line, output.splitlines()) if event]
+
+
+def test_backup_output_events():
+    events = _events(BACKUP_OUTPUT)
+
+    assert [event['type'] for event in events] == [
+        'set_start', 'datafile', 'datafile', 'set_start', 'piece', 'set_complete', 'set_start', 'error', 'error',
+    ]
+    assert events[0] == {'type': 'set_start', 'channel': 'ch1', 'phase': 'datafiles'}
+    assert events[1] == {'type': 'datafile', 'file_number': 1}
+    assert events[3]['channel'] == 'ch2'
+    assert events[4] == {
+        'type': 'piece',
+        'handle': '/backups/strategy_1/20261017/ORCL_20261017_0k36e2fh_1_1.bkp',
+        'tag': 'S1_20261017020000',
+    }
+    assert events[5] == {'type': 'set_complete', 'channel': 'ch1', 'elapsed_seconds': 65}
+    assert events[6]['phase'] == 'archivelogs'
+    assert events[7]['code'] == 'RMAN-03009'
+    assert events[8]['code'] == 'ORA-19502'
+    assert events[8]['message'].startswith('write error on file')
+
+
+def test_spanish_output_events():
+    events = _events(
+        "canal ch1: iniciando juego de copias de seguridad del archivo de datos completo\n"
+        "manejador de fragmento=/backups/ORCL_1.bkp etiqueta=S1_20261017020000 comentario=NONE\n"
+        "canal ch1: juego de copias de seguridad terminado, tiempo transcurrido: 00:00:07\n"
+    )
+
+    assert [event['type'] for event in events] == ['set_start', 'piece', 'set_complete']
+    assert events[1]['handle'] == '/backups/ORCL_1.bkp'
+    assert events[2]['elapsed_seconds'] == 7
+
+
+def test_lines_without_progress_are_ignored():
+    assert parse_rman_line("Recovery Manager: Release 19.0.0.0.0 - Production") is None
+    assert parse_rman_line("channel ch1: specifying datafile(s) in backup set") is None
+    assert parse_rman_line("") is None
+
+
+def test_parse_elapsed():
+    assert parse_elapsed("01:02:03") == 3723
+
+
+def test_catalog_maintenance_output():
+    summary = parse_catalog_maintenance_output("""\
+using channel ORA_DISK_1
+crosschecked backup piece: found to be 'EXPIRED'
+backup piece handle=/backups/strategy_1/20261001/ORCL_20261001_0a_1_1.bkp RECID=12 STAMP=1182000000
+crosschecked backup piece: found to be 'AVAILABLE'
+backup piece handle=/backups/strategy_1/20261017/ORCL_20261017_0k_1_1.bkp RECID=40 STAMP=1183432211
+Crosschecked 2 objects
+
+Deleted 1 EXPIRED objects
+""")
+
+    assert summary == {
+        'objects_crosschecked': 2,
+        'objects_deleted': 1,
+        'expired_handles': ['/backups/strategy_1/20261001/ORCL_20261001_0a_1_1.bkp'],
+    }
+
+
+def test_catalog_maintenance_output_without_changes():
+    summary = parse_catalog_maintenance_output(
+        "specification does not match any backup in the repository\n"
+    )
+
+    assert summary == {'objects_crosschecked': 0, 'objects_deleted': 0, 'expired_handles': []}
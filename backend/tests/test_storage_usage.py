@@ -0,0 +1,70 @@
+import os
+from datetime import date, datetime
+
+from app.core.config import settings
+from app.utils.file_utils import FileUtils
+from app.utils.storage_usage import disk_drift, usage_deltas
+
+
+def _write(path, size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as handle:
+        handle.write(b'x' * size)
+    return str(path)
+
+
+def test_usage_date_comes_from_the_run_directory():
+    fallback = datetime(2026, 1, 2, 3, 4)
+
+    assert FileUtils.get_usage_date("/b/strategy_1/20261015/DB_1.bkp", fallback) == date(2026, 10, 15)
+    assert FileUtils.get_usage_date("/b/strategy_1/image_copy/DB_1.bkp", fallback) == date(2026, 1, 2)
+    assert FileUtils.get_usage_date("/b/strategy_1/2026-10-15/DB_1.bkp", fallback) == date(2026, 1, 2)
+
+
+def test_usage_deltas_groups_by_strategy_and_day():
+    when = datetime(2026, 10, 1)
+    rows = [
+        (1, "/b/strategy_1/20261015/a.bkp", 100, when),
+        (1, "/b/strategy_1/20261015/b.bkp", None, when),
+        (1, "/b/strategy_1/20261016/c.bkp", 50, when),
+        (2, "/b/strategy_2/image_copy/d.bkp", 10, when),
+    ]
+
+    assert usage_deltas(rows) == {
+        (1, date(2026, 10, 15)): [2, 100],
+        (1, date(2026, 10, 16)): [1, 50],
+        (2, date(2026, 10, 1)): [1, 10],
+    }
+    assert usage_deltas(rows[:1], sign=-1) == {(1, date(2026, 10, 15)): [-1, -100]}
+
+
+def test_disk_drift_reports_missing_pieces_and_untracked_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, 'BACKUP_BASE_PATH', str(tmp_path))
+    kept = _write(tmp_path / "strategy_1" / "20261015" / "kept.bkp", 10)
+    _write(tmp_path / "strategy_1" / "20261015" / "stray.bkp", 30)
+    _write(tmp_path / "strategy_1" / "20261015" / "manifest_7.sha256", 5)
+    _write(tmp_path / "strategy_1" / "image_copy" / "copy_df1.bkp", 40)
+    _write(tmp_path / "other" / "ignored.bkp", 50)
+    gone = str(tmp_path / "strategy_1" / "20261015" / "gone.bkp")
+    already_missing = str(tmp_path / "strategy_1" / "20261014" / "old.bkp")
+    pieces = [
+        (1, kept, None),
+        (2, gone, 'ok'),
+        (3, already_missing, 'missing'),
+        (4, "/elsewhere/outside.bkp", None),
+    ]
+
+    disk_files = FileUtils.scan_backup_files()
+    drift = disk_drift(pieces, disk_files, settings.BACKUP_BASE_PATH)
+
+    assert len(disk_files) == 4
+    assert drift['missing'] == [2]
+    assert drift['untracked_files'] == 1
+    assert drift['untracked_bytes'] == 30
+    assert drift['untracked_sample'][0].endswith("stray.bkp")
+
+
+def test_scan_without_base_path_is_empty(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, 'BACKUP_BASE_PATH', str(tmp_path / "missing"))
+
+    assert FileUtils.scan_backup_files() == {}
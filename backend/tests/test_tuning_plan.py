@@ -0,0 +1,98 @@
+import pytest
+
+from app.core.config import settings
+from app.utils.tuning_plan import MB, build_recommendation, channel_rate, window_runs
+
+GB = 1024 * MB
+
+
+def _run(input_bytes, duration_seconds, channels=1, compression=None, level=None):
+    details = {'parallel_degree': channels, 'compression_level': compression, 'input_bytes': input_bytes}
+    if level is not None:
+        details['incremental'] = {'mode': 'differential', 'level': level}
+    return {'duration_seconds': duration_seconds, 'details': details}
+
+
+def _metrics(input_mb, cpu_count=8, io_bound=False, channel_rate_mb_s=None):
+    return {
+        'cpu_count': cpu_count,
+        'input_mb': input_mb,
+        'channel_rate_mb_s': channel_rate_mb_s,
+        'io_wait_ratio': 0.3 if io_bound else 0.0,
+        'io_bound': io_bound,
+    }
+
+
+@pytest.fixture(autouse=True)
+def licensed(monkeypatch):
+    monkeypatch.setattr(settings, 'ADVANCED_COMPRESSION_LICENSED', True)
+
+
+def test_window_runs_drops_level1_for_incrementals():
+    runs = [_run(GB, 60, level=0), _run(GB, 60, level=1), _run(GB, 60, level='copy')]
+
+    assert [run['details']['incremental']['level'] for run in window_runs(runs, True)] == [0, 'copy']
+    assert window_runs(runs, False) == runs
+
+
+def test_channel_rate_uses_bytes_read_by_each_run():
+    # 100 GB leídos en 1000 s con 4 canales sin compresión: 25.6 MB/s por canal
+    rate, source = channel_rate([_run(100 * GB, 1000, channels=4)], _metrics(500 * 1024), None)
+
+    assert source == 'history'
+    assert rate == pytest.approx(100 * 1024 / 1000 / 4)
+
+
+def test_channel_rate_undoes_compression_slowdown():
+    rate, _ = channel_rate([_run(10 * GB, 1000, compression='HIGH')], _metrics(1024), 'HIGH')
+
+    assert rate == pytest.approx(10 * 1024 / 1000 / 0.25)
+
+
+def test_runs_without_input_bytes_fall_back_to_async_io():
+    rate, source = channel_rate([_run(None, 60)], _metrics(1024, channel_rate_mb_s=50.0), 'LOW')
+
+    assert source == 'async_io'
+    assert rate == pytest.approx(50.0 / 0.85)
+
+
+def test_picks_highest_compression_that_fits_the_window():
+    # 100 MB/s por canal, 4 TB en 4 h: HIGH (25 MB/s) necesita 12 canales, BASIC 7
+    runs = [_run(100 * 1000 * MB, 1000)]
+    recommendation = build_recommendation(1, 240, 2, 'HIGH', runs, _metrics(4 * 1024 * 1024, cpu_count=8))
+
+    assert recommendation['recommended'] == {'parallel_degree': 7, 'compression_level': 'BASIC'}
+    assert recommendation['meets_window'] is True
+    assert recommendation['changed'] is True
+
+
+def test_without_license_only_basic_is_considered(monkeypatch):
+    monkeypatch.setattr(settings, 'ADVANCED_COMPRESSION_LICENSED', False)
+    recommendation = build_recommendation(1, 240, 1, 'HIGH', [_run(100 * 1000 * MB, 1000)], _metrics(10 * 1024))
+
+    assert recommendation['recommended'] == {'parallel_degree': 1, 'compression_level': 'BASIC'}
+
+
+def test_io_bound_does_not_add_channels():
+    recommendation = build_recommendation(
+        1, 60, 2, None, [_run(10 * 1000 * MB, 1000)], _metrics(1024 * 1024, io_bound=True)
+    )
+
+    assert recommendation['recommended']['parallel_degree'] == 2
+    assert recommendation['meets_window'] is False
+
+
+def test_short_level1_run_does_not_inflate_the_rate():
+    # Un nivel 1 de 60 s que leyó 1 GB no debe hacer parecer que 1 TB se lee en 60 s
+    runs = window_runs([_run(GB, 60, level=1), _run(1024 * GB, 36000, channels=4, level=0)], True)
+    rate, _ = channel_rate(runs, _metrics(1024 * 1024), None)
+
+    assert rate == pytest.approx(1024 * 1024 / 36000 / 4)
+
+
+def test_without_data_keeps_current_configuration():
+    recommendation = build_recommendation(1, 240, 3, 'LOW', [], _metrics(1024))
+
+    assert recommendation['recommended'] == {'parallel_degree': 3, 'compression_level': 'LOW'}
+    assert recommendation['changed'] is False
+    assert recommendation['reasons']
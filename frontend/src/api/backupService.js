@@ -27,6 +27,44 @@ export const backupService = {
     validateStrategy: (id) => 
         apiClient.get(`/backup/strategies/${id}/validate`),
 
+    // Recomendación de canales y compresión
+    getStrategyTuning: (id) => 
+        apiClient.get(`/backup/strategies/${id}/tuning`),
+
+    applyStrategyTuning: (id) => 
+        apiClient.post(`/backup/strategies/${id}/tuning/apply`),
+
+    // Uso de disco (total, por estrategia y por día)
+    getStorageUsage: (params = {}) => 
+        apiClient.get('/backup/storage', { params }),
+
+    // Retención por ventana de recuperación
+    getStrategyRetention: (id) => 
+        apiClient.get(`/backup/strategies/${id}/retention`),
+
+    applyStrategyRetention: (id) => 
+        apiClient.post(`/backup/strategies/${id}/retention/apply`),
+
+    // Progreso en vivo
+    getBackupProgress: () => 
+        apiClient.get('/backup/progress'),
+
+    progressStreamUrl: `${apiClient.defaults.baseURL}/backup/progress/stream`,
+
+    cancelRun: (logId) => 
+        apiClient.post(`/backup/runs/${logId}/cancel`),
+
+    // Piezas cuyo checksum ya no coincide (scrub)
+    getPieceDrift: (strategyId = null) => 
+        apiClient.get('/backup/pieces/drift', { params: strategyId ? { strategy_id: strategyId } : {} }),
+
+    // Verificación con RMAN (VALIDATE BACKUPSET / RESTORE ... VALIDATE)
+    getRunVerifications: (logId) => 
+        apiClient.get(`/backup/runs/${logId}/verifications`),
+
+    verifyRun: (logId, mode = 'backupset') => 
+        apiClient.post(`/backup/runs/${logId}/verify`, null, { params: { mode } }),
+
     // Jobs programados
     getScheduledJobs: () => 
         apiClient.get('/backup/scheduled-jobs'),
@@ -8,6 +8,9 @@ export const logService = {
     getLog: (id) => 
         apiClient.get(`/logs/${id}`),
 
+    getRmanOutput: (id) => 
+        apiClient.get(`/logs/${id}/rman-output`),
+
     getStrategyLogs: (strategyId, limit = 100, offset = 0) => 
         apiClient.get(`/logs/strategy/${strategyId}`, { 
         params: { limit, offset } 
@@ -26,4 +29,10 @@ export const logService = {
             params: { start_date: startDate, end_date: endDate, level, status },
             responseType: 'blob'
         }),
+
+    exportLogsToPDF: (startDate, endDate, strategyId) => 
+        apiClient.get('/logs/export/pdf', { 
+            params: { start_date: startDate, end_date: endDate, strategy_id: strategyId },
+            responseType: 'blob'
+        }),
 };
\ No newline at end of file
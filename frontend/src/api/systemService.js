@@ -6,8 +6,11 @@ export const systemService = {
         apiClient.get('/system/health'),
 
     // Obtener información de la base de datos
-    getDatabaseInfo: () => 
-        apiClient.get('/system/database/info'),
+    getDatabaseInfo: (refresh = false) => 
+        apiClient.get('/system/database/info', { params: refresh ? { refresh: true } : {} }),
+
+    invalidateDatabaseMetadata: () => 
+        apiClient.post('/system/database/metadata/invalidate'),
 
     // Verificar modo ARCHIVELOG
     checkArchiveLogMode: () => 
@@ -17,6 +20,25 @@ export const systemService = {
     testEmail: (email) => 
         apiClient.post('/system/email/test', null, { params: { email } }),
 
+    // Historial de notificaciones
+    getNotifications: (params = {}) => 
+        apiClient.get('/system/notifications', { params }),
+
+    // Revisión de checksums de las piezas
+    runChecksumScrub: () => 
+        apiClient.post('/system/checksums/scrub'),
+
+    // Mantenimiento del catálogo RMAN (CROSSCHECK / DELETE EXPIRED)
+    getCatalogMaintenanceRuns: (params = {}) => 
+        apiClient.get('/system/maintenance/catalog', { params }),
+
+    runCatalogMaintenance: () => 
+        apiClient.post('/system/maintenance/catalog'),
+
+    // Reconstruir el índice de uso de disco desde el sistema de archivos
+    reconcileStorageUsage: () => 
+        apiClient.post('/system/storage/reconcile'),
+
     // Control del programador
     startScheduler: () => 
         apiClient.post('/system/scheduler/start'),
@@ -119,6 +119,17 @@ const BackupForm = ({ open, onClose, onSave, strategy = null }) => {
         }));
     };
 
+    const handleCustomParameterChange = (field) => (event) => {
+        const value = event.target.value;
+        setFormData(prev => ({
+            ...prev,
+            custom_parameters: {
+                ...(prev.custom_parameters || {}),
+                [field]: value === '' ? undefined : value
+            }
+        }));
+    };
+
     const validateStep = (step) => {
         const newErrors = {};
         
@@ -341,6 +352,42 @@ const BackupForm = ({ open, onClose, onSave, strategy = null }) => {
         case 2:
             return (
             <Grid container spacing={3}>
+                {formData.backup_type === 'incremental' && (
+                <>
+                    <Grid item xs={12}>
+                    <Typography variant="h6" gutterBottom>
+                        Opciones Incrementales
+                    </Typography>
+                    </Grid>
+                    <Grid item xs={12} sm={6}>
+                    <FormControl fullWidth>
+                        <InputLabel>Modo incremental</InputLabel>
+                        <Select
+                        value={formData.custom_parameters?.incremental_mode || 'differential'}
+                        onChange={handleCustomParameterChange('incremental_mode')}
+                        label="Modo incremental"
+                        >
+                        <MenuItem value="differential">Diferencial</MenuItem>
+                        <MenuItem value="cumulative">Acumulativo</MenuItem>
+                        <MenuItem value="image_copy">Copia imagen actualizada</MenuItem>
+                        </Select>
+                    </FormControl>
+                    </Grid>
+                    <Grid item xs={12} sm={6}>
+                    <TextField
+                        fullWidth
+                        label="Días entre niveles 0"
+                        type="number"
+                        value={formData.custom_parameters?.level0_interval_days || ''}
+                        onChange={handleCustomParameterChange('level0_interval_days')}
+                        placeholder="7"
+                        helperText="Se hace un nivel 0 automáticamente si no existe o es más antiguo"
+                        InputProps={{ inputProps: { min: 1, max: 365 } }}
+                    />
+                    </Grid>
+                </>
+                )}
+
                 {formData.backup_type === 'partial' && (
                 <>
                     <Grid item xs={12}>
@@ -407,6 +454,77 @@ const BackupForm = ({ open, onClose, onSave, strategy = null }) => {
                 />
                 </Grid>
 
+                <Grid item xs={12} sm={6}>
+                <TextField
+                    fullWidth
+                    label="Tamaño máximo de pieza"
+                    value={formData.max_backup_size}
+                    onChange={handleChange('max_backup_size')}
+                    placeholder="Ej: 4G, 500M"
+                    helperText="Opcional. Sin unidad se interpreta en MB"
+                />
+                </Grid>
+
+                <Grid item xs={12} sm={6}>
+                <FormControl fullWidth disabled={!formData.compression}>
+                    <InputLabel>Nivel de compresión</InputLabel>
+                    <Select
+                    value={formData.custom_parameters?.compression_level || ''}
+                    onChange={handleCustomParameterChange('compression_level')}
+                    label="Nivel de compresión"
+                    >
+                    <MenuItem value="">Por defecto</MenuItem>
+                    <MenuItem value="BASIC">BASIC</MenuItem>
+                    <MenuItem value="LOW">LOW (Advanced Compression)</MenuItem>
+                    <MenuItem value="MEDIUM">MEDIUM (Advanced Compression)</MenuItem>
+                    <MenuItem value="HIGH">HIGH (Advanced Compression)</MenuItem>
+                    </Select>
+                </FormControl>
+                </Grid>
+
+                <Grid item xs={12} sm={6}>
+                <FormControl fullWidth>
+                    <InputLabel>Verificación tras el backup</InputLabel>
+                    <Select
+                    value={formData.custom_parameters?.verify_mode || ''}
+                    onChange={handleCustomParameterChange('verify_mode')}
+                    label="Verificación tras el backup"
+                    >
+                    <MenuItem value="">Por defecto</MenuItem>
+                    <MenuItem value="backupset">Validar backup sets (VALIDATE BACKUPSET)</MenuItem>
+                    <MenuItem value="restore">Prueba de restauración (RESTORE ... VALIDATE)</MenuItem>
+                    <MenuItem value="none">Sin verificación</MenuItem>
+                    </Select>
+                </FormControl>
+                </Grid>
+
+                <Grid item xs={12} sm={6}>
+                <TextField
+                    fullWidth
+                    label="Ventana objetivo (minutos)"
+                    type="number"
+                    value={formData.custom_parameters?.target_window_minutes || ''}
+                    onChange={handleCustomParameterChange('target_window_minutes')}
+                    placeholder="240"
+                    InputProps={{ inputProps: { min: 1 } }}
+                />
+                </Grid>
+
+                <Grid item xs={12}>
+                <FormControlLabel
+                    control={
+                    <Checkbox
+                        checked={!!formData.custom_parameters?.auto_tune}
+                        onChange={(e) => setFormData(prev => ({
+                        ...prev,
+                        custom_parameters: { ...(prev.custom_parameters || {}), auto_tune: e.target.checked }
+                        }))}
+                    />
+                    }
+                    label="Ajustar canales y compresión automáticamente tras cada backup"
+                />
+                </Grid>
+
                 <Grid item xs={12}>
                 <FormGroup>
                     <FormControlLabel
@@ -32,11 +32,11 @@ export const ConfigProvider = ({ children }) => {
         }
     };
 
-    const refreshDatabaseInfo = async () => {
+    const refreshDatabaseInfo = async (force = false) => {
         try {
             setLoading(true);
             setError(null);
-            const response = await systemService.getDatabaseInfo();
+            const response = await systemService.getDatabaseInfo(force);
             setDatabaseInfo(response.data);
         } catch (err) {
             setError(err.response?.data?.detail || err.message);
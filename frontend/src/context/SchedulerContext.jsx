@@ -20,6 +20,7 @@ export const SchedulerProvider = ({ children }) => {
         scheduled_jobs_count: 0, 
         scheduled_jobs: [] 
     });
+    const [backupProgress, setBackupProgress] = useState({});
     const [loading, setLoading] = useState(false);
     const [error, setError] = useState(null);
 
@@ -161,18 +162,37 @@ export const SchedulerProvider = ({ children }) => {
         fetchStrategies();
         refreshSchedulerStatus();
         
-        // Actualizar estado del scheduler cada 30 segundos
-        const interval = setInterval(() => {
-            refreshSchedulerStatus();
-        }, 30000);
+        // Progreso de backups en vivo (Server-Sent Events) en lugar de sondeo periódico
+        const source = new EventSource(backupService.progressStreamUrl);
+
+        source.addEventListener('snapshot', (event) => {
+            const data = JSON.parse(event.data);
+            setBackupProgress(Object.fromEntries(data.running.map((run) => [run.log_id, run])));
+        });
+
+        source.addEventListener('progress', (event) => {
+            const run = JSON.parse(event.data);
+            setBackupProgress((prev) => ({ ...prev, [run.log_id]: run }));
+        });
+
+        source.addEventListener('finished', (event) => {
+            const run = JSON.parse(event.data);
+            setBackupProgress((prev) => {
+                const next = { ...prev };
+                delete next[run.log_id];
+                return next;
+            });
+            refreshSchedulerStatus(); // Próxima ejecución y cola actualizadas
+        });
 
-        return () => clearInterval(interval);
+        return () => source.close();
     }, []);
 
     const value = {
         // Estado
         strategies,
         schedulerStatus,
+        backupProgress: Object.values(backupProgress),
         loading,
         error,
         
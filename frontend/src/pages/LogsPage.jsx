@@ -36,6 +36,7 @@ import { logService } from '../api/logService';
 
 const LogsPage = () => {
     const [logs, setLogs] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
     const [loading, setLoading] = useState(false);
     const [filters, setFilters] = useState({
         strategy_id: '',
@@ -116,7 +117,7 @@ const LogsPage = () => {
         });
     };
 
-    const loadLogs = async () => {
+    const loadLogs = async (cursor = null) => {
         try {
             setLoading(true);
             const params = {
@@ -132,8 +133,13 @@ const LogsPage = () => {
             }
         });
 
+        if (cursor) {
+            params.cursor = cursor;
+        }
+
         const response = await logService.getLogs(params);
-            setLogs(response.data);
+            setLogs(prev => cursor ? [...prev, ...response.data] : response.data);
+            setNextCursor(response.headers['x-next-cursor'] || null);
         } catch (error) {
             console.error('Error cargando logs:', error);
         } finally {
@@ -206,9 +212,42 @@ const LogsPage = () => {
         }
     };
 
-    const handleViewLog = (log) => {
+    const handleExportPDF = async () => {
+        try {
+            const startDate = filters.start_date || new Date(Date.now() - filters.days * 24 * 60 * 60 * 1000);
+            const endDate = filters.end_date || new Date();
+            
+            const response = await logService.exportLogsToPDF(
+                startDate.toISOString(),
+                endDate.toISOString(),
+                filters.strategy_id || undefined
+            );
+
+            const url = window.URL.createObjectURL(new Blob([response.data], { type: 'application/pdf' }));
+            const link = document.createElement('a');
+            link.href = url;
+            link.setAttribute('download', `auditoria_backups_${formatDate.dateOnly(startDate)}_to_${formatDate.dateOnly(endDate)}.pdf`);
+            document.body.appendChild(link);
+            link.click();
+            link.remove();
+            window.URL.revokeObjectURL(url);
+        } catch (error) {
+            console.error('Error generando reporte PDF:', error);
+        }
+    };
+
+    const handleViewLog = async (log) => {
+        // El listado no incluye la salida RMAN ni los detalles: se cargan bajo demanda
         setSelectedLog(log);
         setDetailDialogOpen(true);
+        try {
+            const response = await logService.getRmanOutput(log.id);
+            setSelectedLog(current => current && current.id === log.id
+                ? { ...current, ...response.data }
+                : current);
+        } catch (error) {
+            console.error('Error cargando detalles del log:', error);
+        }
     };
 
     const handleDeleteLog = async (logId) => {
@@ -258,9 +297,16 @@ const LogsPage = () => {
             >
                 Exportar CSV
             </Button>
+            <Button
+                startIcon={<Download />}
+                onClick={handleExportPDF}
+                variant="outlined"
+            >
+                Reporte PDF
+            </Button>
             <Button
                 startIcon={<Refresh />}
-                onClick={loadLogs}
+                onClick={() => loadLogs()}
                 variant="contained"
             >
                 Actualizar
@@ -479,6 +525,18 @@ const LogsPage = () => {
             loading={loading}
         />
 
+        {nextCursor && (
+            <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+                <Button
+                    variant="outlined"
+                    onClick={() => loadLogs(nextCursor)}
+                    disabled={loading}
+                >
+                    Cargar más
+                </Button>
+            </Box>
+        )}
+
         {/* Diálogo de detalles del log */}
         
         <Dialog
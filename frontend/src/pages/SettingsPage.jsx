@@ -114,7 +114,7 @@ const SettingsPage = () => {
             setLoading(true);
             setMessage({ type: '', text: '' });
             
-            await refreshDatabaseInfo();
+            await refreshDatabaseInfo(true);
             const archiveLogResult = await checkArchiveLogMode();
             
             if (databaseInfo && archiveLogResult) {